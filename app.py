@@ -1,21 +1,50 @@
 import streamlit as st
-from src.data_loader import load_data, preprocess_data
+from src.startup import start_warmup
+from src.cache import get_dataset, cache_stats
 from src.eda import plot_correlation, plot_sales_by_brand, plot_price_distribution
-from src.model import train_price_model, forecast_sales
+from src.model import forecast_sales
+from src.forecasting import forecast_all, FORECASTERS
+from src.registry import get_price_model
 from src.chatbot import chatbot
+from src.figures import cached_figure, get_figure_cache
+from src.interactive import correlation_figure, sales_by_brand_figure, price_distribution_figure
+from src import metrics
 import pandas as pd
 import os
+import uuid
 
 st.set_page_config(page_title="EVisionAI Dashboard", page_icon="🚗", layout="wide")
 
+INTERACTIVE_FIGURES = {func.__name__: func for func in
+                       (correlation_figure, sales_by_brand_figure, price_distribution_figure)}
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def interactive_figure(name, fingerprint, _df):
+    """Plotly figure `name` for the dataset with this fingerprint, built once rather than on every rerun"""
+    # _df is not hashed by Streamlit: the fingerprint identifies its contents
+    return INTERACTIVE_FIGURES[name](_df)
+
+
+# Once per process: load the dataset, price model and plotting/modelling
+# libraries in the background while the first page renders
+start_warmup()
+
+# Stage timings recorded during this run are tagged with the browser session
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+metrics.set_session(st.session_state.session_id)
+
 st.title("🚗 EVisionAI Dashboard")
 st.markdown("### Electric Vehicle Sales & Adoption Analytics Platform")
 
 # Load and preprocess data
 try:
-    df = load_data()
-    df = preprocess_data(df)
+    # Served from the process-wide dataset cache; reloaded only when the file changes
+    df, data_fingerprint = get_dataset()
     st.sidebar.success(f"✅ Data loaded: {len(df)} records")
+    stats = cache_stats()
+    st.sidebar.caption(f"Dataset cache: {stats['hits']} hits, {stats['misses']} misses")
 except FileNotFoundError as e:
     st.error(f"❌ {str(e)}")
     st.stop()
@@ -24,7 +53,11 @@ except Exception as e:
     st.stop()
 
 # Sidebar options
-option = st.sidebar.selectbox("Choose Module", ["Sales Forecast", "Price Prediction", "EDA", "Chatbot"])
+modules = ["Sales Forecast", "Price Prediction", "EDA", "Chatbot"]
+# Hidden profiling module, shown with ?perf=1 in the URL
+if st.query_params.get("perf") == "1":
+    modules.append("Performance")
+option = st.sidebar.selectbox("Choose Module", modules)
 
 # Display data info in sidebar
 if st.sidebar.checkbox("Show Data Info"):
@@ -39,7 +72,8 @@ if st.sidebar.checkbox("Show Data Info"):
 if option == "Sales Forecast":
     st.subheader("📈 Sales Forecasting")
     try:
-        sales_yearly, future_years, forecast = forecast_sales(df)
+        forecaster = st.selectbox("Forecast model", list(FORECASTERS), format_func=lambda name: name.replace('_', ' ').title())
+        sales_yearly, future_years, forecast = forecast_sales(df, forecaster)
         
         st.write("### Yearly EV Sales Trend")
         st.line_chart(sales_yearly.set_index('year')['sales'])
@@ -58,21 +92,25 @@ if option == "Sales Forecast":
             for idx, (col, year, forecast_value) in enumerate(zip(cols, future_years, forecast)):
                 with col:
                     st.metric(f"Forecast {int(year)}", f"{forecast_value:,.0f} units")
+        
+        # Every brand, region and brand/region series, fitted in one pass
+        st.write("### Forecast by Brand and Region")
+        level_names = {"Brand": ("Brand",), "Region": ("Region",), "Brand × Region": ("Brand", "Region")}
+        level = st.selectbox("Break down by", list(level_names))
+        series_forecasts = forecast_all(df, fingerprint=data_fingerprint, forecaster=forecaster)
+        summary = series_forecasts[level_names[level]].summary().round(0).astype(int)
+        st.dataframe(summary.sort_values("next_year_forecast", ascending=False), use_container_width=True)
     except Exception as e:
         st.error(f"Error in sales forecasting: {str(e)}")
 
 elif option == "Price Prediction":
     st.subheader("💰 Price Prediction")
     try:
-        # Check if model can be trained (store model in session state to avoid retraining)
-        if 'price_model' not in st.session_state or 'price_rmse' not in st.session_state:
-            with st.spinner("Training price prediction model..."):
-                model, rmse = train_price_model(df)
-                st.session_state.price_model = model
-                st.session_state.price_rmse = rmse
-        else:
-            model = st.session_state.price_model
-            rmse = st.session_state.price_rmse
+        # Served from the on-disk model registry; trained only if no artifact matches the data
+        with st.spinner("Loading price prediction model..."):
+            artifact = get_price_model(df, data_fingerprint, incremental=True)
+        predictor = artifact["predictor"]
+        rmse = artifact["rmse"]
         
         st.success(f"✅ Model trained successfully! RMSE: ${rmse:,.2f}")
         
@@ -105,34 +143,16 @@ elif option == "Price Prediction":
             st.warning("Brand column not found in dataset")
             brand = "Unknown"
         
+        # Any further categorical features the model was trained with
+        extra_features = {}
+        for feature in predictor.categorical_features:
+            if feature != 'brand':
+                extra_features[feature] = st.selectbox(feature.replace('_', ' '), predictor.encoder.categories_[feature])
+        
         if st.button("Predict Price", type="primary"):
             try:
-                # Prepare input for model - match training format
-                input_data = {
-                    "battery_kwh": [battery],
-                    "range_km": [range_km],
-                    "year": [year],
-                    "acceleration": [acceleration],
-                    "brand": [brand]
-                }
-                input_df = pd.DataFrame(input_data)
-                
-                # Encode categorical variables same way as training
-                input_df = pd.get_dummies(input_df, columns=['brand'], drop_first=True, dtype=int)
-                
-                # Ensure same columns as training data
-                if hasattr(model, 'feature_names_in_'):
-                    model_features = model.feature_names_in_
-                    # Add missing columns with 0
-                    for col in model_features:
-                        if col not in input_df.columns:
-                            input_df[col] = 0
-                    # Reorder columns to match model
-                    input_df = input_df[model_features]
-                else:
-                    st.warning("Model does not have feature names. Prediction may be inaccurate.")
-                
-                price_pred = model.predict(input_df)[0]
+                # Encoded straight into the model's feature layout by the predictor
+                price_pred = predictor.predict_one(battery, range_km, year, acceleration, brand, **extra_features)
                 
                 # Display prediction
                 st.success(f"### Predicted EV Price: ${price_pred:,.2f}")
@@ -148,38 +168,32 @@ elif option == "Price Prediction":
 elif option == "EDA":
     st.subheader("📊 Exploratory Data Analysis")
     
-    # Ensure assets directory exists
-    os.makedirs("assets", exist_ok=True)
-    
-    try:
-        st.write("### Correlation Heatmap")
-        plot_correlation(df)
-        if os.path.exists("assets/corr_heatmap.png"):
-            st.image("assets/corr_heatmap.png", use_container_width=True)
-        else:
-            st.warning("Correlation plot could not be generated")
-    except Exception as e:
-        st.error(f"Error generating correlation plot: {str(e)}")
-    
-    try:
-        st.write("### Sales by Brand")
-        plot_sales_by_brand(df)
-        if os.path.exists("assets/sales_by_brand.png"):
-            st.image("assets/sales_by_brand.png", use_container_width=True)
-        else:
-            st.warning("Sales by brand plot could not be generated")
-    except Exception as e:
-        st.error(f"Error generating sales by brand plot: {str(e)}")
+    # Interactive charts send only aggregates to the browser, which renders them, and are
+    # built once per dataset version; static figures are rendered once per dataset version
+    # and served from the figure cache
+    interactive = st.toggle("Interactive charts")
+    figures = [
+        ("Correlation Heatmap", plot_correlation, correlation_figure, "correlation plot"),
+        ("Sales by Brand", plot_sales_by_brand, sales_by_brand_figure, "sales by brand plot"),
+        ("Price Distribution", plot_price_distribution, price_distribution_figure, "price distribution plot"),
+    ]
+    for title, plot_func, figure_func, label in figures:
+        try:
+            st.write(f"### {title}")
+            if interactive:
+                st.plotly_chart(interactive_figure(figure_func.__name__, data_fingerprint, df),
+                                use_container_width=True)
+                continue
+            image, render_seconds = cached_figure(plot_func, df, data_fingerprint)
+            st.image(image, use_container_width=True)
+            if render_seconds is not None:
+                st.caption(f"Rendered in {render_seconds * 1000:,.0f} ms")
+        except Exception as e:
+            st.error(f"Error generating {label}: {str(e)}")
     
-    try:
-        st.write("### Price Distribution")
-        plot_price_distribution(df)
-        if os.path.exists("assets/price_dist.png"):
-            st.image("assets/price_dist.png", use_container_width=True)
-        else:
-            st.warning("Price distribution plot could not be generated")
-    except Exception as e:
-        st.error(f"Error generating price distribution plot: {str(e)}")
+    if not interactive:
+        with st.expander("Figure render times"):
+            st.dataframe(pd.DataFrame(get_figure_cache().stats()).T, use_container_width=True)
 
 elif option == "Chatbot":
     st.subheader("🤖 EV Chatbot")
@@ -229,3 +243,37 @@ elif option == "Chatbot":
                 st.rerun()
             except Exception as e:
                 st.error(f"Error: {str(e)}")
+
+elif option == "Performance":
+    st.subheader("⏱️ Performance")
+    st.write("Recent pipeline stage timings for this session. Stages served from a cache do not run and are not listed.")
+
+    session_records = metrics.recent(session=st.session_state.session_id)
+    if session_records:
+        recent_df = pd.DataFrame(session_records)
+        recent_df["time"] = pd.to_datetime(recent_df["timestamp"], unit="s").dt.strftime("%H:%M:%S")
+        recent_df["ms"] = (recent_df["seconds"] * 1000).round(1)
+        columns = ["time", "stage", "ms", "rows"]
+        if metrics.memory_tracking_enabled():
+            recent_df["peak MiB"] = (recent_df["peak_bytes"] / 2**20).round(2)
+            columns.append("peak MiB")
+        st.dataframe(recent_df[columns], use_container_width=True, hide_index=True)
+    else:
+        st.info("No stages have run in this session yet.")
+
+    st.write("### All sessions since startup")
+    stage_totals = pd.DataFrame(metrics.totals()).T
+    if not stage_totals.empty:
+        stage_totals["mean_ms"] = (stage_totals["seconds"] / stage_totals["calls"] * 1000).round(1)
+        stage_totals["max_ms"] = (stage_totals["max_seconds"] * 1000).round(1)
+        st.dataframe(stage_totals[["calls", "mean_ms", "max_ms", "rows", "peak_bytes"]], use_container_width=True)
+
+    if not metrics.memory_tracking_enabled():
+        st.caption("Peak memory is not tracked; start the app with EVISIONAI_TRACE_MEMORY=1 to record it.")
+    else:
+        st.caption("Peak memory is left blank for stages that overlapped a stage in another session or thread, "
+                   "since the process-wide peak cannot be split between them.")
+    col1, col2 = st.columns(2)
+    col1.download_button("Prometheus metrics", metrics.to_prometheus(), file_name="evisionai.prom", mime="text/plain")
+    col2.download_button("Stage records (JSON lines)", metrics.to_json_lines(), file_name="evisionai-stages.jsonl",
+                         mime="application/x-ndjson")
@@ -0,0 +1,59 @@
+"""
+Rolling-origin backtest of the forecasters on real and synthetic series.
+
+Scores every forecaster on the Brand x Region series of data/train.csv and
+on --series synthetic seasonal series of --months months, reporting mean
+absolute error, each model's fit/predict time per series and origin, and
+how often each forecaster is chosen per series by choose_forecasters.
+
+Usage: python benchmarks/bench_backtest.py [--series 10000] [--months 48]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.cache import get_dataset
+from src.forecasting import SeriesMatrix, backtest, choose_forecasters
+
+
+def synthetic_series(n_series, n_months, seed=0):
+    rng = np.random.RandomState(seed)
+    t = np.arange(n_months)
+    level = rng.uniform(100, 1000, (n_series, 1))
+    trend = rng.uniform(-2, 4, (n_series, 1)) * t
+    season = rng.uniform(0, 0.3, (n_series, 1)) * level * np.sin(2 * np.pi * t / 12)
+    noise = rng.normal(0, 0.05, (n_series, n_months)) * level
+    return np.maximum(level + trend + season + noise, 0)
+
+
+def report(title, values, horizon, n_origins):
+    scores = backtest(values, horizon=horizon, n_origins=n_origins)
+    chosen = choose_forecasters(scores).value_counts()
+    summary = scores.groupby(level="forecaster", sort=False).agg(
+        mae=("mae", "mean"), fit_seconds=("model_fit_seconds", "first"),
+        predict_seconds=("model_predict_seconds", "first"))
+    print(f"{title}: {values.shape[0]:,} series x {values.shape[1]} months, "
+          f"{n_origins} origins x {horizon} months")
+    for name, row in summary.iterrows():
+        print(f"  {name:>15}: MAE {row['mae']:10,.1f}  fit {row['fit_seconds'] * 1e6:7.2f}  "
+              f"predict {row['predict_seconds'] * 1e6:6.2f} us/series per origin  chosen for {chosen.get(name, 0):,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--series", type=int, default=10_000)
+    parser.add_argument("--months", type=int, default=48)
+    args = parser.parse_args()
+
+    df, fingerprint = get_dataset()
+    matrix = SeriesMatrix.from_frame(df, ["Brand", "Region"], fingerprint)
+    report("train.csv Brand x Region", matrix.values, horizon=2, n_origins=3)
+    report("synthetic seasonal", synthetic_series(args.series, args.months), horizon=6, n_origins=3)
+
+
+if __name__ == "__main__":
+    main()
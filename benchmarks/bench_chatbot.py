@@ -0,0 +1,95 @@
+"""
+Replay a query log through the chatbot and report per-query latency.
+
+Builds a frame of the requested size by tiling data/train.csv, then replays
+a synthetic query log (or one question per line from --log) through
+chatbot(df, query), reporting p50/p99 latency and throughput.
+
+Usage: python benchmarks/bench_chatbot.py [--rows 1000000] [--queries 20000] [--log FILE]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.chatbot import chatbot
+from src.data_loader import load_data, preprocess_data
+
+QUESTION_TEMPLATES = [
+    "What is the average price of EVs?",
+    "Which model has the highest sales?",
+    "What are the sales forecasts?",
+    "What brands are available?",
+    "How many models are there?",
+    "Top sales in {year}?",
+    "Mean price for {brand}",
+    "Show me future sales for {brand}",
+    "Tell me about {brand}",
+    "Is the {brand} cheap?",
+]
+
+
+def make_frame(rows):
+    base = load_data()
+    reps = -(-rows // len(base))
+    df = pd.concat([base] * reps, ignore_index=True).iloc[:rows]
+    return preprocess_data(df)
+
+
+def make_query_log(n, seed=0):
+    """Synthetic log mixing repeated questions with per-user variants"""
+    rng = np.random.RandomState(seed)
+    brands = ["Tesla", "BYD", "Kia", "Ford", "BMW", "Nissan", "Hyundai", "Toyota", "Volkswagen"]
+    queries = []
+    for _ in range(n):
+        template = QUESTION_TEMPLATES[rng.randint(len(QUESTION_TEMPLATES))]
+        query = template.format(brand=brands[rng.randint(len(brands))], year=rng.randint(2015, 2025))
+        if rng.random_sample() < 0.3:
+            query = query.upper() if rng.random_sample() < 0.5 else f"  {query.lower()} "
+        queries.append(query)
+    return queries
+
+
+def percentile_ms(latencies_ns, q):
+    return np.percentile(latencies_ns, q) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    parser.add_argument("--log", help="file with one logged question per line")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    if args.log:
+        with open(args.log, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = make_query_log(args.queries)
+
+    start = time.perf_counter()
+    chatbot(df, queries[0])
+    print(f"first query (fingerprint, cube and engine build) on {args.rows:,} rows: "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    latencies = np.empty(len(queries), dtype="int64")
+    start = time.perf_counter()
+    for i, query in enumerate(queries):
+        t0 = time.perf_counter_ns()
+        chatbot(df, query)
+        latencies[i] = time.perf_counter_ns() - t0
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(queries):,} queries: p50 {percentile_ms(latencies, 50):.3f} ms, "
+          f"p99 {percentile_ms(latencies, 99):.3f} ms, max {latencies.max() / 1e6:.3f} ms, "
+          f"{len(queries) / elapsed:,.0f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+EDA plot time with and without large-data mode on a tiled dataset.
+
+Tiles the preprocessed data/train.csv to --rows rows (with jittered prices so
+values are not all repeated), renders plot_price_distribution and
+plot_correlation both ways, and reports the time and the share of pixels
+that differ between the two images.
+
+Usage: python benchmarks/bench_eda_large.py [--rows 2000000]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import matplotlib.image as mpimg
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_loader import load_data, preprocess_data
+from src.eda import plot_correlation, plot_price_distribution
+
+
+def make_frame(rows, seed=0):
+    base = preprocess_data(load_data())
+    reps = -(-rows // len(base))
+    df = pd.concat([base] * reps, ignore_index=True).iloc[:rows]
+    rng = np.random.RandomState(seed)
+    df["price"] = df["price"] * rng.uniform(0.95, 1.05, len(df))
+    return df
+
+
+def timed(plot_func, df, large):
+    start = time.perf_counter()
+    image = plot_func(df, large=large)
+    return time.perf_counter() - start, mpimg.imread(io.BytesIO(image))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"{len(df):,} rows")
+    for plot_func in (plot_price_distribution, plot_correlation):
+        full_seconds, full = timed(plot_func, df, large=False)
+        large_seconds, binned = timed(plot_func, df, large=True)
+        if full.shape == binned.shape:
+            differing = (np.abs(full - binned).sum(axis=-1) > 0.05).mean()
+            similarity = f"{differing:.2%} of pixels differ"
+        else:
+            similarity = f"image sizes differ: {full.shape} vs {binned.shape}"
+        print(f"{plot_func.__name__:>24}: full {full_seconds:6.2f} s, large-data mode {large_seconds:6.2f} s "
+              f"({full_seconds / large_seconds:.1f}x), {similarity}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Fit time, peak memory and accuracy of the price model under different feature encodings.
+
+Compares the dense int64 get_dummies encoding with FeatureEncoder's float32
+ordinal and one-hot encodings (dense up to MAX_DENSE_ONEHOT_COLUMNS
+columns), with brand, Model, Region and Vehicle_Type as categorical
+features. Each variant is timed in its own process on --rows rows so peak
+RSS is measured independently. Accuracy is the holdout RMSE on
+data/train.csv itself, as the scaled-up frame repeats its rows, averaged
+over --seeds forest seeds for the default brand-only model and for the four
+categoricals.
+
+Usage: python benchmarks/bench_encoding.py [--rows 200000] [--trees 20] [--seeds 5]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.cache import get_dataset
+from src.data_loader import load_data, preprocess_data
+from src.model import price_feature_frame, price_target, train_price_model
+
+CATEGORICAL = ("brand", "Model", "Region", "Vehicle_Type")
+VARIANTS = ("dense", "ordinal", "onehot")
+
+
+def make_frame(rows):
+    base = load_data()
+    reps = -(-rows // len(base))
+    return preprocess_data(pd.concat([base] * reps, ignore_index=True).iloc[:rows])
+
+
+def fit_dense(df, trees, categorical=CATEGORICAL, random_state=42):
+    """The previous encoding: pd.get_dummies into a dense int64 frame. Returns the holdout RMSE"""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import train_test_split
+
+    X = pd.get_dummies(price_feature_frame(df, categorical), columns=list(categorical), drop_first=True, dtype=int)
+    y = price_target(df)
+    valid = y > 0
+    X_train, X_test, y_train, y_test = train_test_split(X[valid], y[valid], test_size=0.2, random_state=42,
+                                                        shuffle=True)
+    forest = RandomForestRegressor(n_estimators=trees, random_state=random_state, n_jobs=-1).fit(X_train, y_train)
+    return np.sqrt(mean_squared_error(y_test, forest.predict(X_test)))
+
+
+def fit(variant, df, trees, categorical=CATEGORICAL, random_state=42):
+    if variant == "dense":
+        return fit_dense(df, trees, categorical, random_state)
+    return train_price_model(df, n_estimators=trees, random_state=random_state, categorical_features=categorical,
+                             encoding=variant)[1]
+
+
+def mean_rmse(variant, categorical, seeds):
+    df, _ = get_dataset()
+    return float(np.mean([fit(variant, df, 100, categorical, seed) for seed in range(seeds)]))
+
+
+def run_variant(variant, rows, trees):
+    df = make_frame(rows)
+    start = time.perf_counter()
+    fit(variant, df, trees)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"variant": variant, "seconds": elapsed, "peak_rss_mb": peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--trees", type=int, default=20)
+    parser.add_argument("--seeds", type=int, default=5, help="forest seeds the train.csv RMSE is averaged over")
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.rows, args.trees)
+        return
+
+    print(f"{args.rows:,} rows, {args.trees} trees, categorical features: {', '.join(CATEGORICAL)}")
+    for variant in VARIANTS:
+        out = subprocess.run(
+            [sys.executable, __file__, "--variant", variant, "--rows", str(args.rows), "--trees", str(args.trees)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{variant:>8}: fit {result['seconds']:.2f} s, peak RSS {result['peak_rss_mb']:.0f} MB, "
+              f"train.csv RMSE {mean_rmse(variant, ('brand',), args.seeds):,.0f} (brand), "
+              f"{mean_rmse(variant, CATEGORICAL, args.seeds):,.0f} (four categoricals)")
+
+
+if __name__ == "__main__":
+    main()
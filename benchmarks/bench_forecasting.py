@@ -0,0 +1,68 @@
+"""
+Multi-series forecasting throughput on synthetic Brand x Region sales.
+
+Builds --brands x --regions series of --months monthly sales rows, forecasts
+every Brand, Region and Brand x Region series with forecast_all, and checks
+a sample of series against one LinearRegression fit per series.
+
+Usage: python benchmarks/bench_forecasting.py [--brands 100] [--regions 100] [--months 36]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.forecasting import forecast_all
+
+
+def make_frame(brands, regions, months, seed=0):
+    rng = np.random.RandomState(seed)
+    index = pd.MultiIndex.from_product([
+        [f"Brand{i}" for i in range(brands)],
+        [f"Region{i}" for i in range(regions)],
+        pd.period_range("2021-01", periods=months, freq="M"),
+    ], names=["Brand", "Region", "Date"])
+    frame = index.to_frame(index=False)
+    for dim in ("Brand", "Region"):
+        frame[dim] = frame[dim].astype("category")
+    trend = rng.uniform(-5, 5, brands * regions).repeat(months) * np.tile(np.arange(months), brands * regions)
+    frame["Units_Sold"] = np.maximum(rng.poisson(200, len(frame)) + trend, 0).astype("int64")
+    return frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--brands", type=int, default=100)
+    parser.add_argument("--regions", type=int, default=100)
+    parser.add_argument("--months", type=int, default=36)
+    args = parser.parse_args()
+
+    df = make_frame(args.brands, args.regions, args.months)
+    start = time.perf_counter()
+    forecasts = forecast_all(df)
+    elapsed = time.perf_counter() - start
+    n_series = sum(len(forecast.keys) for forecast in forecasts.values())
+
+    pair = forecasts[("Brand", "Region")]
+    sample = np.random.RandomState(1).choice(len(pair.keys), size=min(200, len(pair.keys)), replace=False)
+    t = np.arange(args.months).reshape(-1, 1)
+    start = time.perf_counter()
+    for i in sample:
+        fit = LinearRegression().fit(t, pair.matrix.values[i])
+        assert np.isclose(fit.coef_[0], pair.slope[i]) and np.isclose(fit.intercept_, pair.forecaster.intercept_[i])
+    per_series = (time.perf_counter() - start) / len(sample)
+
+    print(f"{len(df):,} rows, {n_series:,} series over {args.months} months")
+    print(f"forecast_all: {elapsed * 1000:.0f} ms ({n_series / elapsed:,.0f} series/s)")
+    print(f"one LinearRegression per series: {per_series * 1000:.2f} ms/series, "
+          f"~{per_series * n_series:.1f} s for all")
+
+
+if __name__ == "__main__":
+    main()
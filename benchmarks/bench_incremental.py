@@ -0,0 +1,73 @@
+"""
+Incremental price model update against a full retrain when a month is appended.
+
+The rows of data/train.csv are ordered by month and the last --months months
+are held back. A model is registered for the earlier rows, the held-back
+rows are appended, and the registry's incremental update is compared with a
+full retrain on time and on RMSE over a holdout of the appended rows. The
+RMSE gap is the accuracy given up for the faster update; the registry bounds
+it by retraining fully after MAX_INCREMENTAL_GENERATIONS updates or once
+more than MAX_APPENDED_SHARE of the rows were appended since the last full
+fit.
+
+Usage: python benchmarks/bench_incremental.py [--months 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.cache import get_dataset
+from src.registry import (MAX_APPENDED_SHARE, MAX_INCREMENTAL_GENERATIONS, ModelRegistry, build_artifact,
+                          build_incremental_artifact)
+from src.schema import read_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--months", type=int, default=1)
+    args = parser.parse_args()
+
+    raw = read_csv("data/train.csv").sort_values("Date", kind="stable")
+    months = raw["Date"].unique()
+    cutoff = months[-args.months]
+    base_rows = raw[raw["Date"] < cutoff]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "train.csv")
+        base_rows.astype({"Date": str}).to_csv(path, index=False)
+        registry = ModelRegistry(os.path.join(tmp, "models"))
+        df, fingerprint = get_dataset(path)
+        base = registry.get_or_train(df, fingerprint)
+
+        raw.astype({"Date": str}).to_csv(path, index=False)
+        df, fingerprint = get_dataset(path)
+        found = registry.find_base(df, base["params"])
+        assert found is None or found["fingerprint"] == base["fingerprint"], "wrong base artifact"
+        # Measured even when the registry would retrain fully instead
+        updated = build_incremental_artifact(base, df, fingerprint, compare=True)
+        start = time.perf_counter()
+        build_artifact(df, fingerprint, base["params"])
+        full_seconds = time.perf_counter() - start
+        served = registry.get_or_train(df, fingerprint, incremental=True)
+
+    comparison = updated["comparison"]
+    print(f"{len(base_rows):,} base rows + {len(df) - len(base_rows):,} appended "
+          f"({args.months} month(s)), {comparison['holdout_rows']} held out")
+    print(f"incremental update: {updated['train_seconds']:.2f} s, "
+          f"{len(updated['model'].named_steps['forest'].estimators_)} trees, "
+          f"holdout RMSE {comparison['incremental_rmse']:,.0f}")
+    print(f"full retrain:       {full_seconds:.2f} s, holdout RMSE {comparison['full_retrain_rmse']:,.0f}")
+    gap = comparison["incremental_rmse"] - comparison["full_retrain_rmse"]
+    print(f"accuracy gap:       {gap:+,.0f} RMSE ({gap / comparison['full_retrain_rmse']:+.0%}) for the incremental update")
+    appended_share = (len(df) - len(base_rows)) / len(df)
+    print(f"registry serves:    {'incremental update' if served['generation'] else 'full retrain'} "
+          f"({appended_share:.0%} of rows appended, limit {MAX_APPENDED_SHARE:.0%}; "
+          f"at most {MAX_INCREMENTAL_GENERATIONS} updates in a row)")
+
+
+if __name__ == "__main__":
+    main()
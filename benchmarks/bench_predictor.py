@@ -0,0 +1,68 @@
+"""
+Throughput of PricePredictor against the DataFrame/get_dummies inference path.
+
+Usage: python benchmarks/bench_predictor.py [--candidates 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_loader import load_data, preprocess_data
+from src.model import PricePredictor, train_price_model
+
+
+def make_candidates(n, brands, seed=0):
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        "battery_kwh": rng.randint(40, 101, n),
+        "range_km": rng.randint(200, 700, n),
+        "year": rng.randint(2015, 2026, n),
+        "acceleration": rng.uniform(3, 12, n).round(1),
+        "brand": np.asarray(brands, dtype=object)[rng.randint(0, len(brands), n)],
+    })
+
+
+def dataframe_predict(model, candidates):
+    """The get_dummies + column alignment path app.py used before PricePredictor"""
+    encoded = pd.get_dummies(candidates, columns=["brand"], drop_first=True, dtype=int)
+    encoded = encoded.reindex(columns=model.feature_names_in_, fill_value=0)
+    return model.predict(encoded)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--candidates", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = preprocess_data(load_data())
+    model, _ = train_price_model(df)
+    predictor = PricePredictor(model)
+    candidates = make_candidates(args.candidates, sorted(df["brand"].astype(str).unique()))
+
+    start = time.perf_counter()
+    expected = dataframe_predict(model, candidates)
+    baseline = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = predictor.predict_many(candidates)
+    batch = time.perf_counter() - start
+    assert np.allclose(expected, predicted), "predictor disagrees with model.predict"
+
+    single = candidates.head(200).to_dict("records")
+    start = time.perf_counter()
+    for record in single:
+        predictor.predict_one(**record)
+    per_call = (time.perf_counter() - start) / len(single)
+
+    print(f"{args.candidates:,} candidates: DataFrame path {args.candidates / baseline:,.0f}/s, "
+          f"predict_many {args.candidates / batch:,.0f}/s, predict_one {per_call * 1000:.2f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark preprocess_data against the original copy-and-loop implementation.
+
+Tiles data/train.csv up to the requested row count, times both versions and
+checks that their outputs are bit-for-bit identical, then reports whether
+the TARGET_SPEEDUP was reached.
+
+At 1M rows, complete data is at the target: 2.8-3.4x across runs. With missing
+values the target is NOT met: 1.9-2.5x. What is left of the imputation is one
+pass per filled column (Arrow value counts and fills for strings, a
+partition for each median), which the legacy version makes too.
+
+Usage: python benchmarks/bench_preprocess.py [--rows 1000000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.data_loader import preprocess_data
+
+TARGET_SPEEDUP = 3.0
+
+
+def legacy_preprocess_data(df):
+    """preprocess_data as it was before the single-pass rewrite"""
+    df = df.copy()
+    if 'Date' in df.columns and 'Battery_Capacity_kWh' in df.columns:
+        if 'year' not in df.columns:
+            df['year'] = pd.to_datetime(df['Date'], format='%Y-%m', errors='coerce').dt.year
+            if df['year'].isna().any():
+                df['year'] = df['Date'].str[:4].astype(int, errors='ignore')
+        if 'Battery_Capacity_kWh' in df.columns and 'battery_kwh' not in df.columns:
+            df['battery_kwh'] = df['Battery_Capacity_kWh']
+        if 'Brand' in df.columns and 'brand' not in df.columns:
+            df['brand'] = df['Brand']
+        if 'Units_Sold' in df.columns and 'sales' not in df.columns:
+            df['sales'] = df['Units_Sold']
+        if 'Revenue' in df.columns and 'Units_Sold' in df.columns:
+            if 'price' not in df.columns:
+                df['price'] = df['Revenue'] / df['Units_Sold']
+                df['price'] = df['price'].replace([np.inf, -np.inf], np.nan)
+        if 'range_km' not in df.columns and 'battery_kwh' in df.columns:
+            df['range_km'] = df['battery_kwh'] * 6
+            np.random.seed(42)
+            variation = np.random.uniform(0.8, 1.2, len(df))
+            df['range_km'] = (df['range_km'] * variation).astype(int)
+        if 'acceleration' not in df.columns and 'battery_kwh' in df.columns:
+            battery_normalized = (df['battery_kwh'] - 40) / 10
+            df['acceleration'] = 12 - battery_normalized
+            df['acceleration'] = df['acceleration'].clip(lower=3, upper=12)
+            np.random.seed(42)
+            variation = np.random.uniform(0.9, 1.1, len(df))
+            df['acceleration'] = (df['acceleration'] * variation).round(1)
+    numeric_cols = df.select_dtypes(include=['float64', 'int64', 'float32', 'int32']).columns
+    for col in numeric_cols:
+        if df[col].isna().any():
+            median_val = df[col].median()
+            if pd.notna(median_val):
+                df[col] = df[col].fillna(median_val)
+            else:
+                df[col] = df[col].fillna(0)
+    cat_cols = df.select_dtypes(include=['object', 'string']).columns
+    for col in cat_cols:
+        if df[col].isna().any():
+            mode_value = df[col].mode()
+            if len(mode_value) > 0:
+                df[col] = df[col].fillna(mode_value[0])
+            else:
+                df[col] = df[col].fillna('Unknown')
+    return df
+
+
+def make_frame(rows, missing=False):
+    """Raw (unparsed-schema) frame of train.csv rows tiled to the given length"""
+    base = pd.read_csv("data/train.csv")
+    reps = -(-rows // len(base))
+    df = pd.concat([base] * reps, ignore_index=True).iloc[:rows].reset_index(drop=True)
+    if missing:
+        rng = np.random.RandomState(0)
+        for col in ["Units_Sold", "Discount_Percentage", "Region", "Model"]:
+            df.loc[rng.random_sample(len(df)) < 0.01, col] = np.nan
+    return df
+
+
+def assert_identical(expected, actual):
+    """Fail unless both frames have the same columns, dtypes and bytes"""
+    pd.testing.assert_frame_equal(expected, actual, check_exact=True)
+    for col in expected.columns:
+        a = expected[col].to_numpy()
+        b = actual[col].to_numpy()
+        if a.dtype.kind == "f":
+            assert np.array_equal(a.view("int64"), b.view("int64")), f"{col} differs bitwise"
+
+
+def best_time(func, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for missing in (False, True):
+        df = make_frame(args.rows, missing=missing)
+        assert_identical(legacy_preprocess_data(df), preprocess_data(df))
+
+        legacy = best_time(legacy_preprocess_data, df, args.repeat)
+        current = best_time(preprocess_data, df, args.repeat)
+        label = "with missing values" if missing else "complete"
+        speedup = legacy / current
+        print(f"{args.rows:,} rows ({label}): legacy {legacy * 1000:.1f} ms, "
+              f"current {current * 1000:.1f} ms, speedup {speedup:.1f}x (outputs identical), "
+              f"target {TARGET_SPEEDUP:.0f}x {'met' if speedup >= TARGET_SPEEDUP else 'NOT met'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+sum_by on ad-hoc frames versus a plain groupby.
+
+Frames that did not come from get_dataset (report slices, library callers)
+have no remembered fingerprint, so sum_by scans them with one groupby instead
+of hashing them and building a cube. This times sum_by against
+df.groupby().sum() on a fresh frame, a new slice object of the same rows and
+a fingerprinted frame whose cube is cached, and checks the results agree.
+
+Usage: python benchmarks/bench_rollups.py [--rows 1000000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.cache import dataset_fingerprint
+from src.cube import sum_by
+from src.data_loader import preprocess_data
+from src.synthetic import synthetic_frame
+
+
+def best_time(func, make_frame, repeat):
+    times = []
+    for _ in range(repeat):
+        df = make_frame()
+        start = time.perf_counter()
+        func(df)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df = preprocess_data(synthetic_frame(args.rows))
+    region = df["Region"].cat.categories[0]
+    known = df.copy(deep=False)
+    dataset_fingerprint(known)
+
+    def groupby(frame):
+        return frame.groupby("brand", observed=True)["sales"].sum()
+
+    def rollup(frame):
+        return sum_by(frame, "brand", "sales")
+
+    frames = {
+        "fresh frame": lambda: df.copy(deep=False),
+        f"Region={region} slice": lambda: df[df["Region"] == region],
+        "fingerprinted frame (cached cube)": lambda: known,
+    }
+    for label, make_frame in frames.items():
+        pd.testing.assert_series_equal(groupby(make_frame()), rollup(make_frame()), check_dtype=False,
+                                       check_index_type=False, check_categorical=False)
+        plain = best_time(groupby, make_frame, args.repeat)
+        cube = best_time(rollup, make_frame, args.repeat)
+        print(f"{label:>36}: groupby {plain * 1000:7.1f} ms, sum_by {cube * 1000:7.1f} ms "
+              f"({plain / cube:.1f}x, results equal)")
+
+
+if __name__ == "__main__":
+    main()
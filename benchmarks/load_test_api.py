@@ -0,0 +1,98 @@
+"""
+Load test for the HTTP API using only the standard library.
+
+Sends --requests requests from --concurrency threads, each over its own
+keep-alive connection, and reports p50/p99 latency and requests per second
+of the successful (status 200) requests, counting the others as errors.
+Start the service first with python -m src.api.
+
+Usage: python benchmarks/load_test_api.py [--url http://127.0.0.1:8000]
+           [--endpoint predict|chat|forecast] [--requests 5000] [--concurrency 32]
+"""
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+BRANDS = ["Tesla", "BYD", "BMW", "Toyota", "Kia", "Hyundai", "Ford", "Nissan", "Volkswagen"]
+QUERIES = ["What is the average price?", "Which model has the highest sales?", "List the brands",
+           "What are the sales forecasts?", "How many models are there?"]
+
+
+def make_request(endpoint, rng):
+    if endpoint == "predict":
+        body = {"battery_kwh": rng.randint(40, 100), "range_km": rng.randint(200, 700),
+                "year": rng.randint(2015, 2025), "acceleration": round(rng.uniform(3, 12), 1),
+                "brand": rng.choice(BRANDS)}
+        return "POST", "/predict", json.dumps(body)
+    if endpoint == "chat":
+        return "POST", "/chat", json.dumps({"query": rng.choice(QUERIES)})
+    return "GET", "/forecast", None
+
+
+def worker(url, endpoint, count, latencies, errors, seed):
+    rng = random.Random(seed)
+    connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+    headers = {"Content-Type": "application/json"}
+    for _ in range(count):
+        method, path, body = make_request(endpoint, rng)
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                # Rejected requests are not counted towards latency or throughput
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            connection.close()
+            connection = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=["predict", "chat", "forecast"], default="predict")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    latencies, errors = [], []
+    per_thread = [args.requests // args.concurrency + (i < args.requests % args.concurrency)
+                  for i in range(args.concurrency)]
+    threads = [threading.Thread(target=worker, args=(url, args.endpoint, count, latencies, errors, i))
+               for i, count in enumerate(per_thread)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    if not latencies:
+        raise SystemExit(f"No successful requests; errors: {errors[:5]}")
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+    print(f"/{args.endpoint}: {len(latencies):,} ok, {len(errors):,} errors, concurrency {args.concurrency}")
+    if errors:
+        counts = Counter(errors)
+        print("errors: " + ", ".join(f"{error} x{count:,}" for error, count in counts.most_common(5)))
+    print(f"p50 {percentile(50):.1f} ms, p99 {percentile(99):.1f} ms of successful requests, "
+          f"{len(latencies) / elapsed:,.0f} successful requests/s")
+
+
+if __name__ == "__main__":
+    main()
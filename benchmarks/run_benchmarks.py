@@ -0,0 +1,255 @@
+"""
+Benchmark suite: every pipeline stage across synthetic data size tiers.
+
+Each case runs on deterministic synthetic data from src/synthetic.py at the
+chosen tiers. It is timed over --repeat cold runs, each on a fresh frame
+with the dataset-keyed caches cleared, and then run once more under
+tracemalloc for its peak allocated memory. Results are written as JSON and
+compared with a saved baseline. A case is flagged when it is more than
+--tolerance slower, or uses more than --memory-tolerance more memory, than
+in the baseline, and the script then exits with status 1.
+
+Timings depend on the machine, so no baseline is shipped. Record one with
+--save-baseline on the machine that will run the comparisons, before making
+changes. The baseline and the timestamped results are written to
+benchmarks/results/, which git ignores.
+
+Usage: python benchmarks/run_benchmarks.py [--tiers 10k,100k,1M] [--cases forecast_sales,chatbot]
+                                           [--repeat 3] [--baseline PATH] [--save-baseline]
+"""
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import matplotlib
+
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import metrics
+from src.cache import dataset_fingerprint
+from src.chatbot import chatbot, clear_engines
+from src.cube import clear_cubes, get_cube
+from src.data_loader import load_data, preprocess_data
+from src.eda import plot_correlation, plot_price_distribution, plot_sales_by_brand
+from src.forecasting import forecast_all
+from src.interactive import correlation_figure, price_distribution_figure, sales_by_brand_figure
+from src.model import forecast_sales, train_price_model
+from src.out_of_core import train_price_model_out_of_core
+from src.synthetic import synthetic_frame, write_synthetic_csv
+
+TIERS = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000, "100M": 100_000_000}
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+DEFAULT_BASELINE = os.path.join(RESULTS_DIR, "baseline.json")
+# Differences below these are noise, whatever the relative change
+MIN_DELTA_SECONDS = 0.005
+MIN_DELTA_BYTES = 256 * 1024
+
+CHATBOT_QUERIES = [
+    "What is the average price of EVs?",
+    "Which model has the highest sales?",
+    "What are the sales forecasts?",
+    "What brands are available?",
+]
+
+
+def ask_all(df):
+    return [chatbot(df, query) for query in CHATBOT_QUERIES]
+
+
+# (name, input, largest tier it runs at or None, function, required optional package or None).
+# The input is "csv" (a path), "raw" (the frame load_data returns) or "df" (preprocessed).
+CASES = [
+    ("load_data", "csv", 10_000_000, lambda path: load_data(path, use_snapshot=False), None),
+    ("preprocess_data", "raw", None, preprocess_data, None),
+    ("dataset_fingerprint", "df", None, dataset_fingerprint, None),
+    ("get_cube", "df", None, get_cube, None),
+    ("forecast_sales", "df", None, forecast_sales, None),
+    ("forecast_all", "df", None, forecast_all, None),
+    ("train_price_model", "df", 1_000_000, lambda df: train_price_model(df, n_estimators=20), None),
+    ("train_price_model_out_of_core", "df", None,
+     lambda df: train_price_model_out_of_core(df, n_estimators=20, shard_rows=200_000), None),
+    ("plot_correlation", "df", None, plot_correlation, None),
+    ("plot_sales_by_brand", "df", None, plot_sales_by_brand, None),
+    ("plot_price_distribution", "df", None, plot_price_distribution, None),
+    ("correlation_figure", "df", None, correlation_figure, "plotly"),
+    ("sales_by_brand_figure", "df", None, sales_by_brand_figure, "plotly"),
+    ("price_distribution_figure", "df", None, price_distribution_figure, "plotly"),
+    ("chatbot", "df", None, ask_all, None),
+]
+
+
+def fresh(value):
+    """A cold input: caches keyed by the dataset are cleared and frames are new objects"""
+    clear_cubes()
+    clear_engines()
+    gc.collect()
+    if isinstance(value, pd.DataFrame):
+        # A new frame object, so no fingerprint is remembered for it
+        return value.copy(deep=False)
+    return value
+
+
+def run_case(name, func, value, repeat, memory):
+    runs = []
+    for _ in range(repeat):
+        arg = fresh(value)
+        with metrics.stage(f"benchmark:{name}") as info:
+            func(arg)
+        runs.append(info["seconds"])
+    peak_bytes = None
+    if memory:
+        arg = fresh(value)
+        metrics.enable_memory_tracking()
+        try:
+            with metrics.stage(f"benchmark:{name}") as info:
+                func(arg)
+        finally:
+            metrics.disable_memory_tracking()
+        peak_bytes = info["peak_bytes"]
+    return {"seconds": min(runs), "runs": runs, "peak_bytes": peak_bytes}
+
+
+def run_tier(tier, rows, cases, seed, repeat, memory, work_dir):
+    inputs = {}
+    results = []
+    for name, kind, max_rows, func, requires in cases:
+        entry = {"case": name, "tier": tier, "rows": rows}
+        if max_rows is not None and rows > max_rows:
+            entry.update(status="skipped", reason=f"runs up to {max_rows:,} rows")
+        elif requires is not None and importlib.util.find_spec(requires) is None:
+            entry.update(status="skipped", reason=f"needs {requires}")
+        else:
+            if kind not in inputs:
+                if kind == "csv":
+                    inputs["csv"] = write_synthetic_csv(os.path.join(work_dir, f"synthetic-{tier}.csv"), rows, seed)
+                else:
+                    if "raw" not in inputs:
+                        inputs["raw"] = synthetic_frame(rows, seed)
+                    if kind == "df":
+                        inputs["df"] = preprocess_data(inputs["raw"])
+            try:
+                entry.update(status="ok", **run_case(name, func, inputs[kind], repeat, memory))
+            except Exception as e:
+                entry.update(status="error", error=f"{type(e).__name__}: {e}")
+        print_result(entry)
+        results.append(entry)
+    return results
+
+
+def print_result(entry):
+    label = f"{entry['case']:<30} {entry['tier']:>5}"
+    if entry["status"] != "ok":
+        print(f"{label}  {entry['status']}: {entry.get('reason') or entry.get('error')}")
+        return
+    peak = "" if entry["peak_bytes"] is None else f"  peak {entry['peak_bytes'] / 2**20:9.1f} MiB"
+    print(f"{label}  {entry['seconds'] * 1000:10.1f} ms{peak}")
+
+
+def find_regressions(results, baseline, tolerance, memory_tolerance):
+    """Results slower or larger than their baseline entry beyond the tolerances"""
+    previous = {(entry["case"], entry["rows"]): entry for entry in baseline["results"] if entry["status"] == "ok"}
+    regressions = []
+    for entry in results:
+        base = previous.get((entry["case"], entry["rows"]))
+        if entry["status"] != "ok" or base is None:
+            continue
+        if (entry["seconds"] > base["seconds"] * (1 + tolerance)
+                and entry["seconds"] - base["seconds"] > MIN_DELTA_SECONDS):
+            regressions.append({"case": entry["case"], "tier": entry["tier"], "metric": "seconds",
+                                "baseline": base["seconds"], "current": entry["seconds"]})
+        if (entry["peak_bytes"] is not None and base.get("peak_bytes") is not None
+                and entry["peak_bytes"] > base["peak_bytes"] * (1 + memory_tolerance)
+                and entry["peak_bytes"] - base["peak_bytes"] > MIN_DELTA_BYTES):
+            regressions.append({"case": entry["case"], "tier": entry["tier"], "metric": "peak_bytes",
+                                "baseline": base["peak_bytes"], "current": entry["peak_bytes"]})
+    return regressions
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "commit": commit,
+        "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+        "numpy": np.__version__, "pandas": pd.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tiers", default="10k,100k", help=f"comma-separated, from {', '.join(TIERS)}")
+    parser.add_argument("--cases", default=None, help="comma-separated case names (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case; the fastest counts")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run")
+    parser.add_argument("--seed", type=int, default=0, help="synthetic data seed")
+    parser.add_argument("--out", default=None, help="results JSON (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="also save the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="allowed relative memory growth")
+    args = parser.parse_args()
+
+    tiers = [tier.strip() for tier in args.tiers.split(",")]
+    unknown = [tier for tier in tiers if tier not in TIERS]
+    if unknown:
+        parser.error(f"unknown tiers: {unknown}")
+    cases = CASES
+    if args.cases:
+        names = [name.strip() for name in args.cases.split(",")]
+        known = {case[0] for case in CASES}
+        if set(names) - known:
+            parser.error(f"unknown cases: {sorted(set(names) - known)}; choose from {sorted(known)}")
+        cases = [case for case in CASES if case[0] in names]
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for tier in tiers:
+            results.extend(run_tier(tier, TIERS[tier], cases, args.seed, args.repeat, not args.no_memory, work_dir))
+
+    report = {"environment": environment(), "seed": args.seed, "repeat": args.repeat, "results": results}
+    regressions = []
+    if not os.path.exists(args.baseline):
+        if not args.save_baseline:
+            print(f"No baseline at {args.baseline}; nothing compared. Run once with --save-baseline to record one")
+    else:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("seed") != args.seed:
+            print(f"Baseline was generated with seed {baseline.get('seed')}; not comparing")
+        else:
+            regressions = find_regressions(results, baseline, args.tolerance, args.memory_tolerance)
+            report["baseline"] = {"path": args.baseline, "commit": baseline["environment"].get("commit"),
+                                  "regressions": regressions}
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out = args.out or os.path.join(RESULTS_DIR, time.strftime("%Y%m%d-%H%M%S") + ".json")
+    for path in [out] + ([args.baseline] if args.save_baseline else []):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(f"Results: {out}" + (f" (saved as baseline {args.baseline})" if args.save_baseline else ""))
+
+    for regression in regressions:
+        scale, unit = (1000, "ms") if regression["metric"] == "seconds" else (2**-20, "MiB")
+        print(f"REGRESSION {regression['case']} at {regression['tier']}: {regression['metric']} "
+              f"{regression['baseline'] * scale:,.1f} -> {regression['current'] * scale:,.1f} {unit} "
+              f"({regression['current'] / regression['baseline'] - 1:+.0%})")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,43 @@
 """
 EVisionAI - EV Sales & Adoption Analytics Platform
 Source code package for data loading, EDA, modeling, and chatbot functionality.
+
+The public functions below are imported from their submodules on first
+access, so importing the package (or one light submodule such as
+src.chatbot) does not pull in matplotlib, seaborn or scikit-learn.
 """
 
+import importlib
+
 __version__ = "1.0.0"
 
-from .data_loader import load_data, preprocess_data
-from .eda import plot_correlation, plot_sales_by_brand, plot_price_distribution
-from .model import train_price_model, forecast_sales
-from .chatbot import chatbot
-
-__all__ = [
-    "load_data",
-    "preprocess_data",
-    "plot_correlation",
-    "plot_sales_by_brand",
-    "plot_price_distribution",
-    "train_price_model",
-    "forecast_sales",
-    "chatbot",
-]
+# Public name -> submodule defining it
+_EXPORTS = {
+    "load_data": "data_loader",
+    "preprocess_data": "data_loader",
+    "plot_correlation": "eda",
+    "plot_sales_by_brand": "eda",
+    "plot_price_distribution": "eda",
+    "train_price_model": "model",
+    "forecast_sales": "model",
+    "chatbot": "chatbot",
+    "get_dataset": "cache",
+    "dataset_fingerprint": "cache",
+    "cache_stats": "cache",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,248 @@
+"""
+Headless HTTP API for price prediction, sales forecasts and the chatbot.
+
+The dataset and the price model are loaded once at startup. CPU-bound calls
+run in a bounded thread pool so the event loop stays responsive, and
+concurrent /predict requests are micro-batched: requests arriving within a
+few milliseconds of each other are answered by one predict_many call. If a
+batch fails, its requests are retried one at a time so only the failing
+ones get an error. Brands and other categorical values the model was not
+trained on are rejected with status 422.
+Pipeline stage timings are served in the Prometheus format at /metrics.
+
+Requires the optional fastapi, uvicorn and pydantic (2 or later) packages.
+
+Usage: python -m src.api [--host 127.0.0.1] [--port 8000] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from .cache import get_dataset
+from .chatbot import get_chatbot_engine
+from . import metrics
+from .forecasting import FORECASTERS
+from .model import forecast_sales
+from .registry import get_price_model
+
+# Threads for model, forecast and chatbot calls
+DEFAULT_API_WORKERS = min(4, os.cpu_count() or 1)
+
+
+class PriceRequest(BaseModel):
+    battery_kwh: float
+    range_km: float
+    year: int
+    acceleration: float
+    brand: str
+    # Further categorical features the model was trained with, by name
+    categoricals: dict[str, str] = Field(default_factory=dict)
+
+
+class ChatRequest(BaseModel):
+    query: str
+
+
+class PredictionBatcher:
+    """
+    Collects concurrent predictions into batches for one predict_many call.
+
+    A batch is sent when max_batch requests are waiting or max_wait seconds
+    after its first request arrived, whichever comes first. When a batch
+    fails, each of its records is predicted on its own, so one bad record
+    does not fail the others.
+    """
+
+    def __init__(self, predictor, executor, max_batch=256, max_wait=0.002):
+        self.predictor = predictor
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.requests = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, record):
+        """Predicted price for one record (a dict of model inputs)"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Requests already queued join the batch without waiting
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            self.batches += 1
+            self.requests += len(batch)
+            try:
+                await self._predict(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    self._settle(batch[0][1], exception=e)
+                    continue
+                for item in batch:
+                    try:
+                        await self._predict([item])
+                    except Exception as e:
+                        self._settle(item[1], exception=e)
+
+    async def _predict(self, batch):
+        records = [record for record, _ in batch]
+        prices = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.predictor.predict_many, records
+        )
+        for (_, future), price in zip(batch, prices):
+            self._settle(future, result=float(price))
+
+    @staticmethod
+    def _settle(future, result=None, exception=None):
+        # The request may have been cancelled (e.g. client disconnected) meanwhile
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+def create_app(file_path="data/train.csv", workers=DEFAULT_API_WORKERS, max_batch=256, max_wait=0.002):
+    """The FastAPI application serving the dataset at file_path"""
+    state = {}
+
+    @asynccontextmanager
+    async def lifespan(app):
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-worker")
+        loop = asyncio.get_running_loop()
+        df, fingerprint = await loop.run_in_executor(executor, get_dataset, file_path)
+        artifact = await loop.run_in_executor(
+            executor, lambda: get_price_model(df, fingerprint, incremental=True)
+        )
+        batcher = PredictionBatcher(artifact["predictor"], executor, max_batch, max_wait)
+        batcher.start()
+        categories = {name: frozenset(values) for name, values in artifact["predictor"].encoder.categories_.items()}
+        state.update(
+            df=df, fingerprint=fingerprint, artifact=artifact, executor=executor, batcher=batcher,
+            engine=get_chatbot_engine(df, fingerprint), forecasts={}, categories=categories,
+        )
+        try:
+            yield
+        finally:
+            await batcher.stop()
+            executor.shutdown(wait=False)
+
+    app = FastAPI(title="EVisionAI API", lifespan=lifespan)
+
+    async def run(func, *args):
+        return await asyncio.get_running_loop().run_in_executor(state["executor"], func, *args)
+
+    @app.get("/health")
+    async def health():
+        batcher = state["batcher"]
+        return {
+            "status": "ok",
+            "rows": len(state["df"]),
+            "dataset": state["fingerprint"],
+            "model_rmse": state["artifact"]["rmse"],
+            "predict_batches": batcher.batches,
+            "predict_requests": batcher.requests,
+        }
+
+    @app.post("/predict")
+    async def predict(request: PriceRequest):
+        predictor = state["artifact"]["predictor"]
+        missing = set(predictor.categorical_features) - {"brand"} - set(request.categoricals)
+        if missing:
+            raise HTTPException(status_code=422, detail=f"Missing categorical features: {sorted(missing)}")
+        record = request.model_dump(exclude={"categoricals"})
+        record.update(request.categoricals)
+        # The encoder would encode unseen values as unknown and still predict a price
+        for name, categories in state["categories"].items():
+            if record[name] not in categories:
+                raise HTTPException(status_code=422,
+                                    detail=f"Unknown {name}: {record[name]!r}. Use one of {sorted(categories)}")
+        return {"price": await state["batcher"].predict(record)}
+
+    @app.get("/forecast")
+    async def forecast(forecaster: str = "linear"):
+        if forecaster not in FORECASTERS:
+            raise HTTPException(status_code=422, detail=f"Unknown forecaster. Use one of {list(FORECASTERS)}")
+        # The dataset is fixed for the life of the service, so each forecast is computed once
+        result = state["forecasts"].get(forecaster)
+        if result is None:
+            try:
+                sales_yearly, future_years, values = await run(forecast_sales, state["df"], forecaster)
+            except ValueError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+            result = {
+                "history": [{"year": int(year), "sales": float(sales)}
+                            for year, sales in zip(sales_yearly["year"], sales_yearly["sales"])],
+                "forecast": [{"year": int(year), "sales": float(sales)} for year, sales in zip(future_years, values)],
+            }
+            state["forecasts"][forecaster] = result
+        return result
+
+    @app.post("/chat")
+    async def chat(request: ChatRequest):
+        def ask(query):
+            with metrics.stage("chatbot", rows=len(state["df"])):
+                return state["engine"].ask(query)
+        return {"answer": await run(ask, request.query)}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def stage_metrics():
+        # Per-stage timings in the Prometheus text format
+        return metrics.to_prometheus()
+
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the EVisionAI HTTP API")
+    parser.add_argument("--data", default="data/train.csv", help="dataset CSV")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_API_WORKERS, help="threads for model calls")
+    parser.add_argument("--max-batch", type=int, default=256, help="largest /predict micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="longest wait to fill a micro-batch")
+    args = parser.parse_args(argv)
+
+    app = create_app(args.data, args.workers, args.max_batch, args.max_wait_ms / 1000)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
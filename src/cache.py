@@ -0,0 +1,165 @@
+"""
+Process-wide cache of preprocessed datasets.
+
+Streamlit reruns app.py on every interaction, so loading and preprocessing the
+CSV on each rerun dominates response time. Datasets are cached here keyed by
+file path, modification time, size and a content hash, and are shared by all
+sessions served from the same process.
+"""
+
+import hashlib
+import os
+import threading
+import weakref
+
+import pandas as pd
+
+from .data_loader import load_data, preprocess_data, resolve_data_path
+from .metrics import stage
+
+_HASH_BLOCK_SIZE = 1 << 20
+
+# Frames are handed out as shallow copies of the cached one, which is only
+# safe when in-place edits copy first. That is the default from pandas 3 on;
+# on pandas 2 Copy-on-Write is switched on for the process.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Guards _entries, _stats and _load_locks; never held while loading
+_lock = threading.Lock()
+_entries = {}
+_stats = {"hits": 0, "misses": 0}
+# file path -> lock held while that file is hashed, loaded and preprocessed
+_load_locks = {}
+# id(frame) -> (weakref to frame, fingerprint) for frames whose fingerprint is known.
+# Reentrant: the weakref callback may run during garbage collection inside the lock.
+_fingerprints_lock = threading.RLock()
+_frame_fingerprints = {}
+
+
+def file_content_hash(file_path):
+    """Return a hex digest of the file contents, read in fixed-size blocks"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _forget_fingerprint(key, ref):
+    with _fingerprints_lock:
+        # A new frame may already have been remembered under the reused id
+        if key in _frame_fingerprints and _frame_fingerprints[key][0] is ref:
+            del _frame_fingerprints[key]
+
+
+def _remember_fingerprint(df, fingerprint):
+    key = id(df)
+    ref = weakref.ref(df, lambda ref: _forget_fingerprint(key, ref))
+    with _fingerprints_lock:
+        _frame_fingerprints[key] = (ref, fingerprint)
+
+
+def known_fingerprint(df):
+    """The fingerprint remembered for df (e.g. handed out by get_dataset), or None without hashing"""
+    with _fingerprints_lock:
+        known = _frame_fingerprints.get(id(df))
+    if known is not None and known[0]() is df:
+        return known[1]
+    return None
+
+
+def dataset_fingerprint(df):
+    """
+    Return a fingerprint identifying the contents of a DataFrame.
+
+    Frames handed out by get_dataset are answered in O(1); any other frame is
+    hashed once and the result is remembered for as long as the frame lives.
+    Frames must not be modified in place after they have been fingerprinted.
+    """
+    known = known_fingerprint(df)
+    if known is not None:
+        return known
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    fingerprint = digest.hexdigest()
+    _remember_fingerprint(df, fingerprint)
+    return fingerprint
+
+
+def _hand_out(entry):
+    # Shallow copy: callers may add or replace columns without touching the
+    # cached frame, and Copy-on-Write (see the top of this module) keeps
+    # in-place edits from leaking back.
+    df = entry["df"].copy(deep=False)
+    _remember_fingerprint(df, entry["fingerprint"])
+    return df
+
+
+def get_dataset(file_path="data/train.csv"):
+    """
+    Return (df, fingerprint) for the preprocessed dataset at file_path.
+
+    The file is only re-read when its modification time or size changed and
+    its contents hash differently from the cached copy. Concurrent calls for
+    the same file wait for one load; other files load in parallel.
+    """
+    file_path = os.path.abspath(resolve_data_path(file_path))
+    stat = os.stat(file_path)
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entry = _entries.get(file_path)
+        if entry is not None and entry["stat_key"] == stat_key:
+            _stats["hits"] += 1
+            return _hand_out(entry), entry["fingerprint"]
+        load_lock = _load_locks.setdefault(file_path, threading.Lock())
+
+    with load_lock:
+        with _lock:
+            entry = _entries.get(file_path)
+            if entry is not None and entry["stat_key"] == stat_key:
+                # Loaded by another thread while this one waited
+                _stats["hits"] += 1
+                return _hand_out(entry), entry["fingerprint"]
+
+        content_hash = file_content_hash(file_path)
+        if entry is not None and entry["content_hash"] == content_hash:
+            # File was touched or rewritten with identical contents
+            with _lock:
+                entry["stat_key"] = stat_key
+                _stats["hits"] += 1
+            return _hand_out(entry), entry["fingerprint"]
+
+        # Timed here rather than on the functions, which also run once per streamed chunk
+        with stage("load_data") as info:
+            df = load_data(file_path)
+            info["rows"] = len(df)
+        with stage("preprocess_data", rows=len(df)):
+            df = preprocess_data(df)
+        entry = {
+            "stat_key": stat_key,
+            "content_hash": content_hash,
+            "fingerprint": content_hash,
+            "df": df,
+        }
+        with _lock:
+            _stats["misses"] += 1
+            _entries[file_path] = entry
+        return _hand_out(entry), entry["fingerprint"]
+
+
+def cache_stats():
+    """Return hit/miss counters and the number of cached datasets"""
+    with _lock:
+        return {"hits": _stats["hits"], "misses": _stats["misses"], "entries": len(_entries)}
+
+
+def clear_cache():
+    """Drop all cached datasets and reset the counters"""
+    with _lock:
+        _entries.clear()
+        _stats["hits"] = 0
+        _stats["misses"] = 0
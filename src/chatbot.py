@@ -1,5 +1,43 @@
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 
+from .cache import dataset_fingerprint
+from .cube import sum_by, distinct_values, mean_valid_price
+from .metrics import timed
+
+# Intents in priority order with the phrases that trigger them
+INTENTS = [
+    ("average_price", ["average price", "mean price"]),
+    ("top_sales", ["highest sales", "top sales"]),
+    ("forecast", ["forecast", "future sales"]),
+    ("brands", ["brand"]),
+    ("models", ["model"]),
+]
+_INTENT_PRIORITY = {name: rank for rank, (name, _) in enumerate(INTENTS)}
+# One pass over the query: the lookahead tries every position, so overlapping
+# phrases are all seen, and the highest-priority matched intent wins
+_INTENT_PATTERN = re.compile("(?=(?:" + "|".join(
+    f"(?P<{name}>{'|'.join(re.escape(phrase) for phrase in phrases)})" for name, phrases in INTENTS
+) + "))")
+
+# Column name candidates per role, as used by the answers
+_PRICE_NAMES = ['price', 'Price', 'PRICE', 'price_usd', 'Price (USD)']
+_MODEL_NAMES = ['model', 'Model', 'MODEL']
+_SALES_NAMES = ['sales', 'Sales', 'SALES', 'quantity', 'units']
+_YEAR_NAMES = ['year', 'Year', 'YEAR']
+_BRAND_NAMES = ['brand', 'Brand', 'BRAND', 'manufacturer', 'Manufacturer']
+
+FALLBACK_ANSWER = ("I can help you with questions about average prices, highest sales, sales forecasts, "
+                   "brands, and models. Please try rephrasing your question.")
+
+_MAX_ENGINES = 4
+_engines_lock = threading.Lock()
+_engines = OrderedDict()
+
 def _find_column(df, possible_names):
     """Helper function to find a column by trying multiple possible names"""
     for name in possible_names:
@@ -12,95 +50,206 @@ def _find_column(df, possible_names):
             return df_cols_lower[name.lower()]
     return None
 
+def normalize_query(query):
+    """Lowercase a query and collapse its whitespace"""
+    return " ".join(query.lower().split())
+
+def classify_query(query):
+    """Return the intent name for a query, or None if no intent matches"""
+    matched = {match.lastgroup for match in _INTENT_PATTERN.finditer(normalize_query(query))}
+    if not matched:
+        return None
+    return min(matched, key=_INTENT_PRIORITY.__getitem__)
+
+def _classify_many(queries):
+    return [classify_query(query) for query in queries]
+
+
+class ChatbotEngine:
+    """
+    Rule-based chatbot bound to one dataset version.
+
+    Column aliases are resolved once, each intent's answer is computed once,
+    and answers for normalized queries are kept in an LRU cache.
+    """
+
+    def __init__(self, df, fingerprint=None, cache_size=1024):
+        self.df = df
+        self.fingerprint = fingerprint if fingerprint is not None else dataset_fingerprint(df)
+        self.cache_size = cache_size
+        self.columns = {
+            "price": _find_column(df, _PRICE_NAMES),
+            "model": _find_column(df, _MODEL_NAMES),
+            "sales": _find_column(df, _SALES_NAMES),
+            "year": _find_column(df, _YEAR_NAMES),
+            "brand": _find_column(df, _BRAND_NAMES),
+        }
+        self._answers = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ask(self, query):
+        """Answer a query"""
+        if self.df.empty:
+            return "No data available to answer your question."
+        key = normalize_query(query)
+        with self._lock:
+            answer = self._cache.get(key)
+            if answer is not None:
+                self._cache.move_to_end(key)
+                return answer
+        answer, ok = self._resolve(classify_query(key))
+        if not ok:
+            # Errors are not cached so a later call can retry
+            return answer
+        with self._lock:
+            self._cache[key] = answer
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return answer
+
+    def answer_intent(self, intent):
+        """Answer for an intent name (None for unrecognised queries), computed once"""
+        return self._resolve(intent)[0]
+
+    def _resolve(self, intent):
+        # (answer, False) for an error message, which is not cached anywhere
+        answer = self._answers.get(intent)
+        if answer is None:
+            try:
+                answer = self._compute_answer(intent)
+            except Exception as e:
+                return f"Error processing your question: {str(e)}", False
+            self._answers[intent] = answer
+        return answer, True
+
+    def _compute_answer(self, intent):
+        if intent is None:
+            return FALLBACK_ANSWER
+        return getattr(self, f"_answer_{intent}")()
+
+    def _answer_average_price(self):
+        price_col = self.columns["price"]
+        if not price_col:
+            return "Price data is not available in the dataset."
+        # Mean over present, positive prices (answered from the aggregate cube)
+        avg_price = mean_valid_price(self.df, price_col)
+        if pd.notna(avg_price):
+            return f"The average EV price is ${avg_price:,.2f}"
+        return "No valid price data available."
+
+    def _answer_top_sales(self):
+        df = self.df
+        model_col, sales_col, brand_col = self.columns["model"], self.columns["sales"], self.columns["brand"]
+
+        if model_col and sales_col:
+            sales_data = sum_by(df, model_col, sales_col)
+            sales_data = sales_data[sales_data > 0]
+            if not sales_data.empty:
+                top_model = sales_data.idxmax()
+                top_sales = sales_data.max()
+                return f"The model with highest sales is {top_model} with {top_sales:,.0f} units sold."
+
+        if brand_col and sales_col:
+            sales_data = sum_by(df, brand_col, sales_col)
+            sales_data = sales_data[sales_data > 0]
+            if not sales_data.empty:
+                top_brand = sales_data.idxmax()
+                top_sales = sales_data.max()
+                return f"The brand with highest sales is {top_brand} with {top_sales:,.0f} units sold."
+
+        return "Sales data is not available in the dataset."
+
+    def _answer_forecast(self):
+        year_col, sales_col = self.columns["year"], self.columns["sales"]
+        if not (year_col and sales_col):
+            return "Year or sales data is not available in the dataset."
+        sales_yearly = sum_by(self.df, year_col, sales_col).reset_index()
+        sales_yearly = sales_yearly[sales_yearly[sales_col] > 0]
+        if sales_yearly.empty:
+            return "Insufficient sales data for forecasting."
+        latest_year = sales_yearly[year_col].max()
+        last_year_sales = sales_yearly[sales_yearly[year_col] == latest_year][sales_col].values[0]
+        return f"Latest year ({int(latest_year)}) total sales: {last_year_sales:,.0f} units"
+
+    def _answer_brands(self):
+        brand_col = self.columns["brand"]
+        if not brand_col:
+            return "Brand information is not available in the dataset."
+        brands = [str(b) for b in distinct_values(self.df, brand_col) if str(b) != 'nan']
+        if not brands:
+            return "No brand information found in the dataset."
+        brand_list = ', '.join(brands[:10])
+        more_text = f" and {len(brands)-10} more." if len(brands) > 10 else "."
+        return f"Available brands in the dataset: {brand_list}{more_text}"
+
+    def _answer_models(self):
+        model_col = self.columns["model"]
+        if not model_col:
+            return "Model information is not available in the dataset."
+        models = [str(m) for m in distinct_values(self.df, model_col) if str(m) != 'nan']
+        if not models:
+            return "No model information found in the dataset."
+        model_list = ', '.join(models[:5])
+        return f"Total models in dataset: {len(models)}. Some examples: {model_list}"
+
+
+def get_chatbot_engine(df, fingerprint=None):
+    """Return the engine for df's dataset version, creating it on first use"""
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    with _engines_lock:
+        engine = _engines.get(fingerprint)
+        if engine is not None:
+            _engines.move_to_end(fingerprint)
+            return engine
+        engine = ChatbotEngine(df, fingerprint)
+        _engines[fingerprint] = engine
+        # Engines for older dataset versions are dropped with their caches
+        while len(_engines) > _MAX_ENGINES:
+            _engines.popitem(last=False)
+        return engine
+
+def clear_engines():
+    """Drop all engines and their cached answers"""
+    with _engines_lock:
+        _engines.clear()
+
+@timed()
 def chatbot(df, query):
     """Simple rule-based chatbot for EV queries"""
     if df.empty:
         return "No data available to answer your question."
-    
-    query_lower = query.lower()
-    
+
     try:
-        if "average price" in query_lower or "mean price" in query_lower:
-            price_col = _find_column(df, ['price', 'Price', 'PRICE', 'price_usd', 'Price (USD)'])
-            if price_col:
-                prices = df[price_col].dropna()
-                prices = prices[prices > 0]  # Remove invalid prices
-                if not prices.empty:
-                    avg_price = prices.mean()
-                    return f"The average EV price is ${avg_price:,.2f}"
-                else:
-                    return "No valid price data available."
-            else:
-                return "Price data is not available in the dataset."
-        
-        elif "highest sales" in query_lower or "top sales" in query_lower:
-            model_col = _find_column(df, ['model', 'Model', 'MODEL'])
-            sales_col = _find_column(df, ['sales', 'Sales', 'SALES', 'quantity', 'units'])
-            brand_col = _find_column(df, ['brand', 'Brand', 'BRAND', 'manufacturer'])
-            
-            if model_col and sales_col:
-                sales_data = df.groupby(model_col)[sales_col].sum()
-                sales_data = sales_data[sales_data > 0]
-                if not sales_data.empty:
-                    top_model = sales_data.idxmax()
-                    top_sales = sales_data.max()
-                    return f"The model with highest sales is {top_model} with {top_sales:,.0f} units sold."
-            
-            if brand_col and sales_col:
-                sales_data = df.groupby(brand_col)[sales_col].sum()
-                sales_data = sales_data[sales_data > 0]
-                if not sales_data.empty:
-                    top_brand = sales_data.idxmax()
-                    top_sales = sales_data.max()
-                    return f"The brand with highest sales is {top_brand} with {top_sales:,.0f} units sold."
-            
-            return "Sales data is not available in the dataset."
-        
-        elif "forecast" in query_lower or "future sales" in query_lower:
-            year_col = _find_column(df, ['year', 'Year', 'YEAR'])
-            sales_col = _find_column(df, ['sales', 'Sales', 'SALES', 'quantity', 'units'])
-            
-            if year_col and sales_col:
-                sales_yearly = df.groupby(year_col)[sales_col].sum().reset_index()
-                sales_yearly = sales_yearly[sales_yearly[sales_col] > 0]
-                if not sales_yearly.empty:
-                    latest_year = sales_yearly[year_col].max()
-                    last_year_sales = sales_yearly[sales_yearly[year_col] == latest_year][sales_col].values[0]
-                    return f"Latest year ({int(latest_year)}) total sales: {last_year_sales:,.0f} units"
-                else:
-                    return "Insufficient sales data for forecasting."
-            else:
-                return "Year or sales data is not available in the dataset."
-        
-        elif "brand" in query_lower:
-            brand_col = _find_column(df, ['brand', 'Brand', 'BRAND', 'manufacturer', 'Manufacturer'])
-            if brand_col:
-                brands = df[brand_col].dropna().unique()
-                brands = [str(b) for b in brands if str(b) != 'nan']
-                if brands:
-                    brand_list = ', '.join(brands[:10])
-                    more_text = f" and {len(brands)-10} more." if len(brands) > 10 else "."
-                    return f"Available brands in the dataset: {brand_list}{more_text}"
-                else:
-                    return "No brand information found in the dataset."
-            else:
-                return "Brand information is not available in the dataset."
-        
-        elif "model" in query_lower:
-            model_col = _find_column(df, ['model', 'Model', 'MODEL'])
-            if model_col:
-                models = df[model_col].dropna().unique()
-                models = [str(m) for m in models if str(m) != 'nan']
-                if models:
-                    model_list = ', '.join(models[:5])
-                    return f"Total models in dataset: {len(models)}. Some examples: {model_list}"
-                else:
-                    return "No model information found in the dataset."
-            else:
-                return "Model information is not available in the dataset."
-        
-        else:
-            return "I can help you with questions about average prices, highest sales, sales forecasts, brands, and models. Please try rephrasing your question."
-    
+        return get_chatbot_engine(df).ask(query)
     except Exception as e:
-        return f"Error processing your question: {str(e)}"
\ No newline at end of file
+        return f"Error processing your question: {str(e)}"
+
+def chatbot_batch(df, queries, n_jobs=None, chunk_size=10_000):
+    """
+    Answer many queries at once, returning answers in input order.
+
+    Distinct normalized queries are classified first (across a pool of n_jobs
+    processes when n_jobs > 1), then each needed intent is answered once and
+    shared by every query with that intent.
+    """
+    queries = list(queries)
+    if df.empty:
+        return ["No data available to answer your question."] * len(queries)
+
+    keys = [normalize_query(query) for query in queries]
+    distinct = list(dict.fromkeys(keys))
+
+    if n_jobs is not None and n_jobs > 1 and len(distinct) > chunk_size:
+        chunks = [distinct[i:i + chunk_size] for i in range(0, len(distinct), chunk_size)]
+        # Workers only need the compiled patterns, never the dataset
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            intents = [intent for chunk in pool.map(_classify_many, chunks) for intent in chunk]
+    else:
+        intents = _classify_many(distinct)
+
+    engine = get_chatbot_engine(df)
+    answers = {intent: engine.answer_intent(intent) for intent in set(intents)}
+    answer_by_key = {key: answers[intent] for key, intent in zip(distinct, intents)}
+    return [answer_by_key[key] for key in keys]
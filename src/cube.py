@@ -0,0 +1,228 @@
+"""
+Precomputed aggregate cube shared by the chatbot, EDA and forecasting code.
+
+The cube holds Units_Sold and Revenue sums, valid price sums/counts and row
+counts for every observed (year_month, Region, Brand, Model, Vehicle_Type,
+Customer_Segment) combination. It is built once per dataset version and
+rolled up to any subset of those dimensions, so queries scale with the
+number of cells instead of the number of rows.
+"""
+
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .cache import dataset_fingerprint, known_fingerprint
+from .schema import DATE_COLUMN, parse_month_column
+
+DIMENSIONS = ["year_month", "Region", "Brand", "Model", "Vehicle_Type", "Customer_Segment"]
+MEASURES = ["units", "revenue", "price_sum", "price_count", "rows"]
+
+# Column names (as found by the modules' column lookups) that hold the same
+# values as a cube dimension or measure in train.csv-layout frames
+COLUMN_ALIASES = {
+    "Brand": "Brand", "brand": "Brand",
+    "Model": "Model", "Region": "Region",
+    "Vehicle_Type": "Vehicle_Type", "Customer_Segment": "Customer_Segment",
+    "Units_Sold": "units", "sales": "units",
+    "Revenue": "revenue",
+    "year": "year", DATE_COLUMN: "year_month",
+}
+
+_MAX_CUBES = 4
+_lock = threading.Lock()
+_cubes = OrderedDict()
+
+
+def _first_column(df, names):
+    for name in names:
+        if name in df.columns:
+            return name
+    return None
+
+
+class AggregateCube:
+    """Aggregates of a train.csv-layout frame with memoized roll-ups"""
+
+    def __init__(self, cells, dimensions):
+        self.cells = cells
+        self.dimensions = list(dimensions)
+        self._rollups = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the cube from a (preprocessed) train.csv-layout frame"""
+        keys = {}
+        if DATE_COLUMN in df.columns:
+            months = parse_month_column(df[DATE_COLUMN])
+            if isinstance(months.dtype, pd.PeriodDtype):
+                keys["year_month"] = months
+        for dim in DIMENSIONS[1:]:
+            if dim in df.columns:
+                keys[dim] = df[dim]
+        if not keys:
+            raise ValueError(f"No cube dimensions found. Found columns: {df.columns.tolist()}")
+
+        sales_col = _first_column(df, ["Units_Sold", "sales"])
+        if sales_col is None:
+            raise ValueError(f"Missing sales column. Found columns: {df.columns.tolist()}")
+
+        frame = pd.DataFrame(keys)
+        frame["units"] = df[sales_col]
+        frame["revenue"] = df["Revenue"] if "Revenue" in df.columns else 0
+        if "price" in df.columns:
+            # Same validity rule as the chatbot's average price: present and positive
+            valid = df["price"].notna() & (df["price"] > 0)
+            frame["price_sum"] = df["price"].where(valid, 0.0)
+            frame["price_count"] = valid.astype("int64")
+        else:
+            frame["price_sum"] = 0.0
+            frame["price_count"] = 0
+        frame["rows"] = 1
+
+        dimensions = list(keys)
+        # sort=False keeps groups in order of first appearance in the data
+        cells = frame.groupby(dimensions, observed=True, sort=False, dropna=False)[MEASURES].sum()
+        return cls(cells.reset_index(), dimensions)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def has(self, *names):
+        """True if every name is a dimension or measure this cube can answer"""
+        for name in names:
+            if name == "year":
+                name = "year_month"
+            if name not in self.dimensions and name not in MEASURES:
+                return False
+        return True
+
+    def rollup(self, dims=(), sort=True):
+        """
+        Sum the measures over all dimensions except dims.
+
+        dims may include "year", derived from year_month. Returns a DataFrame
+        indexed by dims (a Series of totals when dims is empty). With
+        sort=False groups keep their order of first appearance. Results are
+        memoized and shared, so callers must not modify them.
+        """
+        dims = tuple(dims)
+        key = (dims, sort)
+        cached = self._rollups.get(key)
+        if cached is not None:
+            return cached
+
+        if not dims:
+            result = self.cells[MEASURES].sum()
+        else:
+            cells = self.cells
+            if "year" in dims and "year_month" in self.dimensions:
+                # NaT's year is -1; drop the missing-month cell as groupby drops missing keys
+                cells = cells[cells["year_month"].notna()]
+            by = []
+            for dim in dims:
+                if dim == "year" and "year_month" in self.dimensions:
+                    by.append(cells["year_month"].dt.year.rename("year"))
+                elif dim in self.dimensions:
+                    by.append(cells[dim])
+                else:
+                    raise ValueError(f"Unknown cube dimension: {dim}. Available: {self.dimensions}")
+            result = cells.groupby(by, observed=True, sort=sort)[MEASURES].sum()
+        self._rollups[key] = result
+        return result
+
+
+def get_cube(df, fingerprint=None):
+    """
+    Return the cube for df, building it on first use for each dataset version.
+
+    Returns None when df is not in the train.csv layout (no sales column or
+    cube dimensions), in which case callers scan the rows themselves.
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    with _lock:
+        if fingerprint in _cubes:
+            _cubes.move_to_end(fingerprint)
+            return _cubes[fingerprint]
+    try:
+        cube = AggregateCube.from_frame(df)
+    except ValueError:
+        # Remembered as None so the layout check is not repeated
+        cube = None
+    with _lock:
+        _cubes[fingerprint] = cube
+        while len(_cubes) > _MAX_CUBES:
+            _cubes.popitem(last=False)
+    return cube
+
+
+def clear_cubes():
+    """Drop all cached cubes"""
+    with _lock:
+        _cubes.clear()
+
+
+def cube_field(column):
+    """Cube dimension or measure holding the same values as column, or None"""
+    return COLUMN_ALIASES.get(column)
+
+
+def cached_cube(df):
+    """
+    The cube for df if its dataset version is already known, else None.
+
+    Frames from get_dataset (or already fingerprinted) share the cube; for
+    any other frame, hashing it and building a cube costs more than the
+    single groupby the caller needs, so callers scan the rows instead.
+    """
+    fingerprint = known_fingerprint(df)
+    if fingerprint is None:
+        return None
+    return get_cube(df, fingerprint)
+
+
+def _covering_cube(df, *columns):
+    """The cube for df if it can answer for all columns, else None"""
+    fields = [cube_field(col) for col in columns]
+    if any(field is None for field in fields):
+        return None, fields
+    cube = cached_cube(df)
+    if cube is None or not cube.has(*fields):
+        return None, fields
+    return cube, fields
+
+
+def sum_by(df, group_col, value_col):
+    """
+    Equivalent of df.groupby(group_col)[value_col].sum(), answered from the
+    cube when df's cube is cached and covers both columns, and by scanning
+    df otherwise
+    """
+    cube, (dim, measure) = _covering_cube(df, group_col, value_col)
+    if cube is None or measure not in MEASURES:
+        return df.groupby(group_col, observed=True)[value_col].sum()
+    return cube.rollup([dim])[measure].rename(value_col).rename_axis(group_col)
+
+
+def distinct_values(df, column):
+    """Non-missing values of column in order of first appearance"""
+    cube, (dim,) = _covering_cube(df, column)
+    if cube is None or dim not in cube.dimensions:
+        return list(df[column].dropna().unique())
+    return list(cube.rollup([dim], sort=False).index)
+
+
+def mean_valid_price(df, price_col):
+    """Mean of the present, positive values of price_col (NaN if there are none)"""
+    if price_col == "price":
+        cube = cached_cube(df)
+        if cube is not None:
+            totals = cube.rollup()
+            if totals["price_count"] == 0:
+                return float("nan")
+            return totals["price_sum"] / totals["price_count"]
+    prices = df[price_col].dropna()
+    prices = prices[prices > 0]
+    return prices.mean() if not prices.empty else float("nan")
@@ -1,10 +1,26 @@
 import pandas as pd
 import os
+import json
 import numpy as np
 
-def load_data(file_path="data/train.csv"):
+from . import schema
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Snapshots are optional; fall back to parsing the CSV
+    pa = None
+    pq = None
+
+SNAPSHOT_SUFFIX = ".parquet"
+_SNAPSHOT_META_KEY = b"evisionai.source"
+# Bump when snapshot contents change in ways the declared schema does not
+# show (e.g. apply_schema converting a column differently)
+SNAPSHOT_FORMAT_VERSION = 2
+
+def resolve_data_path(file_path="data/train.csv"):
     """
-    Load EV sales dataset from train.csv
+    Return the dataset path to read, falling back to ev_sales_adoption.csv
     """
     # Try train.csv first, then fall back to ev_sales_adoption.csv
     if not os.path.exists(file_path):
@@ -17,9 +33,106 @@ def load_data(file_path="data/train.csv"):
                 f"Data file not found at {file_path} or {alt_path}.\n"
                 "Please ensure the dataset file exists in the data/ directory."
             )
+    return file_path
+
+def snapshot_path(file_path):
+    """Path of the columnar snapshot stored next to a CSV file"""
+    return os.path.splitext(file_path)[0] + SNAPSHOT_SUFFIX
+
+def _source_signature(file_path):
+    # Snapshots written by another format or schema are as stale as ones of an older CSV
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "format": SNAPSHOT_FORMAT_VERSION, "schema": schema.schema_digest()}
+
+def _snapshot_is_fresh(file_path):
+    """True if a readable snapshot of the current file_path exists"""
+    path = snapshot_path(file_path)
+    if pq is None or not os.path.exists(path):
+        return False
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        source = json.loads(metadata.get(_SNAPSHOT_META_KEY, b"{}"))
+    except Exception:
+        return False
+    return source == _source_signature(file_path)
+
+def _snapshot_columns(path, columns):
+    if columns is None:
+        return None
+    wanted = set(columns)
+    return [col for col in pq.read_schema(path).names if col in wanted]
+
+def _read_snapshot(file_path, columns=None):
+    """Return the snapshot for file_path, or None if missing or stale"""
+    if not _snapshot_is_fresh(file_path):
+        return None
+    path = snapshot_path(file_path)
+    try:
+        return pq.read_table(path, columns=_snapshot_columns(path, columns)).to_pandas()
+    except Exception:
+        # A corrupt or incompatible snapshot is simply rebuilt from the CSV
+        return None
+
+def _write_snapshot(df, file_path):
+    """Write df as a typed Parquet snapshot of file_path; failures are not fatal"""
+    if pa is None:
+        return
+    path = snapshot_path(file_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[_SNAPSHOT_META_KEY] = json.dumps(_source_signature(file_path)).encode()
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        # Atomic rename so concurrent readers never see a partial file
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def iter_data(file_path="data/train.csv", chunksize=100_000, use_snapshot=True, columns=None):
+    """
+    Yield the dataset as typed DataFrames of at most chunksize rows
+    
+    Reads the Parquet snapshot batch by batch when it is fresh, otherwise
+    streams the CSV, so memory use is bounded by chunksize, not file size.
+    """
+    file_path = resolve_data_path(file_path)
+    
+    if use_snapshot and file_path.endswith(".csv") and _snapshot_is_fresh(file_path):
+        path = snapshot_path(file_path)
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=_snapshot_columns(path, columns)):
+            yield batch.to_pandas()
+        return
+    
+    with pd.read_csv(file_path, chunksize=chunksize, **schema.read_csv_kwargs(columns)) as reader:
+        for chunk in reader:
+            yield schema.apply_schema(chunk)
+
+def load_data(file_path="data/train.csv", use_snapshot=True, columns=None, chunksize=None):
+    """
+    Load EV sales dataset from train.csv
+    
+    The file is parsed with the declared schema in src/schema.py. With
+    use_snapshot, a typed Parquet snapshot is written next to the CSV on the
+    first full load and read instead of the CSV until the CSV changes.
+    columns optionally restricts loading to a subset of columns. With
+    chunksize, an iterator of chunks is returned instead (see iter_data).
+    """
+    if chunksize is not None:
+        return iter_data(file_path, chunksize=chunksize, use_snapshot=use_snapshot, columns=columns)
+    
+    file_path = resolve_data_path(file_path)
+    
+    if use_snapshot and file_path.endswith(".csv"):
+        df = _read_snapshot(file_path, columns)
+        if df is not None and not df.empty:
+            return df
     
     try:
-        df = pd.read_csv(file_path)
+        df = schema.read_csv(file_path, columns=columns)
     except pd.errors.EmptyDataError:
         raise ValueError(
             f"Data file at {file_path} is empty or has no valid columns.\n"
@@ -37,27 +150,101 @@ def load_data(file_path="data/train.csv"):
             "Please ensure the CSV file contains data."
         )
     
+    if use_snapshot and columns is None and file_path.endswith(".csv"):
+        _write_snapshot(df, file_path)
+    
     return df
 
-def preprocess_data(df):
+def _extract_year(dates):
+    """
+    Year of each "YYYY-MM" Date value, parsing each distinct value only once
+    """
+    if isinstance(dates.dtype, pd.PeriodDtype):
+        # Already parsed to monthly periods by the schema. NaT's year is -1:
+        # mask it to NaN so missing dates are imputed like other values
+        return dates.dt.year.where(dates.notna())
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(pd.Series(uniques), format='%Y-%m', errors='coerce')
+    if (codes < 0).any() or parsed.isna().any():
+        # Missing or malformed dates: fall back to the first 4 characters
+        return dates.str[:4].astype(int, errors='ignore')
+    years = parsed.dt.year.to_numpy().take(codes)
+    return pd.Series(years, index=dates.index)
+
+def _mode(values):
+    """
+    Most frequent non-missing value, the smallest one on ties like Series.mode;
+    'Unknown' if there are none. Counted by value_counts, which runs in the
+    column's own backend (e.g. Arrow for strings).
+    """
+    counts = values.value_counts(dropna=True)
+    if counts.empty or counts.max() == 0:
+        return 'Unknown'
+    # sort_values also orders unordered categoricals, by category
+    return counts.index[counts.to_numpy() == counts.max()].sort_values()[0]
+
+def _fill_missing(df):
+    """Fill missing numeric values with column medians and categorical ones with modes"""
+    has_missing = df.isna().any()
+    if not has_missing.any():
+        return
+    
+    numeric_cols = [col for col in df.select_dtypes(include='number').columns if has_missing[col]]
+    # Derived columns such as sales share their source's buffer: fill each buffer once
+    filled = {}
+    for col in numeric_cols:
+        if not (isinstance(df[col].dtype, np.dtype) and df[col].dtype.kind == 'f'):
+            # Nullable integer or other extension types
+            median = df[col].median()
+            df[col] = df[col].fillna(median if pd.notna(median) else 0)
+            continue
+        values = df[col].to_numpy()
+        key = (values.__array_interface__['data'][0], values.strides, values.shape, values.dtype)
+        if key in filled:
+            # A copy, so the columns stay independent without Copy-on-Write
+            df[col] = filled[key].copy()
+            continue
+        missing = np.isnan(values)
+        # Same value as Series.median; 0 if all values are NaN
+        median = np.median(values[~missing]) if not missing.all() else 0
+        filled[key] = np.where(missing, values.dtype.type(median), values)
+        df[col] = filled[key]
+    
+    cat_cols = [col for col in df.select_dtypes(include=['object', 'string', 'category']).columns
+                if has_missing[col]]
+    for col in cat_cols:
+        fill_value = _mode(df[col])
+        if df[col].dtype == 'category' and fill_value not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([fill_value])
+        if df[col].dtype == object:
+            df[col] = df[col].fillna(fill_value)
+        else:
+            # Filling the extension array directly skips Series.fillna's generic masking
+            df[col] = df[col].array.fillna(fill_value)
+
+def preprocess_data(df, fill_missing=True, inplace=False, random_state=None):
     """
     Preprocess EV sales data: transform columns to match expected format
+    
+    Derived columns are added to a shallow copy of df, so the input frame is
+    never modified and its data is not duplicated; with inplace=True they are
+    added to df itself. fill_missing=False skips the median/mode imputation,
+    which needs the whole dataset and is therefore not applied to streamed
+    chunks. random_state is the np.random.RandomState used for the simulated
+    range/acceleration variation (a fresh one seeded with 42 by default).
     """
-    # Make a copy to avoid modifying original
-    df = df.copy()
+    if not inplace:
+        df = df.copy(deep=False)
     
     # Transform train.csv format to expected format
     # Check if this is the train.csv format (has Date, Battery_Capacity_kWh, Units_Sold, Revenue)
     if 'Date' in df.columns and 'Battery_Capacity_kWh' in df.columns:
         # Extract year from Date (format: "2023-07" or "2023-01")
         if 'year' not in df.columns:
-            df['year'] = pd.to_datetime(df['Date'], format='%Y-%m', errors='coerce').dt.year
-            # If parsing fails, try extracting first 4 characters
-            if df['year'].isna().any():
-                df['year'] = df['Date'].str[:4].astype(int, errors='ignore')
+            df['year'] = _extract_year(df['Date'])
         
         # Rename Battery_Capacity_kWh to battery_kwh
-        if 'Battery_Capacity_kWh' in df.columns and 'battery_kwh' not in df.columns:
+        if 'battery_kwh' not in df.columns:
             df['battery_kwh'] = df['Battery_Capacity_kWh']
         
         # Rename Brand to brand (if needed)
@@ -69,55 +256,50 @@ def preprocess_data(df):
             df['sales'] = df['Units_Sold']
         
         # Calculate price from Revenue/Units_Sold (average price per unit)
-        if 'Revenue' in df.columns and 'Units_Sold' in df.columns:
-            if 'price' not in df.columns:
-                df['price'] = df['Revenue'] / df['Units_Sold']
-                # Remove any infinite or invalid prices
-                df['price'] = df['price'].replace([np.inf, -np.inf], np.nan)
+        if 'Revenue' in df.columns and 'Units_Sold' in df.columns and 'price' not in df.columns:
+            price = df['Revenue'] / df['Units_Sold']
+            # Remove any infinite or invalid prices
+            df['price'] = price.replace([np.inf, -np.inf], np.nan)
+        
+        need_range = 'range_km' not in df.columns
+        need_acceleration = 'acceleration' not in df.columns
+        if need_range or need_acceleration:
+            # Float arithmetic so compact integer battery columns cannot overflow
+            battery = df['battery_kwh'].astype('float64')
+            # One draw serves both variations: the original code reseeded the
+            # global RNG with 42 before each, so both used the same stream.
+            # RandomState (not Generator) keeps that stream bit-for-bit.
+            if random_state is None:
+                random_state = np.random.RandomState(42)
+            uniform = random_state.random_sample(len(df))
         
         # Estimate range_km based on battery capacity if not present
-        # Typical EV: ~5-7 km per kWh
-        if 'range_km' not in df.columns and 'battery_kwh' in df.columns:
-            # Use 6 km per kWh as average, with some variation
-            df['range_km'] = df['battery_kwh'] * 6
-            # Add some realistic variation (±20%)
-            np.random.seed(42)  # For reproducibility
-            variation = np.random.uniform(0.8, 1.2, len(df))
-            df['range_km'] = (df['range_km'] * variation).astype(int)
+        # Typical EV: ~5-7 km per kWh, use 6 km per kWh with ±20% variation
+        if need_range:
+            variation = 0.8 + (1.2 - 0.8) * uniform
+            df['range_km'] = (battery * 6 * variation).astype(int)
         
         # Estimate acceleration based on battery capacity if not present
         # Larger batteries often in more powerful cars (faster acceleration)
-        # Typical range: 3-12 seconds for 0-100 km/h
-        if 'acceleration' not in df.columns and 'battery_kwh' in df.columns:
-            # Inverse relationship: larger battery = faster (lower acceleration time)
-            # Formula: acceleration = 12 - (battery_kwh - 40) / 10, clamped between 3 and 12
-            battery_normalized = (df['battery_kwh'] - 40) / 10
-            df['acceleration'] = 12 - battery_normalized
-            df['acceleration'] = df['acceleration'].clip(lower=3, upper=12)
-            # Add some variation
-            np.random.seed(42)
-            variation = np.random.uniform(0.9, 1.1, len(df))
-            df['acceleration'] = (df['acceleration'] * variation).round(1)
-    
-    # Fill missing numeric values with median
-    numeric_cols = df.select_dtypes(include=['float64', 'int64', 'float32', 'int32']).columns
-    for col in numeric_cols:
-        if df[col].isna().any():
-            median_val = df[col].median()
-            if pd.notna(median_val):
-                df[col] = df[col].fillna(median_val)
-            else:
-                # If all values are NaN, fill with 0
-                df[col] = df[col].fillna(0)
-    
-    # Fill missing categorical values with mode
-    cat_cols = df.select_dtypes(include=['object', 'string']).columns
-    for col in cat_cols:
-        if df[col].isna().any():
-            mode_value = df[col].mode()
-            if len(mode_value) > 0:
-                df[col] = df[col].fillna(mode_value[0])
-            else:
-                df[col] = df[col].fillna('Unknown')
-    
-    return df
\ No newline at end of file
+        # Formula: acceleration = 12 - (battery_kwh - 40) / 10, clamped between 3 and 12
+        if need_acceleration:
+            acceleration = (12 - (battery - 40) / 10).clip(lower=3, upper=12)
+            variation = 0.9 + (1.1 - 0.9) * uniform
+            df['acceleration'] = (acceleration * variation).round(1)
+    
+    if fill_missing:
+        _fill_missing(df)
+    
+    return df
+
+def preprocess_chunks(chunks):
+    """
+    Streaming version of preprocess_data for chunks from iter_data
+    
+    Missing values are left in place for the aggregations to skip. One
+    random state is shared across chunks, so the simulated range_km and
+    acceleration match preprocessing the whole file at once.
+    """
+    random_state = np.random.RandomState(42)
+    for chunk in chunks:
+        yield preprocess_data(chunk, fill_missing=False, inplace=True, random_state=random_state)
@@ -1,37 +1,84 @@
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
 import os
+import threading
 
-def plot_correlation(df, save_path="assets/corr_heatmap.png"):
-    """Plot correlation heatmap for numeric columns"""
-    # Ensure assets directory exists
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    
+import numpy as np
+
+from .cube import sum_by
+from .metrics import timed
+from .streaming import KDE_SAMPLE_SIZE, chunked_correlation, kde_curve, price_histogram
+
+# Frames with at least this many rows are plotted in large-data mode by default
+LARGE_DATA_ROWS = 1_000_000
+
+# The plot functions build matplotlib Figure objects directly instead of
+# going through pyplot, whose current-figure state is shared by all threads,
+# so concurrent Streamlit sessions can render at the same time. Each returns
+# the PNG bytes; save_path additionally persists them to a file. matplotlib
+# and seaborn are imported on first use, not when this module is imported.
+
+def _plotting():
+    """(seaborn, matplotlib Figure class), imported on first call"""
+    import seaborn as sns
+    from matplotlib.figure import Figure
+    return sns, Figure
+
+def _render(fig, save_path=None):
+    """PNG bytes of fig, also written atomically to save_path if given"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=100, bbox_inches='tight')
+    data = buffer.getvalue()
+    if save_path:
+        directory = os.path.dirname(save_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Unique temporary name, so concurrent writers never interleave and
+        # readers never see a partial file
+        tmp_path = f"{save_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, save_path)
+    return data
+
+def _is_large(df, large):
+    return len(df) >= LARGE_DATA_ROWS if large is None else large
+
+@timed()
+def plot_correlation(df, save_path=None, large=None):
+    """
+    Plot correlation heatmap for numeric columns and return it as PNG bytes.
+    
+    In large-data mode (large=True, or by default from LARGE_DATA_ROWS rows)
+    correlations are computed from chunk-wise sums and cross-products.
+    """
     # Select only numeric columns for correlation
-    numeric_df = df.select_dtypes(include=['float64', 'int64', 'float32', 'int32'])
+    numeric_df = df.select_dtypes(include='number')
     
     if numeric_df.empty:
         raise ValueError("No numeric columns found for correlation analysis")
     
-    # Remove columns with constant values (std = 0)
-    numeric_df = numeric_df.loc[:, numeric_df.std() > 0]
+    if _is_large(df, large):
+        corr = chunked_correlation(numeric_df)
+    else:
+        # Remove columns with constant values (std = 0)
+        numeric_df = numeric_df.loc[:, numeric_df.std() > 0]
+        corr = numeric_df.corr() if len(numeric_df.columns) >= 2 else numeric_df
     
-    if numeric_df.empty or len(numeric_df.columns) < 2:
+    if corr.empty or len(corr.columns) < 2:
         raise ValueError("Insufficient numeric columns with variance for correlation analysis")
     
-    plt.figure(figsize=(max(10, len(numeric_df.columns)), max(6, len(numeric_df.columns) * 0.8)))
-    sns.heatmap(numeric_df.corr(), annot=True, cmap="coolwarm", fmt='.2f', 
-                square=True, linewidths=0.5, cbar_kws={"shrink": 0.8})
-    plt.title("Correlation Heatmap", fontsize=14, pad=20)
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=100, bbox_inches='tight')
-    plt.close()
+    sns, Figure = _plotting()
+    fig = Figure(figsize=(max(10, len(corr.columns)), max(6, len(corr.columns) * 0.8)))
+    ax = fig.subplots()
+    sns.heatmap(corr, annot=True, cmap="coolwarm", fmt='.2f', 
+                square=True, linewidths=0.5, cbar_kws={"shrink": 0.8}, ax=ax)
+    ax.set_title("Correlation Heatmap", fontsize=14, pad=20)
+    fig.tight_layout()
+    return _render(fig, save_path)
 
-def plot_sales_by_brand(df, save_path="assets/sales_by_brand.png"):
-    """Plot sales by brand"""
-    # Ensure assets directory exists
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    
+@timed()
+def plot_sales_by_brand(df, save_path=None):
+    """Plot sales by brand and return it as PNG bytes"""
     # Find brand and sales columns
     brand_col = None
     sales_col = None
@@ -47,7 +94,7 @@ def plot_sales_by_brand(df, save_path="assets/sales_by_brand.png"):
         raise ValueError(f"Missing required columns. Found: {df.columns.tolist()}. Need 'brand' and 'sales' columns.")
     
     # Aggregate sales by brand
-    brand_sales = df.groupby(brand_col)[sales_col].sum().reset_index()
+    brand_sales = sum_by(df, brand_col, sales_col).reset_index()
     brand_sales.columns = ['brand', 'sales']
     brand_sales = brand_sales.sort_values('sales', ascending=False)
     
@@ -55,21 +102,29 @@ def plot_sales_by_brand(df, save_path="assets/sales_by_brand.png"):
     if len(brand_sales) > 20:
         brand_sales = brand_sales.head(20)
     
-    plt.figure(figsize=(max(12, len(brand_sales) * 0.6), 6))
-    sns.barplot(data=brand_sales, x="brand", y="sales", palette="viridis")
-    plt.xticks(rotation=45, ha='right')
-    plt.title("Sales by Brand", fontsize=14, pad=20)
-    plt.xlabel("Brand", fontsize=12)
-    plt.ylabel("Sales", fontsize=12)
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=100, bbox_inches='tight')
-    plt.close()
+    sns, Figure = _plotting()
+    fig = Figure(figsize=(max(12, len(brand_sales) * 0.6), 6))
+    ax = fig.subplots()
+    sns.barplot(data=brand_sales, x="brand", y="sales", palette="viridis", ax=ax)
+    for label in ax.get_xticklabels():
+        label.set_rotation(45)
+        label.set_horizontalalignment('right')
+    ax.set_title("Sales by Brand", fontsize=14, pad=20)
+    ax.set_xlabel("Brand", fontsize=12)
+    ax.set_ylabel("Sales", fontsize=12)
+    fig.tight_layout()
+    return _render(fig, save_path)
 
-def plot_price_distribution(df, save_path="assets/price_dist.png"):
-    """Plot price distribution"""
-    # Ensure assets directory exists
-    os.makedirs(os.path.dirname(save_path), exist_ok=True)
-    
+@timed()
+def plot_price_distribution(df, save_path=None, large=None, bins=30, kde_sample=KDE_SAMPLE_SIZE):
+    """
+    Plot price distribution and return it as PNG bytes.
+    
+    In large-data mode (large=True, or by default from LARGE_DATA_ROWS rows)
+    prices are binned chunk by chunk with a streaming mean/std for the
+    outlier filter, and the KDE is fitted to a deterministic sample of at
+    most kde_sample prices.
+    """
     # Find price column
     price_col = None
     for col in df.columns:
@@ -81,6 +136,11 @@ def plot_price_distribution(df, save_path="assets/price_dist.png"):
     if price_col is None:
         raise ValueError(f"Missing required column: 'price'. Found columns: {df.columns.tolist()}")
     
+    if _is_large(df, large):
+        prices = df[price_col].to_numpy(dtype='float64', na_value=np.nan)
+        counts, edges, sample = price_histogram(prices, bins, kde_sample)
+        return _plot_binned_prices(counts, edges, sample, save_path)
+    
     # Remove missing prices and outliers
     prices = df[price_col].dropna()
     prices = prices[prices > 0]  # Remove zero or negative prices
@@ -97,12 +157,32 @@ def plot_price_distribution(df, save_path="assets/price_dist.png"):
     if prices.empty:
         raise ValueError("No valid price data after outlier removal")
     
-    plt.figure(figsize=(10, 6))
-    sns.histplot(prices, bins=30, kde=True, color='skyblue', edgecolor='black')
-    plt.title("Price Distribution", fontsize=14, pad=20)
-    plt.xlabel("Price", fontsize=12)
-    plt.ylabel("Frequency", fontsize=12)
-    plt.grid(axis='y', alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(save_path, dpi=100, bbox_inches='tight')
-    plt.close()
+    sns, Figure = _plotting()
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sns.histplot(prices, bins=bins, kde=True, color='skyblue', edgecolor='black', ax=ax)
+    ax.set_title("Price Distribution", fontsize=14, pad=20)
+    ax.set_xlabel("Price", fontsize=12)
+    ax.set_ylabel("Frequency", fontsize=12)
+    ax.grid(axis='y', alpha=0.3)
+    fig.tight_layout()
+    return _render(fig, save_path)
+
+def _plot_binned_prices(counts, edges, sample, save_path=None):
+    """The price distribution plot drawn from pre-binned counts and a KDE sample"""
+    sns, Figure = _plotting()
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    centers = (edges[:-1] + edges[1:]) / 2
+    has_kde = len(sample) > 1 and np.ptp(sample) > 0
+    # histplot draws bars at alpha .5 when it also draws a KDE
+    sns.histplot(x=centers, weights=counts, bins=list(edges), color='skyblue', edgecolor='black',
+                 alpha=0.5 if has_kde else 0.75, ax=ax)
+    if has_kde:
+        ax.plot(*kde_curve(counts, edges, sample), color='skyblue')
+    ax.set_title("Price Distribution", fontsize=14, pad=20)
+    ax.set_xlabel("Price", fontsize=12)
+    ax.set_ylabel("Frequency", fontsize=12)
+    ax.grid(axis='y', alpha=0.3)
+    fig.tight_layout()
+    return _render(fig, save_path)
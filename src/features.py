@@ -0,0 +1,142 @@
+"""
+Feature encoding shared by price model training and inference.
+
+FeatureEncoder turns numeric and categorical columns into a compact float32
+matrix: categoricals are one-hot encoded (sparse once there are many
+categories) or ordinal-encoded into one column each, instead of a dense
+int64 get_dummies frame.
+It is the first step of the price model pipeline, so training and inference
+always agree on the column layout.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.base import BaseEstimator, TransformerMixin
+
+PRICE_NUMERIC_FEATURES = ['battery_kwh', 'range_km', 'year', 'acceleration']
+# Extra categorical columns of the train.csv layout usable as price features
+OPTIONAL_CATEGORICAL_FEATURES = ['Model', 'Region', 'Vehicle_Type']
+
+ENCODINGS = ('onehot', 'ordinal')
+# One-hot columns above which the encoding is sparse: the forest's sparse splitter
+# is many times slower, so few categories are kept dense
+MAX_DENSE_ONEHOT_COLUMNS = 64
+
+
+def _column(X, name):
+    values = X[name]
+    return values.to_numpy() if isinstance(values, (pd.Series, pd.Index)) else np.atleast_1d(np.asarray(values))
+
+
+class FeatureEncoder(BaseEstimator, TransformerMixin):
+    """
+    Encode numeric and categorical features into a float32 matrix.
+
+    X may be a DataFrame or a dict of columns (scalars are broadcast).
+    Missing numeric values are filled with the medians seen in fit. With
+    encoding='onehot' each categorical becomes one column per category (all
+    zeros for unseen values), in a dense array while there are at most
+    max_dense_columns of them and in a sparse CSR matrix beyond. With
+    encoding='ordinal' it becomes the index of its value in the sorted
+    categories (-1 for unseen values), which is cheaper for many categories
+    but usually less accurate: trees can only split the codes by range.
+    """
+
+    def __init__(self, numeric_features=tuple(PRICE_NUMERIC_FEATURES), categorical_features=('brand',),
+                 encoding='onehot', max_dense_columns=MAX_DENSE_ONEHOT_COLUMNS):
+        self.numeric_features = numeric_features
+        self.categorical_features = categorical_features
+        self.encoding = encoding
+        self.max_dense_columns = max_dense_columns
+
+    def fit(self, X, y=None, categories=None):
+        """
+        Learn the numeric medians and the categories from X.
+
+        categories optionally gives the values of some categorical features
+        directly (e.g. collected over a whole stream of which X is a sample).
+        """
+        if self.encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {self.encoding}. Use one of {ENCODINGS}")
+        self.medians_ = {}
+        for name in self.numeric_features:
+            median = pd.Series(_column(X, name), dtype='float64').median()
+            self.medians_[name] = float(median) if pd.notna(median) else 0.0
+        self.categories_ = {}
+        for name in self.categorical_features:
+            if categories is not None and name in categories:
+                self.categories_[name] = sorted(str(value) for value in categories[name])
+                continue
+            values = pd.Series(_column(X, name)).dropna().astype(str)
+            self.categories_[name] = sorted(values.unique())
+        self._lookups = {name: pd.Index(categories) for name, categories in self.categories_.items()}
+        return self
+
+    @property
+    def sparse_output(self):
+        """Whether transform returns a sparse CSR matrix rather than an array"""
+        return (self.encoding == 'onehot'
+                and sum(len(categories) for categories in self.categories_.values()) > self.max_dense_columns)
+
+    @property
+    def feature_names(self):
+        names = list(self.numeric_features)
+        for name in self.categorical_features:
+            if self.encoding == 'onehot':
+                names.extend(f"{name}_{category}" for category in self.categories_[name])
+            else:
+                names.append(name)
+        return names
+
+    def _codes(self, X, name, n):
+        values = np.broadcast_to(_column(X, name), n)
+        lookup = self._lookups[name]
+        codes = lookup.get_indexer(pd.Series(values).astype(str))
+        # Missing values never match a category
+        codes[pd.isna(values)] = -1
+        return codes
+
+    def _length(self, X):
+        return max(len(np.atleast_1d(_column(X, name)))
+                   for name in list(self.numeric_features) + list(self.categorical_features))
+
+    def transform(self, X):
+        n = self._length(X)
+        n_numeric = len(self.numeric_features)
+        numeric = np.empty((n, n_numeric), dtype=np.float32)
+        for i, name in enumerate(self.numeric_features):
+            values = np.broadcast_to(np.asarray(_column(X, name), dtype=np.float32), n)
+            numeric[:, i] = values
+            missing = np.isnan(numeric[:, i])
+            if missing.any():
+                numeric[missing, i] = self.medians_[name]
+
+        if self.encoding == 'ordinal':
+            out = np.empty((n, n_numeric + len(self.categorical_features)), dtype=np.float32)
+            out[:, :n_numeric] = numeric
+            for j, name in enumerate(self.categorical_features):
+                out[:, n_numeric + j] = self._codes(X, name, n)
+            return out
+
+        if not self.sparse_output:
+            out = np.zeros((n, len(self.feature_names)), dtype=np.float32)
+            out[:, :n_numeric] = numeric
+            offset = n_numeric
+            for name in self.categorical_features:
+                codes = self._codes(X, name, n)
+                known = codes >= 0
+                out[np.flatnonzero(known), offset + codes[known]] = 1.0
+                offset += len(self.categories_[name])
+            return out
+
+        blocks = [sparse.csr_matrix(numeric)]
+        for name in self.categorical_features:
+            codes = self._codes(X, name, n)
+            known = codes >= 0
+            rows = np.flatnonzero(known)
+            blocks.append(sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.float32), (rows, codes[known])),
+                shape=(n, len(self.categories_[name])),
+            ))
+        return sparse.hstack(blocks, format='csr', dtype=np.float32)
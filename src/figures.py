@@ -0,0 +1,197 @@
+"""
+Content-addressed cache of rendered EDA figures.
+
+A figure is identified by the dataset fingerprint, the plot function and its
+parameters. Rendered PNG bytes are kept in memory and on disk under that
+key, so a hit serves the bytes without running the plot function at all,
+including after a restart. Render times are recorded per plot function.
+The directory is pruned after each render: figures unused for max_age
+seconds go first, then the least recently used ones until the directory
+fits in max_disk_bytes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .cache import dataset_fingerprint
+
+# Part of every key: bump when the plots' appearance changes
+# (2: pyplot-free rendering and the large-data histogram and correlation modes)
+FIGURE_CACHE_VERSION = 2
+DEFAULT_FIGURE_DIR = os.path.join("assets", "cache")
+DEFAULT_MAX_DISK_BYTES = 256 * 2**20
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+
+def figure_key(fingerprint, plot_func, params):
+    """Content address of a figure"""
+    name = f"{plot_func.__module__}.{plot_func.__qualname__}"
+    encoded = json.dumps([FIGURE_CACHE_VERSION, fingerprint, name, params], sort_keys=True, default=str)
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+class FigureCache:
+    """PNG bytes of rendered figures, in a bounded memory LRU backed by a directory"""
+
+    def __init__(self, root=DEFAULT_FIGURE_DIR, max_entries=64, max_disk_bytes=DEFAULT_MAX_DISK_BYTES,
+                 max_age=DEFAULT_MAX_AGE):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key so concurrent misses render a figure only once
+        self._key_locks = {}
+        self._stats = {}
+
+    def path(self, key):
+        return os.path.join(self.root, f"{key}.png")
+
+    def _record(self, plot_func, event, seconds=None):
+        stats = self._stats.setdefault(plot_func.__name__, {
+            "renders": 0, "memory_hits": 0, "disk_hits": 0, "render_seconds": 0.0, "last_render_seconds": None,
+        })
+        stats[event] += 1
+        if seconds is not None:
+            stats["render_seconds"] += seconds
+            stats["last_render_seconds"] = seconds
+
+    def _remember(self, key, data):
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Cached PNG bytes for key, or None"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+            # The modification time doubles as the last use, for pruning
+            os.utime(self.path(key))
+        except OSError:
+            return None
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def _store(self, key, data):
+        os.makedirs(self.root, exist_ok=True)
+        # Written under a unique temporary name and moved into place, so
+        # readers never see a partial file
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def prune(self):
+        """Remove stored PNGs older than max_age, then the least recently used beyond max_disk_bytes"""
+        try:
+            names = [name for name in os.listdir(self.root) if name.endswith(".png")]
+        except OSError:
+            return
+        files = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(self.root, name))
+            except OSError:
+                # Removed by another process meanwhile
+                continue
+            files.append((stat.st_mtime, stat.st_size, name))
+        files.sort(reverse=True)
+        cutoff = time.time() - self.max_age
+        total = 0
+        for mtime, size, name in files:
+            total += size
+            if mtime < cutoff or total > self.max_disk_bytes:
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+
+    def get_or_render(self, plot_func, df, fingerprint=None, **params):
+        """
+        PNG bytes returned by plot_func(df, **params), rendering only on a miss.
+
+        Returns (bytes, render seconds), where render seconds is None when
+        the figure came from the cache.
+        """
+        if fingerprint is None:
+            fingerprint = dataset_fingerprint(df)
+        key = figure_key(fingerprint, plot_func, params)
+
+        with self._lock:
+            in_memory = key in self._memory
+        data = self.get(key)
+        if data is not None:
+            with self._lock:
+                self._record(plot_func, "memory_hits" if in_memory else "disk_hits")
+            return data, None
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            try:
+                # Another thread may have rendered it while we waited
+                data = self.get(key)
+                if data is not None:
+                    with self._lock:
+                        self._record(plot_func, "memory_hits")
+                    return data, None
+
+                start = time.perf_counter()
+                data = plot_func(df, **params)
+                seconds = time.perf_counter() - start
+                self._store(key, data)
+                with self._lock:
+                    self._remember(key, data)
+                    self._record(plot_func, "renders", seconds)
+                self.prune()
+                return data, seconds
+            finally:
+                # Threads still waiting hold the lock object and find the figure
+                # on their own; later misses start a new lock
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+
+    def stats(self):
+        """Hit counts and render times per plot function"""
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def clear(self, disk=False):
+        """Drop the in-memory figures, and the stored PNGs too with disk=True"""
+        with self._lock:
+            self._memory.clear()
+        if disk and os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if name.endswith(".png"):
+                    os.remove(os.path.join(self.root, name))
+
+
+_default_cache = None
+
+
+def get_figure_cache():
+    """The process-wide figure cache in the default directory"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FigureCache()
+    return _default_cache
+
+
+def cached_figure(plot_func, df, fingerprint=None, **params):
+    """(PNG bytes, render seconds or None) for a plot from the default cache"""
+    return get_figure_cache().get_or_render(plot_func, df, fingerprint, **params)
@@ -0,0 +1,376 @@
+"""
+Vectorized sales forecasts for many series at once.
+
+Monthly sales are pivoted once into a (series x month) matrix, with months
+missing from a series counted as zero sales, and a linear trend is fitted to
+every row together in closed form. Forecasts for the Brand, Region and
+Brand x Region series are all derived from the one Brand x Region matrix,
+which is built from the aggregate cube when the dataset has one.
+
+Models are pluggable: every Forecaster fits all rows of a matrix together,
+and backtest scores forecasters on rolling origins for per-series accuracy and
+per-model fit/predict time so a model can be chosen per series.
+"""
+
+import copy
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from .cube import get_cube
+from .schema import DATE_COLUMN, parse_month_column
+
+# Series levels forecast by forecast_all, as tuples of grouping dimensions
+DEFAULT_LEVELS = (("Brand",), ("Region",), ("Brand", "Region"))
+
+_SALES_NAMES = ["Units_Sold", "sales"]
+
+
+class SeriesMatrix:
+    """Monthly totals of many series: values[i, j] is series i in month j"""
+
+    def __init__(self, keys, months, values):
+        self.keys = keys
+        self.months = months
+        self.values = values
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def from_frame(cls, df, dims, fingerprint=None):
+        """
+        Pivot df's monthly sales by dims (e.g. ("Brand", "Region")).
+
+        Answered from the aggregate cube when it has every dimension,
+        otherwise from the rows. Months form a contiguous range from the
+        first to the last month in the data.
+        """
+        dims = list(dims)
+        cube = get_cube(df, fingerprint)
+        if cube is not None and cube.has("year_month", *dims):
+            totals = cube.rollup(dims + ["year_month"])["units"]
+        else:
+            sales_col = next((name for name in _SALES_NAMES if name in df.columns), None)
+            if sales_col is None or DATE_COLUMN not in df.columns:
+                raise ValueError(f"Need a {DATE_COLUMN} and a sales column. Found columns: {df.columns.tolist()}")
+            months = parse_month_column(df[DATE_COLUMN])
+            if not isinstance(months.dtype, pd.PeriodDtype):
+                raise ValueError(f"{DATE_COLUMN} values are not in YYYY-MM format")
+            keys = [df[dim] for dim in dims] + [months.rename("year_month")]
+            totals = df[sales_col].groupby(keys, observed=True).sum()
+        return cls.from_totals(totals)
+
+    @classmethod
+    def from_totals(cls, totals):
+        """Pivot a Series of sums indexed by (*series dims, year_month)"""
+        totals = totals[totals.index.get_level_values(-1).notna()]
+        series_index = totals.index.droplevel(-1)
+        if isinstance(series_index, pd.MultiIndex):
+            # Combine the level codes into one integer per series instead of
+            # factorizing materialized key tuples; -1 (missing) shifts to 0
+            codes = [np.asarray(level_codes) + 1 for level_codes in series_index.codes]
+            combined = np.ravel_multi_index(codes, [len(level) + 1 for level in series_index.levels])
+            _, first_positions, series_codes = np.unique(combined, return_index=True, return_inverse=True)
+            keys = series_index[first_positions]
+        else:
+            series_codes, keys = series_index.factorize(sort=True)
+        month_values = totals.index.get_level_values(-1)
+        first, last = month_values.min(), month_values.max()
+        months = pd.period_range(first, last, freq="M", name="year_month")
+        month_codes = month_values.asi8 - first.ordinal
+
+        values = np.zeros((len(keys), len(months)), dtype=np.float64)
+        # (series, month) pairs are unique in a groupby result, so plain
+        # fancy assignment places every total
+        values[series_codes, month_codes] = totals.to_numpy(dtype=np.float64)
+        if not isinstance(keys, pd.MultiIndex):
+            keys = pd.Index(keys, name=series_index.name)
+        return cls(keys, months, values)
+
+    def aggregate(self, dims):
+        """Matrix of the coarser series obtained by summing over the other dims"""
+        frame = pd.DataFrame(self.values, index=self.keys)
+        grouped = frame.groupby(level=list(dims), observed=True, sort=True).sum()
+        return SeriesMatrix(grouped.index, self.months, grouped.to_numpy())
+
+
+def fit_linear_trends(values):
+    """
+    Least-squares line through every row of values against month number.
+
+    Returns (intercept, slope) arrays, one entry per row: the same fit as a
+    LinearRegression on month numbers 0..n-1, computed for all rows at once.
+    """
+    n_months = values.shape[1]
+    t = np.arange(n_months, dtype=np.float64)
+    t_centered = t - t.mean()
+    denominator = t_centered @ t_centered
+    means = values.mean(axis=1)
+    if denominator == 0:
+        # A single month: a flat line through it
+        return means, np.zeros_like(means)
+    slope = (values @ t_centered) / denominator
+    return means - slope * t.mean(), slope
+
+
+class Forecaster(ABC):
+    """
+    A forecasting model fitted to every row of a (series x month) matrix.
+
+    fit(values) returns the forecaster; predict(horizon) returns a (series x
+    horizon) array of unclipped forecasts. After fit, trend_ holds each
+    series' estimated monthly change at the end of its history.
+    """
+
+    name = None
+
+    @abstractmethod
+    def fit(self, values):
+        """Fit every row of values; returns self"""
+
+    @abstractmethod
+    def predict(self, horizon):
+        """Forecasts for the next horizon months of every fitted series"""
+
+
+class LinearTrendForecaster(Forecaster):
+    """Least-squares line on month number, as forecast_sales fits"""
+
+    name = "linear"
+
+    def fit(self, values):
+        self.intercept_, self.trend_ = fit_linear_trends(values)
+        self.n_months_ = values.shape[1]
+        return self
+
+    def predict(self, horizon):
+        future_t = np.arange(self.n_months_, self.n_months_ + horizon, dtype=np.float64)
+        return self.intercept_[:, None] + self.trend_[:, None] * future_t
+
+
+class SeasonalNaiveForecaster(Forecaster):
+    """Repeat the last season (the last month when history is shorter)"""
+
+    name = "seasonal_naive"
+
+    def __init__(self, season_length=12):
+        self.season_length = season_length
+
+    def fit(self, values):
+        m = min(self.season_length, values.shape[1])
+        self.last_season_ = values[:, -m:]
+        if values.shape[1] >= 2 * m:
+            previous = values[:, -2 * m:-m]
+            self.trend_ = (self.last_season_.mean(axis=1) - previous.mean(axis=1)) / m
+        else:
+            self.trend_ = np.zeros(len(values))
+        return self
+
+    def predict(self, horizon):
+        m = self.last_season_.shape[1]
+        return self.last_season_[:, np.arange(horizon) % m]
+
+
+class HoltWintersForecaster(Forecaster):
+    """
+    Additive Holt-Winters exponential smoothing with an optionally damped
+    trend (phi < 1), updated for all series at once month by month.
+
+    Smoothing weights are fixed rather than optimized per series. Series with
+    less than two full seasons of history are smoothed without the seasonal
+    component.
+    """
+
+    name = "holt_winters"
+
+    def __init__(self, alpha=0.3, beta=0.1, gamma=0.2, phi=1.0, season_length=12, seasonal=True):
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.phi = phi
+        self.season_length = season_length
+        self.seasonal = seasonal
+
+    def fit(self, values):
+        n_months = values.shape[1]
+        m = self.season_length
+        seasonal = self.seasonal and n_months >= 2 * m
+        # The initial state is the one before month 0, so the first update
+        # steps it forward to month 0 rather than one month past it
+        if seasonal:
+            first, second = values[:, :m].mean(axis=1), values[:, m:2 * m].mean(axis=1)
+            trend = (second - first) / m
+            # first is the level in the middle of the first season
+            level = first - trend * (m + 1) / 2
+            season = values[:, :m] - (level[:, None] + trend[:, None] * np.arange(1, m + 1))
+        else:
+            trend = values[:, 1] - values[:, 0] if n_months > 1 else np.zeros(len(values))
+            level = values[:, 0] - self.phi * trend
+            season = np.zeros((len(values), 1))
+
+        alpha, beta, gamma, phi = self.alpha, self.beta, self.gamma, self.phi
+        for t in range(n_months):
+            y = values[:, t]
+            s = t % season.shape[1]
+            previous_level = level
+            level = alpha * (y - season[:, s]) + (1 - alpha) * (level + phi * trend)
+            trend = beta * (level - previous_level) + (1 - beta) * phi * trend
+            if seasonal:
+                season[:, s] = gamma * (y - level) + (1 - gamma) * season[:, s]
+
+        self.level_, self.trend_, self.season_ = level, trend, season
+        self.n_months_ = n_months
+        return self
+
+    def predict(self, horizon):
+        steps = np.arange(1, horizon + 1)
+        if self.phi == 1:
+            damping = steps.astype(np.float64)
+        else:
+            damping = np.cumsum(self.phi ** steps)
+        season_positions = (self.n_months_ + steps - 1) % self.season_.shape[1]
+        return (self.level_[:, None] + self.trend_[:, None] * damping
+                + self.season_[:, season_positions])
+
+
+class DampedTrendForecaster(HoltWintersForecaster):
+    """Holt's linear trend with the trend damped by phi each month, no seasonality"""
+
+    name = "damped_trend"
+
+    def __init__(self, alpha=0.3, beta=0.1, phi=0.9):
+        super().__init__(alpha=alpha, beta=beta, phi=phi, seasonal=False)
+
+
+# Forecasters by name, each created with its default settings
+FORECASTERS = {
+    cls.name: cls
+    for cls in (LinearTrendForecaster, SeasonalNaiveForecaster, HoltWintersForecaster, DampedTrendForecaster)
+}
+
+
+def make_forecaster(forecaster):
+    """A Forecaster instance from a name in FORECASTERS or an instance"""
+    if isinstance(forecaster, Forecaster):
+        return forecaster
+    if forecaster not in FORECASTERS:
+        raise ValueError(f"Unknown forecaster: {forecaster}. Use one of {list(FORECASTERS)}")
+    return FORECASTERS[forecaster]()
+
+
+class MultiSeriesForecast:
+    """Forecasts for every series of a SeriesMatrix from one forecaster"""
+
+    def __init__(self, matrix, horizon=12, forecaster="linear"):
+        self.matrix = matrix
+        self.horizon = horizon
+        # A copy, so one instance can be shared by several forecasts
+        self.forecaster = copy.copy(make_forecaster(forecaster)).fit(matrix.values)
+        # Negative sales are not meaningful; clip as forecast_sales does
+        self.values = np.maximum(self.forecaster.predict(horizon), 0)
+        self.months = pd.period_range(matrix.months[-1] + 1, periods=horizon, freq="M", name="year_month")
+
+    @property
+    def keys(self):
+        return self.matrix.keys
+
+    @property
+    def slope(self):
+        """Estimated monthly change per series at the end of the history"""
+        return self.forecaster.trend_
+
+    @property
+    def next_year(self):
+        """Next-year total per series: the mean of the first 12 forecast months times 12"""
+        return self.values[:, :12].mean(axis=1) * 12
+
+    def to_frame(self):
+        """Forecasts indexed by series key, one column per future month"""
+        return pd.DataFrame(self.values, index=self.keys, columns=self.months)
+
+    def summary(self):
+        """Per series: last year's actual total, the trend slope and next year's forecast"""
+        last_year = self.matrix.values[:, -12:].sum(axis=1)
+        return pd.DataFrame({
+            "last_12_months": last_year,
+            "monthly_trend": self.slope,
+            "next_year_forecast": self.next_year,
+        }, index=self.keys)
+
+
+def backtest(values, forecasters=None, horizon=3, n_origins=3, keys=None):
+    """
+    Rolling-origin backtest of forecasters on every row of values.
+
+    For each of the last n_origins origins (spaced horizon months apart),
+    each forecaster is fitted on the months before the origin and scored on
+    the next horizon months. Returns a DataFrame indexed by (series key,
+    forecaster name) with each series' mean absolute error over all origins.
+
+    model_fit_seconds and model_predict_seconds are the forecaster's mean
+    seconds per series for one fit or predict. All series are fitted
+    together, so these are a cost of the model, the same for every series.
+    """
+    forecasters = [make_forecaster(forecaster) for forecaster in (forecasters or list(FORECASTERS))]
+    n_series, n_months = values.shape
+    origins = [n_months - horizon * (i + 1) for i in reversed(range(n_origins))]
+    if origins[0] < 2:
+        raise ValueError(f"Need more than {horizon * n_origins + 1} months for {n_origins} origins of {horizon} months")
+    keys = pd.RangeIndex(n_series, name="series") if keys is None else keys
+
+    frames = []
+    for forecaster in forecasters:
+        abs_error = np.zeros(n_series)
+        fit_seconds = predict_seconds = 0.0
+        # Every row is fitted in one call: only the model's total time is measurable
+        for origin in origins:
+            start = time.perf_counter()
+            forecaster.fit(values[:, :origin])
+            fitted = time.perf_counter()
+            predicted = np.maximum(forecaster.predict(horizon), 0)
+            predict_seconds += time.perf_counter() - fitted
+            fit_seconds += fitted - start
+            abs_error += np.abs(predicted - values[:, origin:origin + horizon]).sum(axis=1)
+        frames.append(pd.DataFrame({
+            "forecaster": forecaster.name,
+            "mae": abs_error / (horizon * len(origins)),
+            "model_fit_seconds": fit_seconds / (n_series * len(origins)),
+            "model_predict_seconds": predict_seconds / (n_series * len(origins)),
+        }, index=keys))
+    return pd.concat(frames).set_index("forecaster", append=True)
+
+
+def choose_forecasters(scores, tolerance=0.05):
+    """
+    Pick a forecaster per series from backtest scores: the cheapest model (by
+    fit plus predict time) whose MAE is within tolerance of the series' best.
+    Returns a Series of forecaster names indexed by series key.
+    """
+    scores = scores.assign(seconds=scores["model_fit_seconds"] + scores["model_predict_seconds"])
+    series_levels = list(range(scores.index.nlevels - 1))
+    best = scores["mae"].groupby(level=series_levels).transform("min")
+    eligible = scores[scores["mae"] <= best * (1 + tolerance)]
+    cheapest = eligible.sort_values("seconds", kind="stable").groupby(level=series_levels).head(1)
+    choice = cheapest.reset_index("forecaster")["forecaster"]
+    return choice.reindex(scores.index.droplevel("forecaster").unique())
+
+
+def forecast_all(df, levels=DEFAULT_LEVELS, horizon=12, fingerprint=None, forecaster="linear"):
+    """
+    Forecast every series at each level of grouping dimensions.
+
+    The matrix at the union of all levels' dimensions is built once and
+    summed down to each level. forecaster is a name in FORECASTERS or a
+    Forecaster instance. Returns {level: MultiSeriesForecast}.
+    """
+    levels = [tuple(level) for level in levels]
+    finest = list(dict.fromkeys(dim for level in levels for dim in level))
+    matrix = SeriesMatrix.from_frame(df, finest, fingerprint)
+    forecasts = {}
+    for level in levels:
+        level_matrix = matrix if list(level) == finest else matrix.aggregate(level)
+        forecasts[level] = MultiSeriesForecast(level_matrix, horizon, forecaster)
+    return forecasts
@@ -0,0 +1,89 @@
+"""
+Interactive plotly versions of the EDA charts.
+
+The aggregation runs on the server and only its result goes into the figure:
+the top brand totals, the histogram counts with a sampled KDE curve, and the
+correlation matrix. The browser renders and the server never rasterizes, and
+the payload does not grow with the number of rows.
+"""
+
+import numpy as np
+
+from .cube import sum_by
+from .streaming import KDE_SAMPLE_SIZE, chunked_correlation, kde_curve, price_histogram
+
+
+def _go():
+    # plotly is only imported once an interactive chart is requested
+    import plotly.graph_objects as go
+    return go
+
+
+def _find_column(df, *fragments):
+    for col in df.columns:
+        col_lower = col.lower()
+        if any(fragment in col_lower for fragment in fragments):
+            return col
+    return None
+
+
+def sales_by_brand_figure(df, top_n=20):
+    """Bar chart of the top_n brands by sales"""
+    brand_col = _find_column(df, 'brand', 'manufacturer')
+    sales_col = _find_column(df, 'sales', 'quantity', 'units')
+    if brand_col is None or sales_col is None:
+        raise ValueError(f"Missing required columns. Found: {df.columns.tolist()}. Need 'brand' and 'sales' columns.")
+
+    brand_sales = sum_by(df, brand_col, sales_col).sort_values(ascending=False).head(top_n)
+    go = _go()
+    fig = go.Figure(go.Bar(
+        x=[str(brand) for brand in brand_sales.index], y=brand_sales.to_numpy(),
+        marker=dict(color=brand_sales.to_numpy(), colorscale="Viridis_r"),
+        hovertemplate="%{x}: %{y:,.0f} units<extra></extra>",
+    ))
+    fig.update_layout(title="Sales by Brand", xaxis_title="Brand", yaxis_title="Sales", xaxis_tickangle=-45)
+    return fig
+
+
+def price_distribution_figure(df, bins=30, kde_sample=KDE_SAMPLE_SIZE):
+    """Histogram of prices within 3 standard deviations, with a KDE curve"""
+    price_col = _find_column(df, 'price')
+    if price_col is None:
+        raise ValueError(f"Missing required column: 'price'. Found columns: {df.columns.tolist()}")
+
+    prices = df[price_col].to_numpy(dtype='float64', na_value=np.nan)
+    go = _go()
+    counts, edges, sample = price_histogram(prices, bins, kde_sample)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        marker=dict(color="skyblue", line=dict(color="black", width=1)), name="Frequency",
+        hovertemplate="%{customdata[0]:,.0f} - %{customdata[1]:,.0f}: %{y:,}<extra></extra>",
+    ))
+    if len(sample) > 1 and np.ptp(sample) > 0:
+        x, y = kde_curve(counts, edges, sample)
+        fig.add_trace(go.Scatter(x=x, y=y, mode="lines", line=dict(color="steelblue"), name="KDE",
+                                 hoverinfo="skip"))
+    fig.update_layout(title="Price Distribution", xaxis_title="Price", yaxis_title="Frequency",
+                      bargap=0, showlegend=False)
+    return fig
+
+
+def correlation_figure(df):
+    """Annotated heatmap of the correlations between numeric columns with variance"""
+    numeric_df = df.select_dtypes(include='number')
+    if numeric_df.empty:
+        raise ValueError("No numeric columns found for correlation analysis")
+    corr = chunked_correlation(numeric_df)
+    if len(corr.columns) < 2:
+        raise ValueError("Insufficient numeric columns with variance for correlation analysis")
+
+    labels = [str(col) for col in corr.columns]
+    go = _go()
+    fig = go.Figure(go.Heatmap(
+        z=corr.to_numpy().round(4), x=labels, y=labels, zmin=-1, zmax=1, colorscale="RdBu_r",
+        texttemplate="%{z:.2f}", hovertemplate="%{y} / %{x}: %{z:.2f}<extra></extra>",
+    ))
+    fig.update_layout(title="Correlation Heatmap", yaxis_autorange="reversed",
+                      height=max(450, 40 * len(labels)))
+    return fig
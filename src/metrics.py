@@ -0,0 +1,230 @@
+"""
+Lightweight timing and memory metrics for the pipeline stages.
+
+Stages are measured with the timed decorator or the stage context manager,
+which record wall time, rows processed and, when memory tracking is on,
+the peak memory allocated during the stage. Records are kept in a bounded
+in-process buffer tagged with the current session, and can be exported as
+Prometheus text or JSON lines.
+
+Memory tracking uses tracemalloc, which slows allocation-heavy code down,
+so it is off unless enable_memory_tracking() is called or the
+EVISIONAI_TRACE_MEMORY environment variable is set to 1. tracemalloc's peak
+is process-wide, so a stage that overlaps a memory-tracked stage in another
+thread (another session, the startup warm-up) cannot tell its own
+allocations apart: its peak_bytes is recorded as None instead of a wrong
+number.
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+# Records kept for recent-timing views; aggregates cover every record
+MAX_RECORDS = 2000
+
+_lock = threading.Lock()
+_records = deque(maxlen=MAX_RECORDS)
+_totals = {}
+_session = contextvars.ContextVar("evisionai_session", default=None)
+# Per-thread stack of memory peaks seen by enclosing stages
+_memory_frames = threading.local()
+_memory_lock = threading.Lock()
+# Thread id -> memory-tracked stages open in that thread
+_memory_threads = {}
+# Bumped whenever tracked stages of two threads overlap
+_memory_epoch = 0
+
+
+def set_session(session_id):
+    """Tag stages recorded from the current context with session_id"""
+    _session.set(session_id)
+
+
+def enable_memory_tracking(frames=1):
+    """Start tracemalloc so stages also record their peak allocated memory"""
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def disable_memory_tracking():
+    tracemalloc.stop()
+
+
+def memory_tracking_enabled():
+    return tracemalloc.is_tracing()
+
+
+def record(stage, seconds, rows=None, peak_bytes=None):
+    """Record one run of a stage"""
+    entry = {
+        "stage": stage,
+        "seconds": seconds,
+        "rows": rows,
+        "peak_bytes": peak_bytes,
+        "session": _session.get(),
+        "timestamp": time.time(),
+    }
+    with _lock:
+        _records.append(entry)
+        totals = _totals.get(stage)
+        if totals is None:
+            totals = _totals[stage] = {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0, "peak_bytes": 0}
+        totals["calls"] += 1
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+        if rows is not None:
+            totals["rows"] += rows
+        if peak_bytes is not None:
+            totals["peak_bytes"] = max(totals["peak_bytes"], peak_bytes)
+    return entry
+
+
+def _memory_start():
+    global _memory_epoch
+    if not tracemalloc.is_tracing():
+        return False
+    thread = threading.get_ident()
+    stack = getattr(_memory_frames, "stack", None)
+    if stack is None:
+        stack = _memory_frames.stack = []
+    with _memory_lock:
+        concurrent = any(other != thread for other in _memory_threads)
+        if concurrent:
+            _memory_epoch += 1
+        _memory_threads[thread] = _memory_threads.get(thread, 0) + 1
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # The enclosing stage's peak so far, before this stage resets it
+            stack[-1][1] = max(stack[-1][1], peak)
+        stack.append([current, 0, _memory_epoch, concurrent])
+        if not concurrent:
+            # Resetting now would corrupt the other threads' peaks
+            tracemalloc.reset_peak()
+    return True
+
+
+def _memory_end():
+    """Peak bytes allocated during the stage, or None if another thread's tracked stage overlapped it"""
+    thread = threading.get_ident()
+    stack = _memory_frames.stack
+    with _memory_lock:
+        _memory_threads[thread] -= 1
+        if not _memory_threads[thread]:
+            del _memory_threads[thread]
+        start, inner_peak, epoch, concurrent = stack.pop()
+        peak = max(tracemalloc.get_traced_memory()[1], inner_peak)
+        overlapped = concurrent or epoch != _memory_epoch
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    return None if overlapped else max(peak - start, 0)
+
+
+@contextmanager
+def stage(name, rows=None):
+    """
+    Measure the enclosed block as a stage.
+
+    Yields a dict; set its "rows" inside the block if the row count is only
+    known there. Its "seconds" and "peak_bytes" are set when the block exits;
+    peak_bytes is None when memory is not tracked or the peak is unreliable
+    because a tracked stage in another thread overlapped this one.
+    """
+    info = {"rows": rows}
+    tracking = _memory_start()
+    start = time.perf_counter()
+    try:
+        yield info
+    finally:
+        seconds = time.perf_counter() - start
+        peak_bytes = _memory_end() if tracking else None
+        info.update(seconds=seconds, peak_bytes=peak_bytes)
+        record(name, seconds, info["rows"], peak_bytes)
+
+
+def _frame_rows(args):
+    # Rows processed: the length of the first DataFrame argument
+    for arg in args[:1]:
+        if hasattr(arg, "columns") and hasattr(arg, "__len__"):
+            return len(arg)
+    return None
+
+
+def timed(name=None, rows=_frame_rows):
+    """
+    Decorator recording each call of a function as a stage.
+
+    The stage is named after the function unless name is given. rows is a
+    function of the call's positional arguments returning the rows
+    processed; by default the length of a DataFrame first argument.
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, rows(args) if rows is not None else None) as info:
+                result = func(*args, **kwargs)
+                if info["rows"] is None and hasattr(result, "columns") and hasattr(result, "__len__"):
+                    info["rows"] = len(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def recent(session=None, limit=100):
+    """The most recent records, newest first, optionally for one session"""
+    with _lock:
+        records = list(_records)
+    if session is not None:
+        records = [entry for entry in records if entry["session"] == session]
+    return records[::-1][:limit]
+
+
+def totals():
+    """Aggregates per stage since start (or the last reset)"""
+    with _lock:
+        return {name: dict(values) for name, values in _totals.items()}
+
+
+def reset():
+    with _lock:
+        _records.clear()
+        _totals.clear()
+
+
+def to_prometheus():
+    """Per-stage aggregates in the Prometheus text exposition format"""
+    metrics = [
+        ("evisionai_stage_calls_total", "counter", "Calls of the stage", "calls"),
+        ("evisionai_stage_seconds_total", "counter", "Wall time spent in the stage", "seconds"),
+        ("evisionai_stage_seconds_max", "gauge", "Slowest single call of the stage", "max_seconds"),
+        ("evisionai_stage_rows_total", "counter", "Rows processed by the stage", "rows"),
+        ("evisionai_stage_peak_bytes_max", "gauge", "Largest peak memory allocated during the stage", "peak_bytes"),
+    ]
+    stages = totals()
+    lines = []
+    for metric, kind, help_text, field in metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name in sorted(stages):
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(f'{metric}{{stage="{label}"}} {stages[name][field]}')
+    return "\n".join(lines) + "\n"
+
+
+def to_json_lines(records=None):
+    """Records (all recent ones by default, oldest first) as JSON lines"""
+    if records is None:
+        records = recent(limit=MAX_RECORDS)[::-1]
+    return "".join(json.dumps(entry) + "\n" for entry in records)
+
+
+if os.environ.get("EVISIONAI_TRACE_MEMORY") == "1":
+    enable_memory_tracking()
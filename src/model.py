@@ -1,11 +1,20 @@
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
 import pandas as pd
 import numpy as np
+import copy
 
-def train_price_model(df):
+from .cube import cached_cube, cube_field
+from .forecasting import make_forecaster
+from .metrics import timed
+
+# scikit-learn (and .features, which subclasses its estimators) is imported
+# inside the functions that train or score models, so importing this module
+# for forecasting does not pay for it
+
+# Hyperparameters used when train_price_model is called without overrides
+DEFAULT_PRICE_MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+def resolve_price_columns(df):
+    """Map the price model's feature/target names to the columns present in df"""
     # Check required columns - try different possible column name variations
     column_mapping = {
         'battery_kwh': ['battery_kwh', 'battery', 'Battery (kWh)', 'battery_kWh'],
@@ -27,41 +36,66 @@ def train_price_model(df):
                 break
         if not found:
             raise ValueError(f"Missing required column: {key}. Tried: {possible_names}")
+    return actual_cols
+
+def price_feature_frame(df, categorical_features=('brand',)):
+    """
+    Frame of price model inputs under their canonical names: the numeric
+    features, the resolved brand column as 'brand' and any extra categorical
+    columns (e.g. Model, Region, Vehicle_Type) under their own names
+    """
+    from .features import PRICE_NUMERIC_FEATURES
     
-    # Features for price prediction
-    feature_cols = [actual_cols['battery_kwh'], actual_cols['range_km'], 
-                    actual_cols['year'], actual_cols['acceleration'], actual_cols['brand']]
-    X = df[feature_cols].copy()
-    
-    # Rename columns for consistency
-    X.columns = ['battery_kwh', 'range_km', 'year', 'acceleration', 'brand']
-    
-    # Handle missing values in features
-    numeric_features = ['battery_kwh', 'range_km', 'year', 'acceleration']
-    for col in numeric_features:
-        if X[col].isna().any():
-            median_val = X[col].median()
-            if pd.notna(median_val):
-                X[col] = X[col].fillna(median_val)
-            else:
-                X[col] = X[col].fillna(0)
-    
-    # Encode categorical variables
-    X = pd.get_dummies(X, columns=['brand'], drop_first=True, dtype=int)
-    
-    # Target variable
-    y = df[actual_cols['price']].copy()
+    actual_cols = resolve_price_columns(df)
+    columns = {name: df[actual_cols[name]] for name in PRICE_NUMERIC_FEATURES}
+    for name in categorical_features:
+        source = actual_cols['brand'] if name == 'brand' else name
+        if source not in df.columns:
+            raise ValueError(f"Missing categorical feature column: {name}")
+        columns[name] = df[source]
+    return pd.DataFrame(columns)
+
+def price_target(df):
+    """Price target with missing values filled by the median"""
+    y = df[resolve_price_columns(df)['price']]
     if y.isna().any():
         median_price = y.median()
         if pd.notna(median_price):
             y = y.fillna(median_price)
         else:
             y = y.fillna(0)
+    return y
+
+def _valid_price_rows(df, categorical_features):
+    """Feature frame and target array restricted to rows with a positive price"""
+    X = price_feature_frame(df, categorical_features)
+    y = price_target(df)
     
     # Remove rows where target is still missing or zero
     valid_idx = ~y.isna() & (y > 0)
-    X = X[valid_idx]
-    y = y[valid_idx]
+    return X[valid_idx], y[valid_idx].to_numpy()
+
+@timed()
+def train_price_model(df, n_estimators=100, random_state=42, categorical_features=('brand',),
+                      encoding='onehot', n_jobs=-1, **forest_params):
+    """
+    Train the price model: a FeatureEncoder followed by a RandomForestRegressor.
+    
+    The returned pipeline predicts from a frame (or dict of columns) with the
+    canonical feature names, so training and inference share one encoding.
+    categorical_features may add e.g. 'Model', 'Region' and 'Vehicle_Type' to
+    'brand'; encoding is 'onehot' (one float32 column per category, sparse
+    when there are many) or 'ordinal' (one column per categorical, cheaper
+    but less accurate). Further forest hyperparameters (e.g.
+    max_depth, min_samples_leaf) are passed to the RandomForestRegressor.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_squared_error
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+    from .features import FeatureEncoder
+    
+    X, y = _valid_price_rows(df, categorical_features)
     
     if len(X) == 0:
         raise ValueError("No valid data for training after preprocessing")
@@ -69,19 +103,187 @@ def train_price_model(df):
     if len(X) < 10:
         raise ValueError(f"Insufficient data for training. Only {len(X)} valid samples available.")
     
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, shuffle=True)
+    # Medians and categories are learned from all valid rows, as get_dummies did
+    encoder = FeatureEncoder(categorical_features=tuple(categorical_features), encoding=encoding).fit(X)
+    X_encoded = encoder.transform(X)
+    del X
+    
+    X_train, X_test, y_train, y_test = train_test_split(X_encoded, y, test_size=0.2, random_state=42, shuffle=True)
     
-    model = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    model.fit(X_train, y_train)
+    forest = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs,
+                                   **forest_params)
+    forest.fit(X_train, y_train)
     
-    y_pred = model.predict(X_test)
+    y_pred = forest.predict(X_test)
     # Calculate RMSE manually (square root of MSE)
     mse = mean_squared_error(y_test, y_pred)
     rmse = np.sqrt(mse)
     
+    model = Pipeline([('encoder', encoder), ('forest', forest)])
     return model, rmse
 
-def forecast_sales(df):
+def price_model_rmse(model, df):
+    """RMSE of a model from train_price_model on the valid rows of df"""
+    from sklearn.metrics import mean_squared_error
+    
+    categorical_features = model.named_steps['encoder'].categorical_features
+    X, y = _valid_price_rows(df, categorical_features)
+    return np.sqrt(mean_squared_error(y, model.predict(X)))
+
+def _split_new_rows(df_new, test_size=0.2):
+    """Train/holdout positions of appended rows, the same for every caller"""
+    from sklearn.model_selection import train_test_split
+    
+    positions = np.arange(len(df_new))
+    if len(positions) < 2:
+        return positions, positions[:0]
+    return train_test_split(positions, test_size=test_size, random_state=42, shuffle=True)
+
+def update_price_model(model, df_new, n_base_rows, n_new_estimators=None):
+    """
+    Incrementally update a model from train_price_model with appended rows.
+    
+    The forest is warm-started: the existing trees are kept and
+    n_new_estimators trees are grown on 80% of df_new only, by default in
+    proportion to how many rows df_new adds to the n_base_rows the model was
+    trained from. The encoder is reused as fitted, so categories first seen
+    in df_new encode as unseen. The model passed in is not modified.
+    Returns (updated model, RMSE on the held-out 20% of df_new, or None when
+    too few rows were appended to hold any out).
+    """
+    from sklearn.pipeline import Pipeline
+    
+    encoder = model.named_steps['encoder']
+    forest = copy.deepcopy(model.named_steps['forest'])
+    
+    train_pos, test_pos = _split_new_rows(df_new)
+    X_train, y_train = _valid_price_rows(df_new.iloc[train_pos], encoder.categorical_features)
+    if len(X_train) == 0:
+        raise ValueError("No valid new rows to update the model with")
+    
+    if n_new_estimators is None:
+        n_new_estimators = max(1, round(len(forest.estimators_) * len(df_new) / max(n_base_rows, 1)))
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_estimators)
+    forest.fit(encoder.transform(X_train), y_train)
+    forest.set_params(warm_start=False)
+    
+    updated = Pipeline([('encoder', encoder), ('forest', forest)])
+    rmse = price_model_rmse(updated, df_new.iloc[test_pos]) if len(test_pos) else None
+    return updated, rmse
+
+def compare_with_full_retrain(model, df, n_base_rows, **params):
+    """
+    Compare an incrementally updated model against a full retrain.
+    
+    df holds the base rows followed by the appended ones; model is the result
+    of update_price_model on df's rows from n_base_rows on. The full retrain
+    uses the base rows and the same 80% of the appended rows, and both models
+    are scored on the held-out 20%. Returns a dict with both RMSEs.
+    """
+    df_new = df.iloc[n_base_rows:]
+    train_pos, test_pos = _split_new_rows(df_new)
+    if not len(test_pos):
+        raise ValueError("Not enough appended rows to hold any out")
+    categorical_features = model.named_steps['encoder'].categorical_features
+    full_model, _ = train_price_model(
+        pd.concat([df.iloc[:n_base_rows], df_new.iloc[train_pos]]),
+        categorical_features=categorical_features, **params
+    )
+    holdout = df_new.iloc[test_pos]
+    return {
+        'incremental_rmse': price_model_rmse(model, holdout),
+        'full_retrain_rmse': price_model_rmse(full_model, holdout),
+        'holdout_rows': len(holdout),
+    }
+
+class PricePredictor:
+    """
+    Fast inference for a model from train_price_model.
+    
+    Encodes inputs with the model's own FeatureEncoder straight into a
+    float32 array and averages the trees' predictions directly, skipping
+    DataFrame construction and per-call input validation.
+    """
+    
+    def __init__(self, model):
+        self.model = model
+        self.encoder = model.named_steps['encoder']
+        self.forest = model.named_steps['forest']
+        self.feature_names = self.encoder.feature_names
+        self.categorical_features = list(self.encoder.categorical_features)
+    
+    def _predict_array(self, X):
+        # Same accumulation as RandomForestRegressor.predict, without its
+        # validation and thread pool overhead
+        if self.encoder.sparse_output:
+            X = X.tocsr()
+        estimators = self.forest.estimators_
+        total = np.zeros(X.shape[0], dtype=np.float64)
+        for estimator in estimators:
+            total += estimator.predict(X, check_input=False)
+        return total / len(estimators)
+    
+    def predict_one(self, battery_kwh, range_km, year, acceleration, brand, **categoricals):
+        """Predicted price for a single vehicle configuration"""
+        record = {'battery_kwh': battery_kwh, 'range_km': range_km, 'year': year,
+                  'acceleration': acceleration, 'brand': brand, **categoricals}
+        return float(self._predict_array(self.encoder.transform(record))[0])
+    
+    def predict_many(self, records):
+        """
+        Predicted prices for many configurations.
+        
+        records is a DataFrame or dict of columns, or a list of dicts, with
+        the numeric features, brand and any extra categorical features.
+        """
+        from .features import PRICE_NUMERIC_FEATURES
+        
+        names = PRICE_NUMERIC_FEATURES + self.categorical_features
+        if isinstance(records, (pd.DataFrame, dict)):
+            columns = {name: records[name] for name in names}
+        else:
+            records = list(records)
+            columns = {name: [record[name] for record in records] for name in names}
+        if len(columns['brand']) == 0:
+            return np.empty(0)
+        return self._predict_array(self.encoder.transform(columns))
+
+def _parse_month(values):
+    """Parse a "YYYY-MM" column (or monthly periods) to timestamps"""
+    if isinstance(values.dtype, pd.PeriodDtype):
+        return values.dt.to_timestamp()
+    return pd.to_datetime(values, format='%Y-%m', errors='coerce')
+
+def _monthly_sales(df, date_col, sales_col):
+    """
+    Sales totals by month and by year, sorted by period. Answered from the
+    aggregate cube when df's cube is cached and covers the columns,
+    otherwise from the rows.
+    """
+    cube = None
+    if cube_field(date_col) == 'year_month' and cube_field(sales_col) == 'units':
+        cube = cached_cube(df)
+    if cube is not None and cube.has('year_month'):
+        monthly = cube.rollup(['year_month'])['units'].rename(sales_col)
+        yearly = cube.rollup(['year'])['units'].rename(sales_col)
+    else:
+        dates = _parse_month(df[date_col])
+        valid = dates.notna()
+        sales = df.loc[valid, sales_col]
+        monthly = sales.groupby(dates[valid].dt.to_period('M')).sum()
+        yearly = sales.groupby(dates[valid].dt.year).sum()
+    return monthly.sort_index(), yearly.sort_index()
+
+@timed()
+def forecast_sales(df, forecaster='linear'):
+    """
+    Yearly sales history and forecasts for the next two years.
+    
+    With monthly data the forecaster (a name in forecasting.FORECASTERS or a
+    Forecaster) is fitted to monthly totals and its next 24 months are
+    summed into the two yearly forecasts; otherwise a linear trend is fitted
+    to yearly totals.
+    """
     # Check required columns - try different possible column name variations
     year_col = None
     sales_col = None
@@ -99,45 +301,30 @@ def forecast_sales(df):
     if year_col is None or sales_col is None:
         raise ValueError(f"Missing required columns. Found columns: {df.columns.tolist()}. Need 'year' and 'sales' columns.")
     
+    # Validated up front so an unknown name is reported, not swallowed below
+    monthly_model = make_forecaster(forecaster)
+    
     # If we have a Date column with monthly data, use that for better forecasting
     if date_col and date_col in df.columns:
         try:
-            # Parse date and extract year-month for time series
-            df_temp = df.copy()
-            df_temp['date_parsed'] = pd.to_datetime(df_temp[date_col], format='%Y-%m', errors='coerce')
-            df_temp = df_temp.dropna(subset=['date_parsed'])
-            df_temp['year_month'] = df_temp['date_parsed'].dt.to_period('M')
-            
-            # Aggregate by year-month
-            sales_monthly = df_temp.groupby('year_month')[sales_col].sum().reset_index()
-            sales_monthly = sales_monthly.sort_values('year_month')
-            
-            # Convert to numeric for forecasting (months since start)
-            sales_monthly['month_num'] = range(len(sales_monthly))
+            # Aggregate by year-month and by year
+            monthly, yearly = _monthly_sales(df, date_col, sales_col)
             
-            if len(sales_monthly) >= 3:  # Need at least 3 months
-                X = sales_monthly[['month_num']].values
-                y = sales_monthly[sales_col].values
+            if len(monthly) >= 3:  # Need at least 3 months
+                # Months in order, numbered from the first (months since start)
+                y = monthly.to_numpy(dtype=np.float64)
                 
-                model = LinearRegression()
-                model.fit(X, y)
+                # Forecast the next 24 months (2 years ahead)
+                model = monthly_model.fit(y[None, :])
+                forecast_monthly = np.maximum(model.predict(24)[0], 0)
                 
-                # Forecast next 12 months (1 year ahead)
-                last_month_num = sales_monthly['month_num'].max()
-                future_months = np.array([last_month_num + i + 1 for i in range(12)]).reshape(-1, 1)
-                forecast_monthly = model.predict(future_months)
-                forecast_monthly = np.maximum(forecast_monthly, 0)
-                
-                # Aggregate to yearly forecast
-                forecast_yearly_sum = forecast_monthly.sum()
-                # Estimate next year as average of forecasted months * 12
-                forecast_next_year = forecast_monthly.mean() * 12
-                # Estimate year after as trend continuation
-                forecast_year_after = forecast_next_year * 1.1  # Assume 10% growth
+                # Estimate each year as the average of its forecasted months * 12
+                forecast_next_year = forecast_monthly[:12].mean() * 12
+                forecast_year_after = forecast_monthly[12:].mean() * 12
                 
                 # Create yearly summary for display
-                max_year = int(df_temp['date_parsed'].dt.year.max())
-                sales_yearly = df_temp.groupby(df_temp['date_parsed'].dt.year)[sales_col].sum().reset_index()
+                max_year = int(yearly.index.max())
+                sales_yearly = yearly.reset_index()
                 sales_yearly.columns = ['year', 'sales']
                 
                 future_years = np.array([max_year + 1, max_year + 2])
@@ -179,6 +366,8 @@ def forecast_sales(df):
     X = sales_yearly[['year']].values
     y = sales_yearly['sales'].values
     
+    from sklearn.linear_model import LinearRegression
+    
     model = LinearRegression()
     model.fit(X, y)
     
@@ -0,0 +1,305 @@
+"""
+Out-of-core training of the price model for datasets larger than memory.
+
+The data is streamed in chunks (from the CSV or its Parquet snapshot) three
+times:
+
+1. The feature encoder is fitted: categories are collected from every row
+   and the numeric medians are taken from a bounded random sample.
+2. Each row is assigned to training or holdout, and the training rows are
+   encoded chunk by chunk. With strategy="shards" they are cut into
+   consecutive shards of at most shard_rows rows. Each shard gets its own
+   forest, and the per-shard forests are merged into one
+   RandomForestRegressor. With strategy="reservoir" a uniform sample of
+   sample_rows training rows is kept and one forest is fitted on it.
+3. The RMSE is accumulated over the holdout rows chunk by chunk.
+
+Peak memory is bounded by the chunk size and by shard_rows or sample_rows,
+not by the number of rows. The trees are bounded too: with more shards
+than trees, the training rows are subsampled so that every tree still sees
+one shard's worth of rows.
+
+Usage: python -m src.out_of_core --data data/train.csv [--strategy shards] [--shard-rows 200000]
+                                 [--chunksize 100000] [--save models/price-out-of-core.joblib]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import iter_data, preprocess_chunks
+from .metrics import stage
+from .model import price_feature_frame, resolve_price_columns
+from .streaming import iter_row_chunks
+
+STRATEGIES = ('shards', 'reservoir')
+# Rows sampled to estimate the numeric medians the encoder fills missing values with
+ENCODER_SAMPLE_ROWS = 100_000
+
+
+def _chunk_source(source, chunksize, use_snapshot=True):
+    """A function returning a fresh iterator of preprocessed chunks"""
+    if callable(source):
+        return source
+    if isinstance(source, pd.DataFrame):
+        return lambda: iter_row_chunks(source, chunksize)
+    return lambda: preprocess_chunks(iter_data(source, chunksize=chunksize, use_snapshot=use_snapshot))
+
+
+def _price_rows(chunk, categorical_features):
+    """Feature frame and price of the chunk's rows with a positive price"""
+    X = price_feature_frame(chunk, categorical_features)
+    y = chunk[resolve_price_columns(chunk)['price']].to_numpy(dtype='float64', na_value=np.nan)
+    # Unlike train_price_model, missing prices are dropped rather than filled
+    # with a median, which would need the whole column
+    valid = y > 0
+    return X[valid], y[valid]
+
+
+class _HoldoutSplit:
+    """Assigns rows to the holdout with probability test_size, identically on every pass"""
+
+    def __init__(self, test_size, random_state):
+        self.test_size = test_size
+        self.rng = np.random.RandomState(random_state)
+
+    def __call__(self, n):
+        return self.rng.random_sample(n) < self.test_size
+
+
+class _Reservoir:
+    """Uniform sample of at most size rows from a stream of row blocks (Algorithm R)"""
+
+    def __init__(self, size, random_state):
+        self.size = size
+        self.seen = 0
+        self.rows = None
+        self.targets = None
+        self.rng = np.random.RandomState(random_state)
+
+    def add(self, rows, targets=None):
+        n = len(rows)
+        if self.rows is None:
+            self.rows = np.empty((self.size,) + rows.shape[1:], dtype=rows.dtype)
+            if targets is not None:
+                self.targets = np.empty(self.size, dtype=targets.dtype)
+        # Rows that still fit go in directly
+        fill = max(0, min(self.size - self.seen, n))
+        if fill:
+            self.rows[self.seen:self.seen + fill] = rows[:fill]
+            if targets is not None:
+                self.targets[self.seen:self.seen + fill] = targets[:fill]
+        # Row number t (1-based) replaces a random slot with probability size / t
+        if n > fill:
+            t = self.seen + fill + 1 + np.arange(n - fill)
+            slots = (self.rng.random_sample(n - fill) * t).astype(np.int64)
+            keep = slots < self.size
+            # Later rows overwrite earlier ones in the same slot, as in the sequential algorithm
+            self.rows[slots[keep]] = rows[fill:][keep]
+            if targets is not None:
+                self.targets[slots[keep]] = targets[fill:][keep]
+        self.seen += n
+
+    def sample(self):
+        n = min(self.seen, self.size)
+        if self.rows is None:
+            return None, None
+        return self.rows[:n], None if self.targets is None else self.targets[:n]
+
+
+def _fit_encoder(chunks, categorical_features, encoding, test_size, random_state):
+    """First pass: the fitted encoder and the number of training and holdout rows"""
+    from .features import FeatureEncoder, PRICE_NUMERIC_FEATURES
+
+    split = _HoldoutSplit(test_size, random_state)
+    categories = {name: set() for name in categorical_features}
+    numeric = _Reservoir(ENCODER_SAMPLE_ROWS, random_state)
+    n_train = n_holdout = 0
+    for chunk in chunks:
+        X, _ = _price_rows(chunk, categorical_features)
+        holdout = split(len(X))
+        n_holdout += int(holdout.sum())
+        n_train += int(len(X) - holdout.sum())
+        # Categories come from every row, as train_price_model learns them from all valid rows
+        for name in categorical_features:
+            categories[name].update(pd.Series(X[name]).dropna().astype(str).unique())
+        numeric.add(X[PRICE_NUMERIC_FEATURES].to_numpy(dtype='float64', na_value=np.nan))
+    sample = numeric.sample()[0]
+    if sample is None:
+        sample = np.empty((0, len(PRICE_NUMERIC_FEATURES)))
+    sample_frame = pd.DataFrame(sample, columns=PRICE_NUMERIC_FEATURES)
+    for name in categorical_features:
+        sample_frame[name] = pd.Series(dtype=object)
+    encoder = FeatureEncoder(categorical_features=tuple(categorical_features), encoding=encoding)
+    return encoder.fit(sample_frame, categories=categories), n_train, n_holdout
+
+
+def _stack(blocks):
+    from scipy import sparse
+
+    if sparse.issparse(blocks[0]):
+        return sparse.vstack(blocks, format='csr')
+    return np.concatenate(blocks)
+
+
+def merge_forests(forests):
+    """One RandomForestRegressor predicting the mean of all the forests' trees"""
+    merged = forests[0]
+    merged.estimators_ = [tree for forest in forests for tree in forest.estimators_]
+    merged.n_estimators = len(merged.estimators_)
+    return merged
+
+
+def _shard_plan(n_train, n_estimators, shard_rows):
+    """(number of shards, fraction of training rows kept, trees per shard)"""
+    n_shards = max(1, -(-n_train // shard_rows))
+    keep_fraction = 1.0
+    if n_shards > n_estimators:
+        # One tree per shard, each on shard_rows rows sampled from the whole stream
+        keep_fraction = n_estimators * shard_rows / n_train
+        n_shards = n_estimators
+    base, extra = divmod(n_estimators, n_shards)
+    return n_shards, keep_fraction, [base + (i < extra) for i in range(n_shards)]
+
+
+def _train_shards(chunks, encoder, categorical_features, split, n_train, n_estimators, shard_rows,
+                  random_state, n_jobs, forest_params):
+    from sklearn.ensemble import RandomForestRegressor
+
+    n_shards, keep_fraction, trees = _shard_plan(n_train, n_estimators, shard_rows)
+    keep_rng = np.random.RandomState(random_state + 1)
+    target_rows = -(-min(n_train, n_estimators * shard_rows) // n_shards)
+    forests = []
+    blocks, targets, buffered = [], [], 0
+
+    def fit_shard(X, y, n_trees):
+        index = len(forests)
+        forest = RandomForestRegressor(n_estimators=n_trees, random_state=random_state + index,
+                                       n_jobs=n_jobs, **forest_params)
+        forests.append(forest.fit(X, y))
+
+    for chunk in chunks:
+        X, y = _price_rows(chunk, categorical_features)
+        train = ~split(len(X))
+        if keep_fraction < 1:
+            train &= keep_rng.random_sample(len(X)) < keep_fraction
+        if not train.any():
+            continue
+        blocks.append(encoder.transform(X[train]))
+        targets.append(y[train])
+        buffered += int(train.sum())
+        # The last shard takes whatever is left at the end of the stream
+        while buffered >= target_rows and len(forests) < n_shards - 1:
+            X_buffer, y_buffer = _stack(blocks), np.concatenate(targets)
+            fit_shard(X_buffer[:target_rows], y_buffer[:target_rows], trees[len(forests)])
+            blocks, targets = [X_buffer[target_rows:]], [y_buffer[target_rows:]]
+            buffered -= target_rows
+    if buffered:
+        # Sampling may leave fewer shards than planned; the last one takes their trees
+        fit_shard(_stack(blocks), np.concatenate(targets), sum(trees[len(forests):]))
+    return merge_forests(forests)
+
+
+def _train_reservoir(chunks, encoder, categorical_features, split, n_estimators, sample_rows,
+                     random_state, n_jobs, forest_params):
+    from sklearn.ensemble import RandomForestRegressor
+
+    reservoir = _Reservoir(sample_rows, random_state + 1)
+    for chunk in chunks:
+        X, y = _price_rows(chunk, categorical_features)
+        train = ~split(len(X))
+        if train.any():
+            reservoir.add(encoder.transform(X[train]), y[train])
+    X_sample, y_sample = reservoir.sample()
+    forest = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state, n_jobs=n_jobs,
+                                   **forest_params)
+    return forest.fit(X_sample, y_sample)
+
+
+def _holdout_rmse(chunks, model, categorical_features, split):
+    """Third pass: RMSE over the holdout rows, accumulated chunk by chunk"""
+    squared_error, count = 0.0, 0
+    for chunk in chunks:
+        X, y = _price_rows(chunk, categorical_features)
+        holdout = split(len(X))
+        if holdout.any():
+            errors = model.predict(X[holdout]) - y[holdout]
+            squared_error += float(np.dot(errors, errors))
+            count += int(holdout.sum())
+    return np.sqrt(squared_error / count) if count else np.nan
+
+
+def train_price_model_out_of_core(source, n_estimators=100, random_state=42, categorical_features=('brand',),
+                                  encoding='onehot', strategy='shards', shard_rows=200_000,
+                                  sample_rows=1_000_000, chunksize=100_000, test_size=0.2, n_jobs=-1,
+                                  use_snapshot=True, **forest_params):
+    """
+    Train the price model without holding the dataset in memory.
+
+    source is a dataset path (streamed with iter_data and preprocessed chunk
+    by chunk), a preprocessed DataFrame (streamed in chunksize slices), or a
+    function returning a fresh iterable of preprocessed chunks on every
+    call. Returns (model, rmse) like train_price_model: a FeatureEncoder
+    followed by a RandomForestRegressor, and the RMSE on the holdout rows.
+    """
+    from sklearn.pipeline import Pipeline
+
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}. Use one of {STRATEGIES}")
+    make_chunks = _chunk_source(source, chunksize, use_snapshot)
+    categorical_features = tuple(categorical_features)
+
+    with stage("train_price_model_out_of_core") as info:
+        encoder, n_train, n_holdout = _fit_encoder(make_chunks(), categorical_features, encoding, test_size,
+                                                   random_state)
+        info["rows"] = n_train + n_holdout
+        if strategy == 'reservoir' and encoder.sparse_output:
+            raise ValueError("The reservoir strategy needs a dense encoding: use encoding='ordinal' "
+                             "or fewer categorical features")
+        if n_train + n_holdout == 0:
+            raise ValueError("No valid data for training after preprocessing")
+        if n_train + n_holdout < 10:
+            raise ValueError(f"Insufficient data for training. Only {n_train + n_holdout} valid samples available.")
+
+        split = _HoldoutSplit(test_size, random_state)
+        if strategy == 'shards':
+            forest = _train_shards(make_chunks(), encoder, categorical_features, split, n_train, n_estimators,
+                                   shard_rows, random_state, n_jobs, forest_params)
+        else:
+            forest = _train_reservoir(make_chunks(), encoder, categorical_features, split, n_estimators,
+                                      sample_rows, random_state, n_jobs, forest_params)
+        model = Pipeline([('encoder', encoder), ('forest', forest)])
+        rmse = _holdout_rmse(make_chunks(), model, categorical_features, _HoldoutSplit(test_size, random_state))
+    return model, rmse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the price model on a dataset larger than memory")
+    parser.add_argument("--data", default="data/train.csv", help="dataset CSV")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="shards")
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--shard-rows", type=int, default=200_000, help="largest shard (shards strategy)")
+    parser.add_argument("--sample-rows", type=int, default=1_000_000, help="sample size (reservoir strategy)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows read at a time")
+    parser.add_argument("--categorical", action="append", default=None,
+                        help="categorical feature, repeatable (default: brand)")
+    parser.add_argument("--save", default=None, help="write the trained pipeline to this joblib file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    model, rmse = train_price_model_out_of_core(
+        args.data, n_estimators=args.n_estimators, categorical_features=args.categorical or ('brand',),
+        strategy=args.strategy, shard_rows=args.shard_rows, sample_rows=args.sample_rows, chunksize=args.chunksize,
+    )
+    forest = model.named_steps['forest']
+    print(f"{forest.n_estimators} trees, holdout RMSE {rmse:,.2f}, {time.perf_counter() - start:.1f} s")
+    if args.save:
+        import joblib
+        joblib.dump(model, args.save)
+        print(f"Model: {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+On-disk registry of trained price models.
+
+Each artifact is a joblib file keyed by the dataset fingerprint and the
+model hyperparameters, holding the fitted model and its PricePredictor
+together with the feature columns, brand categories and RMSE. Sessions load a matching artifact
+instead of retraining; a model is only trained when no artifact matches.
+
+Artifacts also record a digest of the rows they were trained on. When rows
+are appended to the dataset, an incremental lookup finds the newest artifact
+whose rows are a prefix of the new data and warm-starts it with the appended
+rows instead of retraining on the whole history. The row count and digest
+are also written to a small JSON sidecar, so that lookup reads no models.
+Warm-started trees never see the earlier rows, so after a few updates, or
+once a large share of the rows was appended since the last full fit, the
+model is retrained from scratch.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import joblib
+import pandas as pd
+
+from .cache import dataset_fingerprint
+from .model import (DEFAULT_PRICE_MODEL_PARAMS, PricePredictor, compare_with_full_retrain,
+                    train_price_model, update_price_model)
+
+# Bumped whenever the artifact layout changes, so stale artifacts are ignored
+ARTIFACT_VERSION = 6
+DEFAULT_REGISTRY_DIR = "models"
+# Incremental updates allowed in a row before a full retrain
+MAX_INCREMENTAL_GENERATIONS = 3
+# Largest share of the rows that may have been appended since the last full fit
+MAX_APPENDED_SHARE = 0.25
+# Artifact metadata copied to the sidecar read by find_base
+SIDECAR_FIELDS = ("version", "fingerprint", "params", "n_rows", "rows_digest", "generation", "full_fit_rows")
+
+
+def params_key(params):
+    """Stable short hash of a hyperparameter dict"""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=6).hexdigest()
+
+
+def rows_digest(df):
+    """Digest of a frame's rows in order, independent of its index"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Directory of versioned price model artifacts with an in-process cache"""
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, max_loaded=4):
+        self.root = root
+        self.max_loaded = max_loaded
+        # Artifacts loaded in this process, least recently used first
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        # One lock per key so concurrent misses train a model only once
+        self._key_locks = {}
+
+    def artifact_name(self, fingerprint, params):
+        return f"price_model-v{ARTIFACT_VERSION}-{fingerprint[:16]}-{params_key(params)}"
+
+    def artifact_path(self, fingerprint, params):
+        return os.path.join(self.root, self.artifact_name(fingerprint, params) + ".joblib")
+
+    def sidecar_path(self, fingerprint, params):
+        return os.path.join(self.root, self.artifact_name(fingerprint, params) + ".json")
+
+    def _remember(self, name, artifact):
+        with self._lock:
+            self._loaded[name] = artifact
+            self._loaded.move_to_end(name)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def load(self, fingerprint, params):
+        """Return the artifact for fingerprint and params, or None if not registered"""
+        name = self.artifact_name(fingerprint, params)
+        with self._lock:
+            artifact = self._loaded.get(name)
+            if artifact is not None:
+                self._loaded.move_to_end(name)
+                return artifact
+        path = self.artifact_path(fingerprint, params)
+        if not os.path.exists(path):
+            return None
+        try:
+            artifact = joblib.load(path)
+        except Exception:
+            # Unreadable (e.g. written by another sklearn version): retrain
+            return None
+        if artifact.get("version") != ARTIFACT_VERSION:
+            return None
+        self._remember(name, artifact)
+        return artifact
+
+    def save(self, artifact):
+        """Write an artifact and its sidecar atomically and return the artifact's path"""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.artifact_path(artifact["fingerprint"], artifact["params"])
+        sidecar_path = self.sidecar_path(artifact["fingerprint"], artifact["params"])
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        joblib.dump(artifact, path + suffix)
+        with open(sidecar_path + suffix, "w", encoding="utf-8") as f:
+            json.dump({field: artifact[field] for field in SIDECAR_FIELDS}, f, default=str)
+        # The sidecar goes last: find_base only sees artifacts that are complete
+        os.replace(path + suffix, path)
+        os.replace(sidecar_path + suffix, sidecar_path)
+        self._remember(self.artifact_name(artifact["fingerprint"], artifact["params"]), artifact)
+        return path
+
+    def _key_lock(self, name):
+        with self._lock:
+            return self._key_locks.setdefault(name, threading.Lock())
+
+    def get_or_train(self, df, fingerprint=None, incremental=False, **params):
+        """
+        Load the matching artifact, training and registering one on a miss.
+
+        With incremental=True a miss first looks for an artifact trained on a
+        prefix of df's rows and, if found, updates it with the appended rows.
+        """
+        if fingerprint is None:
+            fingerprint = dataset_fingerprint(df)
+        params = {**DEFAULT_PRICE_MODEL_PARAMS, **params}
+
+        artifact = self.load(fingerprint, params)
+        if artifact is not None:
+            return artifact
+        with self._key_lock(self.artifact_name(fingerprint, params)):
+            # Another thread may have trained it while we waited
+            artifact = self.load(fingerprint, params)
+            if artifact is not None:
+                return artifact
+            base = self.find_base(df, params) if incremental else None
+            if base is not None:
+                artifact = build_incremental_artifact(base, df, fingerprint)
+            else:
+                artifact = build_artifact(df, fingerprint, params)
+            self.save(artifact)
+            return artifact
+
+    def find_base(self, df, params):
+        """
+        The artifact for params trained on the longest proper prefix of df's
+        rows, or None. Only prefixes are considered: edited or reordered rows
+        need a full retrain, and so does a prefix whose model was already
+        updated MAX_INCREMENTAL_GENERATIONS times or that would leave more
+        than MAX_APPENDED_SHARE of df's rows unseen by its full fit.
+
+        Candidates are picked from the JSON sidecars; only the chosen model
+        is loaded.
+        """
+        suffix = f"-{params_key(params)}.json"
+        prefix = f"price_model-v{ARTIFACT_VERSION}-"
+        candidates = []
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                if not (name.startswith(prefix) and name.endswith(suffix)):
+                    continue
+                try:
+                    with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if meta.get("version") == ARTIFACT_VERSION and 0 < meta["n_rows"] < len(df):
+                    candidates.append(meta)
+        for meta in sorted(candidates, key=lambda m: m["n_rows"], reverse=True):
+            if rows_digest(df.iloc[:meta["n_rows"]]) != meta["rows_digest"]:
+                continue
+            if (meta["generation"] >= MAX_INCREMENTAL_GENERATIONS
+                    or (len(df) - meta["full_fit_rows"]) / len(df) > MAX_APPENDED_SHARE):
+                # Shorter prefixes are older updates of the same lineage: retrain fully
+                return None
+            return self.load(meta["fingerprint"], params)
+        return None
+
+    def list_artifacts(self):
+        """Names of the artifacts stored on disk"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name[:-len(".joblib")] for name in os.listdir(self.root) if name.endswith(".joblib"))
+
+
+def build_artifact(df, fingerprint, params):
+    """Train a price model and package it with the metadata needed to serve it"""
+    start = time.perf_counter()
+    model, rmse = train_price_model(df, **params)
+    predictor = PricePredictor(model)
+    return {
+        "version": ARTIFACT_VERSION,
+        "model": model,
+        "predictor": predictor,
+        "rmse": rmse,
+        "feature_columns": predictor.feature_names,
+        "brand_categories": list(predictor.encoder.categories_['brand']),
+        "params": params,
+        "fingerprint": fingerprint,
+        "n_rows": len(df),
+        "rows_digest": rows_digest(df),
+        "base_fingerprint": None,
+        # Incremental updates since the last full fit, and the rows that fit saw
+        "generation": 0,
+        "full_fit_rows": len(df),
+        "train_seconds": time.perf_counter() - start,
+        "created_at": time.time(),
+    }
+
+
+def build_incremental_artifact(base, df, fingerprint, compare=False):
+    """
+    Update base's model with the rows df appends to base's training rows.
+
+    The artifact's rmse is measured on a holdout of the appended rows. With
+    compare=True a full retrain is also scored on that holdout and reported
+    under "comparison", at the cost of training it.
+    """
+    start = time.perf_counter()
+    n_base_rows = base["n_rows"]
+    model, rmse = update_price_model(base["model"], df.iloc[n_base_rows:], n_base_rows)
+    predictor = PricePredictor(model)
+    artifact = {
+        "version": ARTIFACT_VERSION,
+        "model": model,
+        "predictor": predictor,
+        # Too few appended rows to hold any out: keep the base model's score
+        "rmse": rmse if rmse is not None else base["rmse"],
+        "feature_columns": predictor.feature_names,
+        "brand_categories": list(predictor.encoder.categories_['brand']),
+        "params": base["params"],
+        "fingerprint": fingerprint,
+        "n_rows": len(df),
+        "rows_digest": rows_digest(df),
+        "base_fingerprint": base["fingerprint"],
+        "generation": base["generation"] + 1,
+        "full_fit_rows": base["full_fit_rows"],
+        "train_seconds": time.perf_counter() - start,
+        "created_at": time.time(),
+    }
+    if compare:
+        artifact["comparison"] = compare_with_full_retrain(model, df, n_base_rows, **base["params"])
+    return artifact
+
+
+_default_registry = None
+_warmups = {}
+_warmups_lock = threading.Lock()
+
+
+def get_registry():
+    """The process-wide registry in the default directory"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = ModelRegistry()
+    return _default_registry
+
+
+def get_price_model(df, fingerprint=None, incremental=False, **params):
+    """Artifact for df and params from the default registry, trained on a miss"""
+    return get_registry().get_or_train(df, fingerprint, incremental, **params)
+
+
+def warm_registry(df, fingerprint=None, incremental=False, **params):
+    """
+    Load or train the price model in a background thread.
+
+    Only one warm-up runs per dataset fingerprint and parameter set; the
+    thread is returned so callers can wait for it if they need to.
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    key = (fingerprint, params_key({**DEFAULT_PRICE_MODEL_PARAMS, **params}))
+    with _warmups_lock:
+        thread = _warmups.get(key)
+        if thread is not None:
+            return thread
+        thread = threading.Thread(
+            target=_warm, args=(df, fingerprint, incremental, params), name="price-model-warmup", daemon=True
+        )
+        _warmups[key] = thread
+    thread.start()
+    return thread
+
+
+def _warm(df, fingerprint, incremental, params):
+    try:
+        get_price_model(df, fingerprint, incremental, **params)
+    except Exception:
+        # Warm-up is best effort; the foreground request reports real errors
+        pass
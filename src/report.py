@@ -0,0 +1,159 @@
+"""
+Static EDA report: every plot for the whole dataset and for each slice.
+
+Each (slice, plot) pair is rendered in a process pool with matplotlib's Agg
+backend. Workers load the dataset themselves, so no frames are pickled to
+them. The PNGs and an index.html listing them with their render times are
+written to the output directory.
+
+Usage: python -m src.report [--data data/train.csv] [--by Region] [--by Brand]
+                            [--out reports/eda] [--jobs N]
+"""
+
+import argparse
+import html
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Plot functions by name, as rendered for every slice
+PLOTS = ("plot_correlation", "plot_sales_by_brand", "plot_price_distribution")
+
+# Set in each worker by _init_worker
+_worker_state = {}
+
+
+def _init_worker(file_path):
+    import matplotlib
+    matplotlib.use("Agg")
+    from .cache import get_dataset
+    _worker_state["df"] = get_dataset(file_path)[0]
+
+
+def _slug(text):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_") or "slice"
+
+
+def slice_frame(df, column, value):
+    """Rows of df in a slice; column None means the whole dataset"""
+    if column is None:
+        return df
+    return df[df[column].astype(str) == value]
+
+
+def _render_task(task):
+    """Render one plot for one slice; returns a result dict instead of raising"""
+    from . import eda
+
+    column, value, plot_name, path = task
+    df = slice_frame(_worker_state["df"], column, value)
+    start = time.perf_counter()
+    try:
+        getattr(eda, plot_name)(df, save_path=path)
+        error = None
+    except Exception as e:
+        error = str(e)
+    return {
+        "column": column, "value": value, "plot": plot_name, "path": path,
+        "rows": len(df), "seconds": time.perf_counter() - start, "error": error,
+    }
+
+
+def report_tasks(df, by, out_dir):
+    """(column, value, plot, PNG path) for the whole dataset and every value of each by column"""
+    slices = [(None, "All")]
+    for column in by:
+        if column not in df.columns:
+            raise ValueError(f"Unknown slice column: {column}. Found columns: {df.columns.tolist()}")
+        values = sorted(str(value) for value in df[column].dropna().unique())
+        slices.extend((column, value) for value in values)
+    tasks = []
+    for column, value in slices:
+        directory = os.path.join(out_dir, _slug("all" if column is None else f"{column}={value}"))
+        tasks.extend((column, value, plot, os.path.join(directory, f"{plot}.png")) for plot in PLOTS)
+    return tasks
+
+
+def write_index(results, out_dir, wall_seconds, jobs):
+    """Write index.html linking every figure with its render time"""
+    render_seconds = sum(result["seconds"] for result in results)
+    lines = [
+        "<!DOCTYPE html>", "<html><head><meta charset='utf-8'><title>EVisionAI EDA report</title>",
+        "<style>body{font-family:sans-serif;margin:2em}img{max-width:32%;vertical-align:top}"
+        "figure{display:inline-block;width:32%;margin:0}figcaption{color:#555;font-size:0.9em}</style>",
+        "</head><body>", "<h1>EVisionAI EDA report</h1>",
+        f"<p>{len(results)} figures in {wall_seconds:.1f} s wall time with {jobs} worker(s); "
+        f"{render_seconds:.1f} s of rendering.</p>",
+    ]
+    current = object()
+    for result in results:
+        key = (result["column"], result["value"])
+        if key != current:
+            current = key
+            title = "All data" if result["column"] is None else f"{result['column']} = {result['value']}"
+            lines.append(f"<h2>{html.escape(title)} ({result['rows']:,} rows)</h2>")
+        caption = f"{result['plot']}: {result['seconds'] * 1000:,.0f} ms"
+        if result["error"]:
+            lines.append(f"<figure><figcaption>{html.escape(caption)} - {html.escape(result['error'])}"
+                         "</figcaption></figure>")
+        else:
+            src = os.path.relpath(result["path"], out_dir).replace(os.sep, "/")
+            lines.append(f"<figure><img src='{html.escape(src)}' alt='{html.escape(result['plot'])}'>"
+                         f"<figcaption>{html.escape(caption)}</figcaption></figure>")
+    lines.append("</body></html>")
+    path = os.path.join(out_dir, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+def generate_report(file_path="data/train.csv", by=("Region",), out_dir=os.path.join("reports", "eda"), jobs=None):
+    """
+    Render the EDA report and return (results, index path, wall seconds).
+
+    results holds one dict per figure with its slice, row count, PNG path,
+    render seconds and error (None on success), in report order.
+    """
+    from .cache import get_dataset
+
+    start = time.perf_counter()
+    df = get_dataset(file_path)[0]
+    tasks = report_tasks(df, by, out_dir)
+    for directory in {os.path.dirname(task[3]) for task in tasks}:
+        os.makedirs(directory, exist_ok=True)
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tasks)))
+    if jobs == 1:
+        _init_worker(file_path)
+        results = [_render_task(task) for task in tasks]
+    else:
+        # Slow plots first, so the pool is not left waiting on a straggler
+        order = sorted(range(len(tasks)), key=lambda i: tasks[i][2] != "plot_correlation")
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(file_path,)) as pool:
+            rendered = dict(zip(order, pool.map(_render_task, [tasks[i] for i in order])))
+        results = [rendered[i] for i in range(len(tasks))]
+    wall_seconds = time.perf_counter() - start
+    return results, write_index(results, out_dir, wall_seconds, jobs), wall_seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the EDA plots per slice into a static HTML report")
+    parser.add_argument("--data", default="data/train.csv", help="dataset CSV")
+    parser.add_argument("--by", action="append", help="column to slice by, repeatable (default: Region)")
+    parser.add_argument("--out", default=os.path.join("reports", "eda"), help="output directory")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    results, index_path, wall_seconds = generate_report(args.data, args.by or ["Region"], args.out, args.jobs)
+    for result in sorted(results, key=lambda r: r["seconds"], reverse=True):
+        label = "all" if result["column"] is None else f"{result['column']}={result['value']}"
+        status = f"  ERROR: {result['error']}" if result["error"] else ""
+        print(f"{result['seconds'] * 1000:8.0f} ms  {label:<30} {result['plot']}{status}")
+    render_seconds = sum(result["seconds"] for result in results)
+    print(f"{len(results)} figures, {render_seconds:.1f} s rendering, {wall_seconds:.1f} s wall time")
+    print(f"Report: {index_path}")
+
+
+if __name__ == "__main__":
+    main()
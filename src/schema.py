@@ -0,0 +1,106 @@
+"""
+Declared schema for the train.csv layout.
+
+The schema drives pd.read_csv (encoding, dtypes, column projection) so string
+columns never materialise as Python objects, and converts the remaining
+columns to compact types after parsing.
+"""
+
+import hashlib
+
+import pandas as pd
+
+ENCODING = "utf-8-sig"  # train.csv starts with a UTF-8 BOM
+
+DATE_COLUMN = "Date"
+DATE_FORMAT = "%Y-%m"
+
+CATEGORICAL_COLUMNS = ["Region", "Brand", "Model", "Vehicle_Type", "Customer_Segment"]
+BOOLEAN_COLUMNS = {"Fast_Charging_Option": {"Yes": True, "No": False}}
+INTEGER_COLUMNS = ["Units_Sold", "Revenue", "Battery_Capacity_kWh", "Discount_Percentage"]
+
+COLUMNS = [
+    DATE_COLUMN, "Region", "Brand", "Model", "Vehicle_Type", "Battery_Capacity_kWh",
+    "Discount_Percentage", "Customer_Segment", "Fast_Charging_Option", "Units_Sold", "Revenue",
+]
+
+
+def schema_digest():
+    """
+    Short hash of the declared schema, so data derived from it (e.g. Parquet
+    snapshots) can tell when the declarations changed
+    """
+    declaration = [COLUMNS, DATE_COLUMN, DATE_FORMAT, CATEGORICAL_COLUMNS,
+                   sorted(BOOLEAN_COLUMNS.items()), INTEGER_COLUMNS]
+    return hashlib.blake2b(repr(declaration).encode(), digest_size=8).hexdigest()
+
+
+def read_csv_kwargs(columns=None):
+    """
+    Keyword arguments for pd.read_csv implementing the schema.
+
+    Columns missing from the file are ignored so other CSV layouts still load.
+    """
+    # Date and flags are read as categoricals so only distinct values are converted later
+    dtype = {col: "category" for col in CATEGORICAL_COLUMNS + list(BOOLEAN_COLUMNS) + [DATE_COLUMN]}
+    kwargs = {"encoding": ENCODING, "dtype": dtype}
+    if columns is not None:
+        wanted = set(columns)
+        kwargs["usecols"] = lambda col: col in wanted
+    return kwargs
+
+
+def parse_month_column(values):
+    """
+    Convert a column of "YYYY-MM" strings to a monthly period column.
+
+    Only the distinct values are parsed. The column is returned unchanged if
+    any non-missing value does not match the format.
+    """
+    if isinstance(values.dtype, pd.PeriodDtype):
+        return values
+    categorical = values.astype("category")
+    categories = categorical.cat.categories
+    parsed = pd.to_datetime(categories.astype(str), format=DATE_FORMAT, errors="coerce")
+    if parsed.isna().any():
+        return values
+    periods = parsed.to_period("M")
+    codes = categorical.cat.codes.to_numpy()
+    result = periods.take(codes, allow_fill=True, fill_value=pd.NaT)
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def apply_schema(df):
+    """
+    Convert train.csv columns to their declared types: monthly periods for Date,
+    categoricals for low-cardinality strings, bool for Yes/No flags and the
+    smallest integer type that fits the counts
+    """
+    if DATE_COLUMN in df.columns:
+        df[DATE_COLUMN] = parse_month_column(df[DATE_COLUMN])
+
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and df[col].dtype != "category":
+            df[col] = df[col].astype("category")
+
+    for col, mapping in BOOLEAN_COLUMNS.items():
+        if col in df.columns and df[col].dtype != bool:
+            values = df[col].map(mapping)
+            # Only convert when every value is a recognised flag
+            if values.notna().all():
+                df[col] = values.astype(bool)
+
+    for col in INTEGER_COLUMNS:
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]) and df[col].notna().all():
+            values = df[col]
+            if (values == values.round()).all():
+                df[col] = pd.to_numeric(values.astype("int64"), downcast="integer")
+
+    return df
+
+
+def read_csv(file_path, columns=None, **kwargs):
+    """Read a CSV file using the schema and return the typed DataFrame"""
+    df = pd.read_csv(file_path, **read_csv_kwargs(columns), **kwargs)
+    return apply_schema(df)
+
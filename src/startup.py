@@ -0,0 +1,112 @@
+"""
+Cold-start tooling: an import-time profile and a background warm-up.
+
+start_warmup loads the dataset, the price model and the heavy plotting and
+modelling libraries in a background thread, so the first page is served
+while they load and the other tabs find them ready. import_profile measures
+what importing the dashboard's modules costs, broken down by package.
+
+Usage: python -m src.startup [module ...]
+"""
+
+import importlib
+import re
+import subprocess
+import sys
+import threading
+import time
+
+# Modules app.py imports at startup
+APP_MODULES = (
+    "src.cache", "src.eda", "src.model", "src.forecasting", "src.registry",
+    "src.chatbot", "src.figures", "src.interactive", "src.metrics",
+)
+# Libraries the EDA and price tabs import on first use
+HEAVY_MODULES = ("sklearn.ensemble", "matplotlib.figure", "seaborn", "plotly.graph_objects")
+
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+_warmup_status = {}
+
+
+def import_profile(modules=APP_MODULES):
+    """
+    Import modules in a fresh interpreter with -X importtime.
+
+    Returns a list of (module, self seconds, cumulative seconds) for the
+    top-level imports, slowest first, and the total seconds.
+    """
+    def top_level_imports(code):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            match = _IMPORT_TIME_LINE.match(line)
+            # One space of indent marks a top-level (not nested) import
+            if match and len(match.group(3)) == 1:
+                yield match.group(4), int(match.group(1)) / 1e6, int(match.group(2)) / 1e6
+
+    # Modules every interpreter imports at startup are not part of the profile
+    bootstrap = {name for name, _, _ in top_level_imports("pass")}
+    code = "; ".join(f"import {module}" for module in modules)
+    rows = [row for row in top_level_imports(code) if row[0] not in bootstrap]
+    total = sum(cumulative for _, _, cumulative in rows)
+    return sorted(rows, key=lambda row: row[2], reverse=True), total
+
+
+def _warm(file_path, modules):
+    from .cache import get_dataset
+    from .registry import warm_registry
+
+    start = time.perf_counter()
+    try:
+        df, fingerprint = get_dataset(file_path)
+        _warmup_status["dataset_seconds"] = time.perf_counter() - start
+        # Loads (or trains) the model in its own thread
+        warm_registry(df, fingerprint, incremental=True)
+    except Exception as e:
+        # Best effort; the page reports loading errors itself
+        _warmup_status["error"] = str(e)
+    for module in modules:
+        module_start = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        _warmup_status.setdefault("imports", {})[module] = time.perf_counter() - module_start
+    _warmup_status["seconds"] = time.perf_counter() - start
+
+
+def start_warmup(file_path="data/train.csv", modules=HEAVY_MODULES):
+    """
+    Start the background warm-up once per process and return its thread.
+
+    The thread loads the dataset into the cache, starts the price model
+    warm-up and imports the heavy modules.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm, args=(file_path, modules),
+                                              name="startup-warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def warmup_status():
+    """Timings recorded by the warm-up so far"""
+    return dict(_warmup_status)
+
+
+def main(argv=None):
+    modules = (argv if argv is not None else sys.argv[1:]) or APP_MODULES + HEAVY_MODULES
+    rows, total = import_profile(modules)
+    print(f"{'module':<32} {'self ms':>9} {'cumulative ms':>14}")
+    for module, self_seconds, cumulative in rows:
+        print(f"{module:<32} {self_seconds * 1000:9.1f} {cumulative * 1000:14.1f}")
+    print(f"{'total':<32} {'':>9} {total * 1000:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
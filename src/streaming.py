@@ -0,0 +1,311 @@
+"""
+Streaming aggregation for sales exports larger than memory.
+
+Chunks from data_loader.iter_data are preprocessed one at a time and folded
+into the aggregates the dashboard uses, so peak memory is bounded by the
+chunk size and the number of groups rather than by the file size.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import iter_data, preprocess_chunks
+from .metrics import stage
+from .schema import parse_month_column
+
+# Rows per chunk when accumulating statistics over an in-memory frame
+STATS_CHUNK_ROWS = 1_000_000
+# Prices fed to the KDE by price_histogram
+KDE_SAMPLE_SIZE = 100_000
+
+
+class Moments:
+    """Running count, sum, sum of squares, min and max of a numeric column"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.total += values.sum()
+        self.total_sq += np.dot(values, values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.total_sq += other.total_sq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1), matching pandas"""
+        if self.count < 2:
+            return np.nan
+        variance = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return np.sqrt(max(variance, 0.0))
+
+
+class CorrelationAccumulator:
+    """
+    Pairwise sufficient statistics (counts, sums, squares and cross-products)
+    for the Pearson correlation of several columns, accumulated chunk-wise.
+
+    Only rows where both values of a pair are finite contribute to that pair,
+    matching DataFrame.corr. Values are shifted by the first chunk's means to
+    limit cancellation in the sums of squares.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.shift = None
+        self.n = np.zeros((k, k))
+        self.sum_x = np.zeros((k, k))
+        self.sum_xx = np.zeros((k, k))
+        self.sum_xy = np.zeros((k, k))
+
+    def update(self, chunk):
+        values = chunk[self.columns].to_numpy(dtype='float64')
+        mask = np.isfinite(values)
+        if self.shift is None:
+            with np.errstate(invalid='ignore'):
+                counts = mask.sum(axis=0)
+                sums = np.where(mask, values, 0.0).sum(axis=0)
+                self.shift = np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+        centered = np.where(mask, values - self.shift, 0.0)
+        weights = mask.astype('float64')
+        self.n += weights.T @ weights
+        # sum_x[i, j]: sum of column i over rows where columns i and j are both present
+        self.sum_x += centered.T @ weights
+        self.sum_xx += (centered * centered).T @ weights
+        self.sum_xy += centered.T @ centered
+        return self
+
+    def merge(self, other):
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        delta = other.shift - self.shift
+        # Re-express the other accumulator's sums around this shift
+        sum_x = other.sum_x + delta[:, None] * other.n
+        self.sum_xx += other.sum_xx + 2 * delta[:, None] * other.sum_x + (delta ** 2)[:, None] * other.n
+        self.sum_xy += (other.sum_xy + delta[:, None] * other.sum_x.T + other.sum_x * delta[None, :]
+                        + np.outer(delta, delta) * other.n)
+        self.sum_x += sum_x
+        self.n += other.n
+        return self
+
+    def correlation(self):
+        """Correlation matrix as a DataFrame, NaN where undefined"""
+        n = self.n
+        sum_y = self.sum_x.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = n * self.sum_xy - self.sum_x * sum_y
+            var_x = n * self.sum_xx - self.sum_x ** 2
+            var_y = var_x.T
+            corr = covariance / np.sqrt(var_x * var_y)
+        corr[(n < 2) | (var_x <= 0) | (var_y <= 0)] = np.nan
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(np.diag(var_x) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+def iter_row_chunks(values, chunk_rows=STATS_CHUNK_ROWS):
+    """Consecutive row slices of an array or frame"""
+    for start in range(0, len(values), chunk_rows):
+        yield values[start:start + chunk_rows]
+
+
+def chunked_correlation(numeric_df, chunk_rows=STATS_CHUNK_ROWS):
+    """
+    Correlations of the columns with variance, from sufficient statistics
+    accumulated chunk by chunk rather than from the whole frame at once
+    """
+    accumulator = CorrelationAccumulator(numeric_df.columns)
+    for chunk in iter_row_chunks(numeric_df, chunk_rows):
+        accumulator.update(chunk)
+    corr = accumulator.correlation()
+    # A defined self-correlation means the column has variance (std > 0)
+    varying = np.isfinite(np.diag(corr.to_numpy()))
+    return corr.loc[varying, varying]
+
+
+def price_histogram(prices, bins=30, kde_sample=KDE_SAMPLE_SIZE, chunk_rows=STATS_CHUNK_ROWS):
+    """
+    Histogram (counts, edges) of the positive prices within 3 standard
+    deviations of their mean, with a deterministic sample of at most about
+    kde_sample of those prices for a KDE. Each pass over prices runs chunk by
+    chunk.
+    """
+    moments = Moments()
+    for chunk in iter_row_chunks(prices, chunk_rows):
+        moments.update(chunk[chunk > 0])
+    if moments.count == 0:
+        raise ValueError("No valid price data found")
+
+    # Remove extreme outliers (beyond 3 standard deviations)
+    low, high = -np.inf, np.inf
+    if moments.std > 0:
+        low, high = moments.mean - 3 * moments.std, moments.mean + 3 * moments.std
+    kept = Moments()
+    for chunk in iter_row_chunks(prices, chunk_rows):
+        kept.update(chunk[(chunk > 0) & (chunk >= low) & (chunk <= high)])
+    if kept.count == 0:
+        raise ValueError("No valid price data after outlier removal")
+
+    edges = np.histogram_bin_edges([kept.min, kept.max], bins=bins, range=(kept.min, kept.max))
+    counts = np.zeros(bins, dtype=np.int64)
+    # Every kept price has the same chance of being sampled, independent of chunking
+    rng = np.random.RandomState(0)
+    sample_rate = min(1.0, kde_sample / kept.count)
+    sample = []
+    for chunk in iter_row_chunks(prices, chunk_rows):
+        chunk = chunk[(chunk > 0) & (chunk >= low) & (chunk <= high)]
+        counts += np.histogram(chunk, bins=edges)[0]
+        sample.append(chunk[rng.random_sample(len(chunk)) < sample_rate])
+    return counts, edges, np.concatenate(sample)
+
+
+def kde_curve(counts, edges, sample, gridsize=200):
+    """
+    (x, y) of a KDE fitted to sample and scaled to the histogram's counts
+    per bin, as seaborn's histplot draws it: Scott bandwidth, no extension
+    past the histogram range
+    """
+    from scipy.stats import gaussian_kde
+
+    grid = np.linspace(edges[0], edges[-1], gridsize)
+    density = gaussian_kde(sample, bw_method='scott')(grid)
+    return grid, density * counts.sum() * (edges[1] - edges[0])
+
+
+def _first_column(df, names):
+    for name in names:
+        if name in df.columns:
+            return name
+    return None
+
+
+def _add_counts(total, chunk_sums):
+    if total is None:
+        return chunk_sums
+    combined = total.add(chunk_sums, fill_value=0)
+    # Index alignment goes through float; keep integer unit counts integral
+    if pd.api.types.is_integer_dtype(total) and pd.api.types.is_integer_dtype(chunk_sums):
+        combined = combined.astype('int64')
+    return combined
+
+
+class SalesAggregates:
+    """
+    Dashboard aggregates folded from preprocessed chunks: sales by brand,
+    model and year-month, price sums and counts, battery/price moments
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self._by_brand = None
+        self._by_model = None
+        self._by_month = None
+        self.price = Moments()
+        self.battery = Moments()
+        self._battery_price = CorrelationAccumulator(['battery_kwh', 'price'])
+
+    def update(self, chunk):
+        """Fold one preprocessed chunk into the aggregates"""
+        self.rows += len(chunk)
+        sales_col = _first_column(chunk, ['sales', 'Units_Sold'])
+        brand_col = _first_column(chunk, ['brand', 'Brand'])
+        model_col = _first_column(chunk, ['Model', 'model'])
+
+        if sales_col is not None:
+            sales = chunk[sales_col]
+            if brand_col is not None:
+                by_brand = sales.groupby(chunk[brand_col].astype(object), sort=False).sum()
+                self._by_brand = _add_counts(self._by_brand, by_brand)
+            if model_col is not None:
+                by_model = sales.groupby(chunk[model_col].astype(object), sort=False).sum()
+                self._by_model = _add_counts(self._by_model, by_model)
+            if 'Date' in chunk.columns:
+                months = parse_month_column(chunk['Date'])
+                by_month = sales.groupby(months, sort=False).sum()
+                self._by_month = _add_counts(self._by_month, by_month)
+
+        if 'price' in chunk.columns:
+            self.price.update(chunk['price'])
+        if 'battery_kwh' in chunk.columns:
+            self.battery.update(chunk['battery_kwh'])
+        if 'price' in chunk.columns and 'battery_kwh' in chunk.columns:
+            self._battery_price.update(chunk)
+        return self
+
+    @staticmethod
+    def _sorted(series, by_value=True):
+        if series is None:
+            return pd.Series(dtype='float64')
+        return series.sort_values(ascending=False) if by_value else series.sort_index()
+
+    @property
+    def sales_by_brand(self):
+        return self._sorted(self._by_brand)
+
+    @property
+    def sales_by_model(self):
+        return self._sorted(self._by_model)
+
+    @property
+    def sales_by_month(self):
+        return self._sorted(self._by_month, by_value=False)
+
+    @property
+    def price_sum(self):
+        return self.price.total
+
+    @property
+    def price_count(self):
+        return self.price.count
+
+    @property
+    def average_price(self):
+        return self.price.mean
+
+    @property
+    def battery_price_correlation(self):
+        """Pearson correlation of battery_kwh and price over rows with both values"""
+        return self._battery_price.correlation().iloc[0, 1]
+
+
+def aggregate_chunks(chunks):
+    """Fold an iterable of preprocessed chunks into SalesAggregates"""
+    aggregates = SalesAggregates()
+    for chunk in chunks:
+        aggregates.update(chunk)
+    return aggregates
+
+
+def aggregate_stream(file_path="data/train.csv", chunksize=100_000, use_snapshot=True):
+    """
+    Stream file_path in chunks through preprocessing into SalesAggregates
+    """
+    # One stage for the whole load -> preprocess -> fold, not one per chunk
+    with stage("aggregate_stream") as info:
+        chunks = iter_data(file_path, chunksize=chunksize, use_snapshot=use_snapshot)
+        aggregates = aggregate_chunks(preprocess_chunks(chunks))
+        info["rows"] = aggregates.rows
+    return aggregates
@@ -0,0 +1,149 @@
+"""
+Deterministic synthetic EV sales data in the train.csv layout.
+
+The vocabularies and value ranges follow data/train.csv: 6 regions, 9
+brands, 17 models, monthly dates, battery sizes of 40-100 kWh, discounts of
+0-20 %, and Units_Sold and Revenue with a yearly growth trend, seasonality
+and a per-brand price level. Rows are generated in chunks, each from its own
+seeded generator, so the same seed and chunk size always give the same data
+and any size up to hundreds of millions of rows can be written without
+holding it in memory.
+
+Usage: python -m src.synthetic --rows 1000000 [--seed 0] [--out data/synthetic.csv]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from . import schema
+
+REGIONS = ["Africa", "Asia", "Europe", "North America", "Oceania", "South America"]
+BRANDS = ["BMW", "BYD", "Ford", "Hyundai", "Kia", "Nissan", "Tesla", "Toyota", "Volkswagen"]
+MODELS = [
+    "Ariya", "Atto 3", "Corolla EV", "Elantra EV", "Han EV", "ID.3", "ID.4", "ID.5", "Leaf",
+    "Mach-E", "Model 3", "Model S", "Model Y", "Rio EV", "Tucson EV", "i4", "iX",
+]
+VEHICLE_TYPES = ["Coupe", "Crossover", "Hatchback", "SUV", "Sedan", "Truck"]
+CUSTOMER_SEGMENTS = ["Budget Conscious", "Eco-Conscious", "High Income", "Middle Income", "Tech Enthusiast"]
+
+# Rows generated per chunk; the data depends on it, so it is part of the seed
+CHUNK_ROWS = 1_000_000
+
+
+def _names(base, count, prefix):
+    # The real names first, then numbered ones for higher cardinalities
+    if count is None:
+        return list(base)
+    return list(base[:count]) + [f"{prefix} {i}" for i in range(len(base) + 1, count + 1)]
+
+
+def _popularity(count):
+    # Mildly skewed: the most popular value is sold about twice as often as the least
+    weights = 1 / (1 + np.arange(count) / max(count - 1, 1))
+    return weights / weights.sum()
+
+
+class SyntheticSales:
+    """
+    Generator of train.csv-shaped rows.
+
+    brands and models set the number of distinct values (the real names
+    are used first); months is the length of the monthly Date range starting
+    at start. growth is the yearly growth of Units_Sold.
+    """
+
+    def __init__(self, seed=0, start="2021-01", months=36, brands=None, models=None, growth=0.15,
+                 chunk_rows=CHUNK_ROWS):
+        self.seed = seed
+        self.chunk_rows = chunk_rows
+        self.growth = growth
+        self.dates = [str(period) for period in pd.period_range(start, periods=months, freq="M")]
+        self.brands = _names(BRANDS, brands, "Brand")
+        self.models = _names(MODELS, models, "Model")
+        rng = np.random.default_rng([seed, 2**32 - 1])
+        # Fixed per brand: premium brands sell at a higher price per kWh
+        self.brand_price_factor = rng.uniform(0.85, 1.25, len(self.brands))
+        self._month_of_year = np.array([int(date[5:7]) for date in self.dates])
+
+    def _categorical(self, rng, n, categories, p=None):
+        codes = rng.choice(len(categories), size=n, p=p).astype(np.int32)
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    def chunk(self, index, rows):
+        """Raw rows of chunk index, as read from the CSV before the schema is applied"""
+        rng = np.random.default_rng([self.seed, index])
+        month = rng.integers(0, len(self.dates), rows)
+        brand = rng.choice(len(self.brands), size=rows, p=_popularity(len(self.brands)))
+        battery = rng.integers(40, 101, rows)
+        discount = rng.integers(0, 21, rows)
+
+        season = 1 + 0.1 * np.sin(2 * np.pi * (self._month_of_year[month] - 3) / 12)
+        trend = (1 + self.growth) ** (month / 12)
+        units = np.rint(rng.uniform(50, 400, rows) * trend * season).astype(np.int64)
+        unit_price = ((8000 + 200 * battery) * self.brand_price_factor[brand] * (1 - discount / 100)
+                      * rng.lognormal(0, 0.05, rows))
+        revenue = np.rint(units * unit_price).astype(np.int64)
+
+        return pd.DataFrame({
+            "Date": pd.Categorical.from_codes(month.astype(np.int32), categories=self.dates),
+            "Region": self._categorical(rng, rows, REGIONS),
+            "Brand": pd.Categorical.from_codes(brand.astype(np.int32), categories=self.brands),
+            "Model": self._categorical(rng, rows, self.models, _popularity(len(self.models))),
+            "Vehicle_Type": self._categorical(rng, rows, VEHICLE_TYPES),
+            "Battery_Capacity_kWh": battery,
+            "Discount_Percentage": discount,
+            "Customer_Segment": self._categorical(rng, rows, CUSTOMER_SEGMENTS),
+            "Fast_Charging_Option": self._categorical(rng, rows, ["No", "Yes"], [0.4, 0.6]),
+            "Units_Sold": units,
+            "Revenue": revenue,
+        }, columns=schema.COLUMNS)
+
+    def iter_chunks(self, rows):
+        """Yield the raw rows in chunks of at most chunk_rows"""
+        for index, offset in enumerate(range(0, rows, self.chunk_rows)):
+            yield self.chunk(index, min(self.chunk_rows, rows - offset))
+
+
+def synthetic_frame(rows, seed=0, **options):
+    """
+    rows synthetic rows typed like load_data's result.
+
+    options are passed to SyntheticSales.
+    """
+    generator = SyntheticSales(seed, **options)
+    chunks = list(generator.iter_chunks(rows))
+    if len(chunks) == 1:
+        df = chunks[0]
+    else:
+        # Every chunk has the same categories, so the codes concatenate as-is
+        df = pd.concat(chunks, ignore_index=True)
+    return schema.apply_schema(df)
+
+
+def write_synthetic_csv(path, rows, seed=0, **options):
+    """Write rows synthetic rows to a CSV in the train.csv format, one chunk at a time"""
+    generator = SyntheticSales(seed, **options)
+    with open(path, "w", encoding=schema.ENCODING, newline="") as f:
+        for index, chunk in enumerate(generator.iter_chunks(rows)):
+            chunk.to_csv(f, header=index == 0, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic EV sales CSV")
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--months", type=int, default=36, help="length of the monthly Date range")
+    parser.add_argument("--brands", type=int, default=None, help="distinct brands (default: as train.csv)")
+    parser.add_argument("--models", type=int, default=None, help="distinct models (default: as train.csv)")
+    parser.add_argument("--out", default="data/synthetic.csv")
+    args = parser.parse_args(argv)
+
+    write_synthetic_csv(args.out, args.rows, args.seed, months=args.months, brands=args.brands, models=args.models)
+    print(f"Wrote {args.rows:,} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Hyperparameter search with k-fold cross-validation for the price model.
+
+The features are encoded once and written to a temporary directory; worker
+processes memory-map that single copy instead of receiving the matrix
+pickled with every task. Each (candidate, fold) pair is one task in a
+process pool, and each forest gets an equal share of the CPUs so the pool
+and the forests' own threads do not oversubscribe the machine. The results
+table and the best model are written to the model registry.
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold, ParameterGrid, ParameterSampler
+
+from .cache import dataset_fingerprint
+from .features import FeatureEncoder
+from .model import DEFAULT_PRICE_MODEL_PARAMS, _valid_price_rows
+from .registry import get_registry, params_key
+
+DEFAULT_PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [None, 10, 20],
+    'min_samples_leaf': [1, 2, 4],
+    'max_features': [1.0, 'sqrt'],
+}
+
+# Set in each worker by _init_worker
+_worker_state = {}
+
+
+def _save_features(directory, X, y):
+    """Write the encoded matrix and target as .npy files for memory-mapping"""
+    if sparse.issparse(X):
+        X = X.tocsr()
+        parts = {'data': X.data, 'indices': X.indices, 'indptr': X.indptr}
+        np.save(os.path.join(directory, 'shape.npy'), np.asarray(X.shape))
+    else:
+        parts = {'X': np.ascontiguousarray(X)}
+    parts['y'] = y
+    for name, values in parts.items():
+        np.save(os.path.join(directory, f'{name}.npy'), values)
+
+
+def _load_features(directory):
+    def load(name):
+        return np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+
+    if os.path.exists(os.path.join(directory, 'shape.npy')):
+        X = sparse.csr_matrix((load('data'), load('indices'), load('indptr')),
+                              shape=tuple(np.load(os.path.join(directory, 'shape.npy'))))
+    else:
+        X = load('X')
+    return X, load('y')
+
+
+def _init_worker(directory, cv, inner_jobs):
+    X, y = _load_features(directory)
+    folds = list(KFold(n_splits=cv, shuffle=True, random_state=42).split(np.arange(len(y))))
+    _worker_state.update(X=X, y=y, folds=folds, inner_jobs=inner_jobs)
+
+
+def _fit_fold(task):
+    """Fit one candidate on one fold and return (candidate, fold, rmse, seconds)"""
+    candidate, params, fold = task
+    X, y = _worker_state['X'], _worker_state['y']
+    train_idx, test_idx = _worker_state['folds'][fold]
+    start = time.perf_counter()
+    forest = RandomForestRegressor(**{**DEFAULT_PRICE_MODEL_PARAMS, **params},
+                                   n_jobs=_worker_state['inner_jobs'])
+    forest.fit(X[train_idx], y[train_idx])
+    rmse = np.sqrt(mean_squared_error(y[test_idx], forest.predict(X[test_idx])))
+    return candidate, fold, rmse, time.perf_counter() - start
+
+
+def split_jobs(n_tasks, n_jobs=None):
+    """
+    Split n_jobs CPUs (all by default) into (pool processes, threads per
+    forest): as many processes as there are tasks to run, and the CPUs left
+    over shared among their forests.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    outer = max(1, min(n_jobs, n_tasks))
+    return outer, max(1, n_jobs // outer)
+
+
+def candidate_params(param_grid=None, n_iter=None, random_state=42):
+    """Every combination of param_grid, or n_iter sampled ones (random search)"""
+    param_grid = DEFAULT_PARAM_GRID if param_grid is None else param_grid
+    if n_iter is None:
+        return list(ParameterGrid(param_grid))
+    return list(ParameterSampler(param_grid, n_iter=n_iter, random_state=random_state))
+
+
+def cross_validate_params(X, y, candidates, cv=5, n_jobs=None):
+    """
+    Cross-validated RMSE of each candidate parameter dict on encoded X and y.
+
+    Returns a DataFrame with one row per candidate, best first.
+    """
+    tasks = [(i, params, fold) for i, params in enumerate(candidates) for fold in range(cv)]
+    outer, inner = split_jobs(len(tasks), n_jobs)
+
+    with tempfile.TemporaryDirectory(prefix='price-tuning-') as directory:
+        _save_features(directory, X, y)
+        if outer == 1:
+            _init_worker(directory, cv, inner)
+            results = [_fit_fold(task) for task in tasks]
+            _worker_state.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=outer, initializer=_init_worker,
+                                     initargs=(directory, cv, inner)) as pool:
+                results = list(pool.map(_fit_fold, tasks))
+
+    scores = np.full((len(candidates), cv), np.nan)
+    seconds = np.zeros(len(candidates))
+    for candidate, fold, rmse, elapsed in results:
+        scores[candidate, fold] = rmse
+        seconds[candidate] += elapsed
+
+    table = pd.DataFrame({
+        'params': [params_key(params) for params in candidates],
+        **{name: [params.get(name) for params in candidates]
+           for name in dict.fromkeys(name for params in candidates for name in params)},
+        'mean_rmse': scores.mean(axis=1),
+        'std_rmse': scores.std(axis=1),
+        **{f'fold{fold}_rmse': scores[:, fold] for fold in range(cv)},
+        'fit_seconds': seconds,
+    })
+    table['rank'] = table['mean_rmse'].rank(method='min').astype(int)
+    return table.sort_values('rank', kind='stable').reset_index(drop=True)
+
+
+def tune_price_model(df, param_grid=None, n_iter=None, cv=5, n_jobs=None, fingerprint=None,
+                     categorical_features=('brand',), encoding='onehot', registry=None):
+    """
+    Search forest hyperparameters for the price model by k-fold CV.
+
+    Searches every combination of param_grid (DEFAULT_PARAM_GRID by default),
+    or n_iter random samples of it. The winning parameters are trained with
+    train_price_model and registered like any other price model. Returns
+    (results table, best artifact); the table is also written as CSV next
+    to the registry's artifacts.
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    registry = get_registry() if registry is None else registry
+    candidates = candidate_params(param_grid, n_iter)
+
+    X, y = _valid_price_rows(df, categorical_features)
+    if len(X) < cv:
+        raise ValueError(f"Insufficient data for {cv}-fold cross-validation. Only {len(X)} valid samples available.")
+    encoder = FeatureEncoder(categorical_features=tuple(categorical_features), encoding=encoding).fit(X)
+    table = cross_validate_params(encoder.transform(X), y, candidates, cv=cv, n_jobs=n_jobs)
+
+    best = candidates[[params_key(params) for params in candidates].index(table.loc[0, 'params'])]
+    params = {'categorical_features': tuple(categorical_features), 'encoding': encoding, **best}
+    if params['categorical_features'] == ('brand',) and encoding == 'onehot':
+        # The defaults: keep the same registry key as untuned models
+        del params['categorical_features'], params['encoding']
+    artifact = registry.get_or_train(df, fingerprint, **params)
+
+    os.makedirs(registry.root, exist_ok=True)
+    table.to_csv(os.path.join(registry.root, f"tuning-{fingerprint[:16]}-{params_key(candidates)}.csv"),
+                 index=False)
+    return table, artifact
@@ -2,4 +2,4 @@ def save_plot(plot_func, df, save_path):
     """
     Generic function to save plot
     """
-    plot_func(df, save_path)
+    return plot_func(df, save_path)
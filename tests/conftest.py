@@ -0,0 +1,21 @@
+import shutil
+
+import pytest
+
+from src.data_loader import load_data, preprocess_data
+
+TRAIN_CSV = "data/train.csv"
+
+
+@pytest.fixture(scope="session")
+def train_df():
+    """data/train.csv loaded and preprocessed, without the dataset cache or a snapshot"""
+    return preprocess_data(load_data(TRAIN_CSV, use_snapshot=False))
+
+
+@pytest.fixture
+def train_csv(tmp_path):
+    """Path of a private copy of data/train.csv, free to modify and snapshot"""
+    path = tmp_path / "train.csv"
+    shutil.copyfile(TRAIN_CSV, path)
+    return str(path)
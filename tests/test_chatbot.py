@@ -0,0 +1,135 @@
+import pandas as pd
+import pytest
+
+from benchmarks.bench_chatbot import make_query_log
+from src.cache import dataset_fingerprint
+from src.chatbot import ChatbotEngine, chatbot, chatbot_batch, clear_engines
+from src.cube import clear_cubes
+
+
+def _find_column(df, possible_names):
+    for name in possible_names:
+        if name in df.columns:
+            return name
+    df_cols_lower = {col.lower(): col for col in df.columns}
+    for name in possible_names:
+        if name.lower() in df_cols_lower:
+            return df_cols_lower[name.lower()]
+    return None
+
+
+def reference_chatbot(df, query):
+    """The original rule-based chatbot, scanning the rows for every query"""
+    if df.empty:
+        return "No data available to answer your question."
+    query_lower = query.lower()
+    try:
+        if "average price" in query_lower or "mean price" in query_lower:
+            price_col = _find_column(df, ['price', 'Price', 'PRICE', 'price_usd', 'Price (USD)'])
+            if price_col:
+                prices = df[price_col].dropna()
+                prices = prices[prices > 0]
+                if not prices.empty:
+                    return f"The average EV price is ${prices.mean():,.2f}"
+                return "No valid price data available."
+            return "Price data is not available in the dataset."
+        elif "highest sales" in query_lower or "top sales" in query_lower:
+            model_col = _find_column(df, ['model', 'Model', 'MODEL'])
+            sales_col = _find_column(df, ['sales', 'Sales', 'SALES', 'quantity', 'units'])
+            brand_col = _find_column(df, ['brand', 'Brand', 'BRAND', 'manufacturer'])
+            if model_col and sales_col:
+                sales_data = df.groupby(model_col)[sales_col].sum()
+                sales_data = sales_data[sales_data > 0]
+                if not sales_data.empty:
+                    return (f"The model with highest sales is {sales_data.idxmax()} "
+                            f"with {sales_data.max():,.0f} units sold.")
+            if brand_col and sales_col:
+                sales_data = df.groupby(brand_col)[sales_col].sum()
+                sales_data = sales_data[sales_data > 0]
+                if not sales_data.empty:
+                    return (f"The brand with highest sales is {sales_data.idxmax()} "
+                            f"with {sales_data.max():,.0f} units sold.")
+            return "Sales data is not available in the dataset."
+        elif "forecast" in query_lower or "future sales" in query_lower:
+            year_col = _find_column(df, ['year', 'Year', 'YEAR'])
+            sales_col = _find_column(df, ['sales', 'Sales', 'SALES', 'quantity', 'units'])
+            if year_col and sales_col:
+                sales_yearly = df.groupby(year_col)[sales_col].sum().reset_index()
+                sales_yearly = sales_yearly[sales_yearly[sales_col] > 0]
+                if not sales_yearly.empty:
+                    latest_year = sales_yearly[year_col].max()
+                    last_year_sales = sales_yearly[sales_yearly[year_col] == latest_year][sales_col].values[0]
+                    return f"Latest year ({int(latest_year)}) total sales: {last_year_sales:,.0f} units"
+                return "Insufficient sales data for forecasting."
+            return "Year or sales data is not available in the dataset."
+        elif "brand" in query_lower:
+            brand_col = _find_column(df, ['brand', 'Brand', 'BRAND', 'manufacturer', 'Manufacturer'])
+            if brand_col:
+                brands = [str(b) for b in df[brand_col].dropna().unique() if str(b) != 'nan']
+                if brands:
+                    more_text = f" and {len(brands)-10} more." if len(brands) > 10 else "."
+                    return f"Available brands in the dataset: {', '.join(brands[:10])}{more_text}"
+                return "No brand information found in the dataset."
+            return "Brand information is not available in the dataset."
+        elif "model" in query_lower:
+            model_col = _find_column(df, ['model', 'Model', 'MODEL'])
+            if model_col:
+                models = [str(m) for m in df[model_col].dropna().unique() if str(m) != 'nan']
+                if models:
+                    return f"Total models in dataset: {len(models)}. Some examples: {', '.join(models[:5])}"
+                return "No model information found in the dataset."
+            return "Model information is not available in the dataset."
+        return ("I can help you with questions about average prices, highest sales, sales forecasts, brands, "
+                "and models. Please try rephrasing your question.")
+    except Exception as e:
+        return f"Error processing your question: {str(e)}"
+
+
+QUERIES = make_query_log(300, seed=1)
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    clear_cubes()
+    clear_engines()
+    yield
+    clear_cubes()
+    clear_engines()
+
+
+def frames(train_df):
+    region = train_df["Region"].iloc[0]
+    fingerprinted = train_df.copy(deep=False)
+    dataset_fingerprint(fingerprinted)
+    return {
+        "fingerprinted": fingerprinted,
+        "slice": train_df[train_df["Region"] == region],
+        "without models": train_df.drop(columns=["Model"]),
+        "empty": train_df.iloc[:0],
+    }
+
+
+@pytest.mark.parametrize("name", ["fingerprinted", "slice", "without models", "empty"])
+def test_answers_match_reference(train_df, name):
+    df = frames(train_df)[name]
+    expected = [reference_chatbot(df, query) for query in QUERIES]
+    assert [chatbot(df, query) for query in QUERIES] == expected
+    assert chatbot_batch(df, QUERIES) == expected
+
+
+def test_errors_are_not_cached(train_df, monkeypatch):
+    engine = ChatbotEngine(train_df)
+    answer = engine.ask("What brands are available?")
+    calls = []
+
+    def fail_once():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("transient")
+        return answer
+
+    engine = ChatbotEngine(train_df)
+    monkeypatch.setattr(engine, "_answer_brands", fail_once)
+    assert engine.ask("What brands are available?").startswith("Error processing your question")
+    assert engine.ask("What brands are available?") == answer
+    assert engine.answer_intent("brands") == answer
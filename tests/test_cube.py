@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cache import dataset_fingerprint, known_fingerprint
+from src.cube import cached_cube, clear_cubes, distinct_values, get_cube, mean_valid_price, sum_by
+from src.model import forecast_sales
+from src.schema import parse_month_column
+
+
+@pytest.fixture
+def fingerprinted(train_df):
+    """A frame whose fingerprint is known, so the cube answers for it"""
+    clear_cubes()
+    df = train_df.copy(deep=False)
+    dataset_fingerprint(df)
+    yield df
+    clear_cubes()
+
+
+def assert_sums_equal(actual, expected):
+    pd.testing.assert_series_equal(actual, expected, check_dtype=False, check_index_type=False,
+                                   check_categorical=False)
+
+
+@pytest.mark.parametrize("group_col,value_col", [
+    ("brand", "sales"), ("Model", "sales"), ("Region", "Units_Sold"), ("Vehicle_Type", "Revenue"),
+])
+def test_rollups_match_groupby(fingerprinted, group_col, value_col):
+    expected = fingerprinted.groupby(group_col, observed=True)[value_col].sum()
+    assert cached_cube(fingerprinted) is not None
+    assert_sums_equal(sum_by(fingerprinted, group_col, value_col), expected)
+
+
+def test_multi_dimension_and_year_rollups_match_groupby(fingerprinted):
+    cube = get_cube(fingerprinted)
+    df = fingerprinted
+    by_region_brand = cube.rollup(["Region", "Brand"])["units"]
+    expected = df.groupby(["Region", "Brand"], observed=True)["Units_Sold"].sum()
+    assert_sums_equal(by_region_brand.rename("Units_Sold"), expected)
+
+    by_year = cube.rollup(["year"])["revenue"]
+    expected = df.groupby(parse_month_column(df["Date"]).dt.year.rename("year"))["Revenue"].sum()
+    assert_sums_equal(by_year.rename("Revenue"), expected)
+
+
+def test_distinct_values_and_mean_price_match_the_rows(fingerprinted):
+    df = fingerprinted
+    assert distinct_values(df, "Model") == list(df["Model"].dropna().unique())
+    prices = df["price"][df["price"] > 0]
+    assert mean_valid_price(df, "price") == pytest.approx(prices.mean(), rel=1e-12)
+
+
+def test_ad_hoc_frames_are_scanned_without_fingerprinting(train_df):
+    clear_cubes()
+    region = train_df["Region"].iloc[0]
+    ad_hoc = train_df[train_df["Region"] == region]
+    result = sum_by(ad_hoc, "brand", "sales")
+
+    assert known_fingerprint(ad_hoc) is None
+    assert cached_cube(ad_hoc) is None
+    assert_sums_equal(result, ad_hoc.groupby("brand", observed=True)["sales"].sum())
+
+
+def test_frames_without_the_layout_have_no_cube():
+    df = pd.DataFrame({"brand": ["a", "b", "a"], "value": np.arange(3)})
+    assert get_cube(df) is None
+    assert_sums_equal(sum_by(df, "brand", "value"), df.groupby("brand")["value"].sum())
+
+
+def test_missing_dates_match_groupby_and_row_scans(train_df):
+    clear_cubes()
+    df = train_df.copy()
+    df.loc[df.index[:10], "Date"] = pd.NaT
+    dataset_fingerprint(df)
+
+    by_year = get_cube(df).rollup(["year"])["units"]
+    months = parse_month_column(df["Date"])
+    expected = df.groupby(months.dt.year.where(months.notna()).rename("year"))["Units_Sold"].sum()
+    assert_sums_equal(by_year.rename("Units_Sold"), expected)
+    assert -1 not in by_year.index
+
+    # A copy has no known fingerprint, so forecast_sales scans its rows
+    cube_history, _, cube_forecast = forecast_sales(df)
+    scan_history, _, scan_forecast = forecast_sales(df.copy())
+    assert known_fingerprint(df) is not None
+    pd.testing.assert_frame_equal(cube_history, scan_history, check_dtype=False)
+    np.testing.assert_allclose(cube_forecast, scan_forecast)
+    clear_cubes()
@@ -0,0 +1,133 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from benchmarks.bench_backtest import synthetic_series
+from src.forecasting import (
+    FORECASTERS, Forecaster, HoltWintersForecaster, SeasonalNaiveForecaster, SeriesMatrix, backtest,
+    choose_forecasters, fit_linear_trends, forecast_all, make_forecaster,
+)
+from src.schema import parse_month_column
+
+
+@pytest.fixture(scope="module")
+def seasonal_values():
+    return synthetic_series(200, 48, seed=3)
+
+
+def reference_backtest(values, name, horizon, n_origins):
+    """Per-series rolling-origin MAE, one fit per series and origin"""
+    n_months = values.shape[1]
+    maes = []
+    for row in values:
+        errors = []
+        for i in range(n_origins, 0, -1):
+            origin = n_months - horizon * i
+            model = make_forecaster(name).fit(row[None, :origin])
+            predicted = np.maximum(model.predict(horizon)[0], 0)
+            errors.extend(np.abs(predicted - row[origin:origin + horizon]))
+        maes.append(np.mean(errors))
+    return np.array(maes)
+
+
+def test_linear_trends_match_least_squares_per_series(seasonal_values):
+    intercept, slope = fit_linear_trends(seasonal_values)
+    t = np.arange(seasonal_values.shape[1]).reshape(-1, 1)
+    for i in (0, 57, 199):
+        model = LinearRegression().fit(t, seasonal_values[i])
+        assert slope[i] == pytest.approx(model.coef_[0], rel=1e-9)
+        assert intercept[i] == pytest.approx(model.intercept_, rel=1e-9)
+
+
+@pytest.mark.parametrize("name", list(FORECASTERS))
+def test_backtest_matches_per_series_loop(seasonal_values, name):
+    values = seasonal_values[:25]
+    scores = backtest(values, forecasters=[name], horizon=3, n_origins=4)
+
+    assert list(scores.index.get_level_values("forecaster").unique()) == [name]
+    np.testing.assert_allclose(scores["mae"].to_numpy(), reference_backtest(values, name, 3, 4), rtol=1e-9)
+    costs = scores[["model_fit_seconds", "model_predict_seconds"]]
+    assert (costs >= 0).all().all()
+    # One cost per model, shared by all its series
+    assert len(costs.drop_duplicates()) == 1
+
+
+def test_backtest_needs_enough_history():
+    with pytest.raises(ValueError, match="origins"):
+        backtest(np.ones((2, 9)), horizon=3, n_origins=3)
+
+
+def test_seasonal_models_beat_a_line_on_seasonal_series(seasonal_values):
+    mae = backtest(seasonal_values, horizon=3, n_origins=4)["mae"].groupby(level="forecaster").mean()
+    assert mae["holt_winters"] < mae["linear"]
+    assert mae["seasonal_naive"] < mae["linear"]
+
+
+def test_seasonal_naive_repeats_the_last_season():
+    values = np.arange(30, dtype=np.float64).reshape(1, -1)
+    predicted = SeasonalNaiveForecaster(season_length=12).fit(values).predict(15)
+    np.testing.assert_array_equal(predicted[0], np.r_[values[0, -12:], values[0, -12:-9]])
+
+
+@pytest.mark.parametrize("seasonal", [True, False])
+def test_holt_winters_reproduces_a_pure_trend(seasonal):
+    values = (50 + 4 * np.arange(36, dtype=np.float64))[None, :]
+    predicted = HoltWintersForecaster(seasonal=seasonal).fit(values).predict(6)
+    np.testing.assert_allclose(predicted[0], 50 + 4 * np.arange(36, 42), rtol=1e-9)
+
+
+def test_choose_forecasters_picks_the_cheapest_close_to_the_best():
+    index = pd.MultiIndex.from_product([["a", "b"], ["linear", "holt_winters"]], names=["series", "forecaster"])
+    scores = pd.DataFrame({
+        "mae": [10.2, 10.0, 20.0, 10.0],
+        "model_fit_seconds": [1e-6, 5e-6, 1e-6, 5e-6],
+        "model_predict_seconds": [0.0, 0.0, 0.0, 0.0],
+    }, index=index)
+
+    chosen = choose_forecasters(scores, tolerance=0.05)
+
+    assert chosen.to_dict() == {"a": "linear", "b": "holt_winters"}
+    assert choose_forecasters(scores, tolerance=0.0)["a"] == "holt_winters"
+
+
+def test_series_matrix_matches_pivot_of_the_rows(train_df):
+    df = train_df.copy(deep=False)
+    matrix = SeriesMatrix.from_frame(df, ["Brand", "Region"])
+
+    months = parse_month_column(df["Date"]).rename("year_month")
+    expected = (df["Units_Sold"].groupby([df["Brand"], df["Region"], months], observed=True).sum()
+                .unstack("year_month", fill_value=0)
+                .reindex(columns=matrix.months, fill_value=0))
+    actual = pd.DataFrame(matrix.values, index=matrix.keys, columns=matrix.months)
+    pd.testing.assert_frame_equal(actual, expected.reindex(actual.index).astype(np.float64),
+                                  check_names=False, check_index_type=False, check_column_type=False)
+
+    brands = matrix.aggregate(["Brand"])
+    expected = df["Units_Sold"].groupby(df["Brand"], observed=True).sum()
+    np.testing.assert_allclose(brands.values.sum(axis=1), expected.reindex(brands.keys).to_numpy())
+
+
+def test_forecast_all_shares_one_forecaster_across_levels(train_df):
+    forecaster = make_forecaster("damped_trend")
+    forecasts = forecast_all(train_df, levels=[("Brand",), ("Brand", "Region")], horizon=6, forecaster=forecaster)
+
+    for level, forecast in forecasts.items():
+        expected = np.maximum(copy.copy(forecaster).fit(forecast.matrix.values).predict(6), 0)
+        np.testing.assert_allclose(forecast.values, expected)
+        assert forecast.values.shape == (len(forecast.keys), 6)
+    # The instance passed in is left unfitted
+    assert not hasattr(forecaster, "level_")
+
+
+def test_incomplete_forecasters_cannot_be_created():
+    class FitOnly(Forecaster):
+        name = "fit_only"
+
+        def fit(self, values):
+            return self
+
+    with pytest.raises(TypeError):
+        FitOnly()
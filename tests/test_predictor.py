@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from src.model import PricePredictor, price_feature_frame, train_price_model
+
+CATEGORICAL = ("brand", "Model", "Region", "Vehicle_Type")
+
+
+@pytest.fixture(scope="module", params=[
+    (("brand",), "onehot"), (("brand",), "ordinal"), (CATEGORICAL, "onehot"), (CATEGORICAL, "ordinal"),
+], ids=lambda p: f"{len(p[0])}-categoricals-{p[1]}")
+def trained(request, train_df):
+    categorical, encoding = request.param
+    model, _ = train_price_model(train_df, n_estimators=10, categorical_features=categorical, encoding=encoding)
+    return model, categorical
+
+
+def test_predict_many_matches_model_predict(trained, train_df):
+    model, categorical = trained
+    records = train_df.sample(200, random_state=0)
+    expected = model.predict(price_feature_frame(records, categorical))
+    predictor = PricePredictor(model)
+
+    np.testing.assert_allclose(predictor.predict_many(records), expected, rtol=1e-12)
+    as_dicts = records[list(predictor.encoder.numeric_features) + list(categorical)].to_dict("records")
+    np.testing.assert_allclose(predictor.predict_many(as_dicts), expected, rtol=1e-12)
+
+
+def test_predict_one_matches_model_predict(trained, train_df):
+    model, categorical = trained
+    row = train_df.iloc[7]
+    expected = model.predict(price_feature_frame(train_df.iloc[[7]], categorical))[0]
+    extra = {name: row[name] for name in categorical if name != "brand"}
+    price = PricePredictor(model).predict_one(row["battery_kwh"], row["range_km"], row["year"],
+                                              row["acceleration"], row["brand"], **extra)
+    assert price == pytest.approx(expected, rel=1e-12)
+
+
+def test_unseen_and_missing_values_match_model_predict(trained, train_df):
+    model, categorical = trained
+    records = train_df.head(20).copy()
+    records["brand"] = records["brand"].astype(object)
+    records.loc[records.index[:5], "brand"] = "Unseen"
+    records.loc[records.index[5:10], "battery_kwh"] = np.nan
+    expected = model.predict(price_feature_frame(records, categorical))
+    np.testing.assert_allclose(PricePredictor(model).predict_many(records), expected, rtol=1e-12)
+
+
+def test_predict_many_of_nothing(trained):
+    model, _ = trained
+    assert len(PricePredictor(model).predict_many([])) == 0
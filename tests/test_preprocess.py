@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_preprocess import assert_identical, legacy_preprocess_data
+from src.data_loader import preprocess_data
+from src.schema import apply_schema
+
+
+def raw_frame(missing):
+    """train.csv as read without the schema, optionally with values blanked out"""
+    df = pd.read_csv("data/train.csv")
+    if missing:
+        rng = np.random.RandomState(0)
+        for col in ["Units_Sold", "Discount_Percentage", "Region", "Model"]:
+            df.loc[rng.random_sample(len(df)) < 0.05, col] = np.nan
+    return df
+
+
+@pytest.mark.parametrize("missing", [False, True])
+def test_matches_legacy_implementation_bit_for_bit(missing):
+    df = raw_frame(missing)
+    assert_identical(legacy_preprocess_data(df), preprocess_data(df))
+
+
+def test_input_frame_is_not_modified():
+    df = raw_frame(missing=True)
+    before = df.copy()
+    preprocess_data(df)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_fill_keeps_column_dtypes():
+    df = pd.DataFrame({
+        "nullable": pd.array([1, None, 3, 3], dtype="Int64"),
+        "floats": [1.0, np.nan, 3.0, np.nan],
+        "empty": [np.nan] * 4,
+        "objects": pd.Series(["x", None, "y", "y"], dtype=object),
+        "categories": pd.Categorical(["b", None, "a", "b"], categories=["b", "a"]),
+    })
+    out = preprocess_data(df)
+    assert out.dtypes.equals(df.dtypes)
+    assert out["nullable"].tolist() == [1, 3, 3, 3]
+    assert out["floats"].tolist() == [1.0, 2.0, 3.0, 2.0]
+    assert out["empty"].tolist() == [0.0] * 4
+    assert out["objects"].tolist() == ["x", "y", "y", "y"]
+    assert out["categories"].tolist() == ["b", "b", "a", "b"]
+
+
+def test_columns_sharing_data_are_filled_independently():
+    df = preprocess_data(raw_frame(missing=True))
+    # sales starts out as the same data as Units_Sold
+    df.loc[0, "sales"] = -1
+    assert df.loc[0, "Units_Sold"] != -1
+
+
+def test_missing_dates_get_the_median_year():
+    raw = pd.read_csv("data/train.csv")
+    raw.loc[[0, 5], "Date"] = np.nan
+    df = preprocess_data(apply_schema(raw.copy()))
+
+    years = pd.to_datetime(raw["Date"], format="%Y-%m").dt.year
+    assert df["year"].notna().all()
+    assert df.loc[[0, 5], "year"].tolist() == [years.median()] * 2
+    np.testing.assert_array_equal(df["year"].drop([0, 5]), years.drop([0, 5]))
@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src import data_loader, schema
+from src.data_loader import load_data, snapshot_path
+
+pytest.importorskip("pyarrow")
+
+
+def test_snapshot_is_written_and_read_back(train_csv):
+    from_csv = load_data(train_csv)
+    assert os.path.exists(snapshot_path(train_csv))
+    assert data_loader._snapshot_is_fresh(train_csv)
+    pd.testing.assert_frame_equal(load_data(train_csv), from_csv)
+
+
+def test_snapshot_is_stale_after_the_csv_changes(train_csv):
+    rows = len(load_data(train_csv))
+    with open(train_csv, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(train_csv, "w", encoding="utf-8") as f:
+        f.writelines(lines[:-10])
+    assert not data_loader._snapshot_is_fresh(train_csv)
+    assert len(load_data(train_csv)) == rows - 10
+    # The rebuilt snapshot matches the new CSV
+    assert data_loader._snapshot_is_fresh(train_csv)
+
+
+def test_snapshot_is_stale_under_another_format_version(train_csv, monkeypatch):
+    load_data(train_csv)
+    monkeypatch.setattr(data_loader, "SNAPSHOT_FORMAT_VERSION", data_loader.SNAPSHOT_FORMAT_VERSION + 1)
+    assert not data_loader._snapshot_is_fresh(train_csv)
+
+
+def test_snapshot_is_stale_under_another_schema(train_csv, monkeypatch):
+    load_data(train_csv)
+    monkeypatch.setattr(schema, "INTEGER_COLUMNS", schema.INTEGER_COLUMNS[:-1])
+    assert not data_loader._snapshot_is_fresh(train_csv)
+
+
+def test_corrupt_snapshot_falls_back_to_the_csv(train_csv):
+    expected = load_data(train_csv, use_snapshot=False)
+    with open(snapshot_path(train_csv), "wb") as f:
+        f.write(b"not parquet")
+    pd.testing.assert_frame_equal(load_data(train_csv), expected)
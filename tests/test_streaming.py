@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_loader import iter_data, load_data, preprocess_chunks, preprocess_data
+from src.schema import parse_month_column
+from src.streaming import aggregate_chunks, aggregate_stream, chunked_correlation, iter_row_chunks, price_histogram
+
+
+@pytest.fixture
+def csv_with_gaps(train_csv):
+    """train_csv with some sales, prices and models blanked out"""
+    df = pd.read_csv(train_csv)
+    rng = np.random.RandomState(0)
+    for col in ["Units_Sold", "Revenue", "Model"]:
+        df.loc[rng.random_sample(len(df)) < 0.05, col] = np.nan
+    df.to_csv(train_csv, index=False)
+    return train_csv
+
+
+def in_memory(path):
+    """The frame streaming should agree with: the whole file preprocessed at once, gaps kept"""
+    return preprocess_data(load_data(path, use_snapshot=False), fill_missing=False)
+
+
+def without_categoricals(df):
+    # Chunks parsed separately do not share categories; compare the values
+    return df.astype({col: str for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def assert_sums_equal(streamed, expected):
+    pd.testing.assert_series_equal(streamed.sort_index(), expected.sort_index(), check_names=False,
+                                   check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize("chunksize", [37, 100_000])
+def test_stream_matches_in_memory_aggregates(csv_with_gaps, chunksize):
+    df = in_memory(csv_with_gaps)
+    aggregates = aggregate_stream(csv_with_gaps, chunksize=chunksize, use_snapshot=False)
+
+    assert aggregates.rows == len(df)
+    assert_sums_equal(aggregates.sales_by_brand, df.groupby(df["brand"].astype(object))["sales"].sum())
+    assert_sums_equal(aggregates.sales_by_model, df.groupby(df["Model"].astype(object))["sales"].sum())
+    assert_sums_equal(aggregates.sales_by_month, df.groupby(parse_month_column(df["Date"]))["sales"].sum())
+
+    prices = df["price"][np.isfinite(df["price"])]
+    assert aggregates.price_count == len(prices)
+    assert aggregates.average_price == pytest.approx(prices.mean(), rel=1e-12)
+    assert aggregates.battery_price_correlation == pytest.approx(df["battery_kwh"].corr(df["price"]), rel=1e-9)
+
+
+def test_preprocessed_chunks_match_whole_file(csv_with_gaps):
+    chunks = preprocess_chunks(iter_data(csv_with_gaps, chunksize=50, use_snapshot=False))
+    streamed = pd.concat(list(chunks), ignore_index=True)
+    pd.testing.assert_frame_equal(without_categoricals(streamed), without_categoricals(in_memory(csv_with_gaps)))
+
+
+def test_sorted_aggregates_are_independent_of_chunking(train_df):
+    whole = aggregate_chunks([train_df])
+    chunked = aggregate_chunks(iter_row_chunks(train_df, 41))
+    # Sums of small integer columns may come back in a narrower dtype from a single chunk
+    pd.testing.assert_series_equal(chunked.sales_by_brand, whole.sales_by_brand, check_dtype=False)
+    pd.testing.assert_series_equal(chunked.sales_by_month, whole.sales_by_month, check_dtype=False)
+
+
+def test_chunked_correlation_matches_dataframe_corr(train_df):
+    numeric = train_df.select_dtypes(include="number")
+    expected = numeric.loc[:, numeric.std() > 0].corr()
+    pd.testing.assert_frame_equal(chunked_correlation(numeric, chunk_rows=64), expected, rtol=1e-9)
+
+
+def test_price_histogram_matches_numpy(train_df):
+    prices = train_df["price"].to_numpy()
+    counts, edges, sample = price_histogram(prices, bins=30, chunk_rows=50)
+
+    valid = prices[prices > 0]
+    mean, std = valid.mean(), valid.std(ddof=1)
+    kept = valid[(valid >= mean - 3 * std) & (valid <= mean + 3 * std)]
+    expected_counts, expected_edges = np.histogram(kept, bins=30)
+    np.testing.assert_allclose(edges, expected_edges)
+    np.testing.assert_array_equal(counts, expected_counts)
+    # Fewer prices than the KDE sample size: all of them are sampled
+    np.testing.assert_array_equal(np.sort(sample), np.sort(kept))